@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the pipeline.
+
+- `library`: synthetic EPUB library generator (configurable shapes and metadata quirks).
+- `run`: reproducible benchmark suite, results written as JSON (`python -m benchmarks.run`).
+- `standin`: local lookalikes of the Google Books and OpenLibrary APIs (scripted latency and faults).
+- `throughput`: `find_book` throughput against the stand-ins (`python -m benchmarks.throughput`).
+"""
@@ -0,0 +1,298 @@
+import argparse
+import io
+import os
+import random
+import zipfile
+from typing import Dict, List, Optional
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+# Library shapes: content size per book, and the probability of each metadata quirk
+SHAPES: Dict[str, dict] = {
+    # Short books, clean metadata
+    "tiny": {"chapters": 2, "chapter_kb": 4, "images": 0, "image_kb": 0, "cover_kb": 20, "quirks": {}},
+    # Typical novels, as bought from a store
+    "novel": {
+        "chapters": 25,
+        "chapter_kb": 24,
+        "images": 0,
+        "image_kb": 0,
+        "cover_kb": 120,
+        "quirks": {"missing-isbn": 0.2, "calibre": 0.3, "epub3": 0.4},
+    },
+    # Comics, cookbooks, art books: few words, heavy images
+    "illustrated": {
+        "chapters": 12,
+        "chapter_kb": 6,
+        "images": 10,
+        "image_kb": 250,
+        "cover_kb": 400,
+        "quirks": {"epub3": 0.5},
+    },
+    # Library of mixed origins: every quirk is common
+    "messy": {
+        "chapters": 15,
+        "chapter_kb": 16,
+        "images": 1,
+        "image_kb": 60,
+        "cover_kb": 80,
+        "quirks": {
+            "missing-isbn": 0.3,
+            "isbn-in-filename": 0.2,
+            "calibre": 0.5,
+            "epub3": 0.3,
+            "no-author": 0.1,
+            "unicode": 0.3,
+        },
+    },
+}
+
+QUIRKS = ("missing-isbn", "isbn-in-filename", "calibre", "epub3", "no-author", "unicode")
+
+WORDS = (
+    "the of and to in a is that was he for it with as his on be at by had not are but from or have an they "
+    "which one you were her all she there would their we him been has when who will more no if out so said "
+    "what up its about into than them can only other new some could time these two may then do first any my "
+    "now such like our over man me even most made after also did many before must through back years where"
+).split()
+TITLE_WORDS = (
+    "shadow empire night river garden winter stone crown silent city last forgotten dark golden house "
+    "storm glass iron wild kingdom secret island memory fire ocean"
+).split()
+FIRST_NAMES = "Ada Alan Grace Ursula Isaac Mary Frank Octavia Jules Agatha Leo Virginia Gabriel Toni".split()
+LAST_NAMES = (
+    "Lovelace Turing Hopper Ishiguro Asimov Shelley Herbert Butler Verne Christie Tolstoy Woolf Marquez".split()
+)
+UNICODE_TITLES = ("Les Misérables", "Cien años de soledad", "Der Zauberberg", "Война и мир", "ノルウェイの森")
+
+
+def _isbn13(rng: random.Random) -> str:
+    """Random ISBN-13 with a valid check digit."""
+    digits = "978" + "".join(str(rng.randrange(10)) for _ in range(9))
+    check = (10 - sum((3 if i % 2 else 1) * int(d) for i, d in enumerate(digits)) % 10) % 10
+    return digits + str(check)
+
+
+def _paragraphs(rng: random.Random, size: int) -> str:
+    """Lorem-style paragraphs of about `size` bytes."""
+    paragraphs = []
+    total = 0
+    while total < size:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(WORDS, k=rng.randint(6, 18))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = f"<p>{' '.join(sentences)}</p>"
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+    return "\n".join(paragraphs)
+
+
+def _jpeg(rng: random.Random, kb: int) -> bytes:
+    """Noise JPEG of roughly `kb` kilobytes (noise barely compresses: about 1.5 bytes per pixel)."""
+    from PIL import Image
+
+    side = max(8, int((kb * 1024 / 1.5) ** 0.5))
+    image = Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def book_spec(rng: random.Random, index: int, shape: dict) -> dict:
+    """Random (but seeded) metadata of one book, with its quirks."""
+    quirks = [name for name, probability in shape["quirks"].items() if rng.random() < probability]
+    title = " ".join(rng.sample(TITLE_WORDS, rng.randint(2, 4))).title()
+    if "unicode" in quirks:
+        title = rng.choice(UNICODE_TITLES)
+    authors = [] if "no-author" in quirks else [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"]
+    isbn = _isbn13(rng)
+
+    filename = f"book_{index:05d}.epub"
+    if "isbn-in-filename" in quirks:
+        filename = f"{title.replace(' ', '_')}-{isbn}.epub"
+    return {
+        "filename": filename,
+        "title": f"{title} {index}",
+        "authors": authors,
+        "isbn": None if "missing-isbn" in quirks or "isbn-in-filename" in quirks else isbn,
+        "true_isbn": isbn,
+        "language": "en",
+        "date": str(rng.randint(1850, 2024)),
+        "publisher": rng.choice(("Penguin", "Gallimard", "Tor Books", "Vintage")),
+        "quirks": quirks,
+    }
+
+
+def _opf(spec: dict, shape: dict) -> str:
+    epub3 = "epub3" in spec["quirks"]
+    calibre = "calibre" in spec["quirks"]
+    meta = [
+        f'<dc:identifier id="bookid">urn:uuid:bench-{spec["filename"]}</dc:identifier>',
+        f"<dc:title>{spec['title']}</dc:title>",
+        f"<dc:language>{spec['language']}</dc:language>",
+        f"<dc:date>{spec['date']}</dc:date>",
+        f"<dc:publisher>{spec['publisher']}</dc:publisher>",
+        '<meta name="cover" content="cover-img"/>',
+    ]
+    for author in spec["authors"]:
+        file_as = ", ".join(reversed(author.split(" ", 1)))
+        meta.append(f'<dc:creator opf:role="aut" opf:file-as="{file_as}">{author}</dc:creator>')
+    if spec["isbn"]:
+        meta.append(f'<dc:identifier opf:scheme="ISBN">{spec["isbn"]}</dc:identifier>')
+    if calibre:
+        meta += [
+            f'<meta name="calibre:title_sort" content="{spec["title"]}"/>',
+            '<meta name="calibre:series" content="Benchmark Series"/>',
+            '<meta name="calibre:series_index" content="1.0"/>',
+            '<meta name="calibre:timestamp" content="2020-01-01T00:00:00+00:00"/>',
+        ]
+    if epub3:
+        meta.append('<meta property="dcterms:modified">2020-01-01T00:00:00Z</meta>')
+
+    items = ['<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>']
+    items.append('<item id="cover-img" href="images/cover.jpg" media-type="image/jpeg"/>')
+    if epub3:
+        items.append('<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>')
+    items += [
+        f'<item id="chap_{n}" href="chap_{n}.xhtml" media-type="application/xhtml+xml"/>'
+        for n in range(1, shape["chapters"] + 1)
+    ]
+    items += [
+        f'<item id="img_{n}" href="images/img_{n}.jpg" media-type="image/jpeg"/>' for n in range(1, shape["images"] + 1)
+    ]
+    itemrefs = [f'<itemref idref="chap_{n}"/>' for n in range(1, shape["chapters"] + 1)]
+
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="{"3.0" if epub3 else "2.0"}" unique-identifier="bookid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    {chr(10).join("    " + line for line in meta).strip()}
+  </metadata>
+  <manifest>
+    {chr(10).join("    " + line for line in items).strip()}
+  </manifest>
+  <spine toc="ncx">
+    {chr(10).join("    " + line for line in itemrefs).strip()}
+  </spine>
+</package>
+"""
+
+
+def _ncx(spec: dict, chapters: int) -> str:
+    points = "\n".join(
+        f'    <navPoint id="np_{n}" playOrder="{n}"><navLabel><text>Chapter {n}</text></navLabel>'
+        f'<content src="chap_{n}.xhtml"/></navPoint>'
+        for n in range(1, chapters + 1)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <head><meta name="dtb:uid" content="bench-{spec["filename"]}"/></head>
+  <docTitle><text>{spec["title"]}</text></docTitle>
+  <navMap>
+{points}
+  </navMap>
+</ncx>
+"""
+
+
+def _nav(chapters: int) -> str:
+    links = "\n".join(f'<li><a href="chap_{n}.xhtml">Chapter {n}</a></li>' for n in range(1, chapters + 1))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
+<head><title>Contents</title></head>
+<body><nav epub:type="toc"><ol>
+{links}
+</ol></nav></body>
+</html>
+"""
+
+
+def _chapter(rng: random.Random, n: int, size: int, image: Optional[int]) -> str:
+    figure = f'<div><img src="images/img_{image}.jpg" alt=""/></div>' if image else ""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Chapter {n}</title></head>
+<body>
+<h1>Chapter {n}</h1>
+{figure}
+{_paragraphs(rng, size)}
+</body>
+</html>
+"""
+
+
+def write_book(path: str, spec: dict, shape: dict, rng: random.Random):
+    """Writes one synthetic EPUB (EPUB 2, or EPUB 3 with the `epub3` quirk)."""
+    chapters, images = shape["chapters"], shape["images"]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", CONTAINER_XML)
+        archive.writestr("OEBPS/content.opf", _opf(spec, shape))
+        archive.writestr("OEBPS/toc.ncx", _ncx(spec, chapters))
+        if "epub3" in spec["quirks"]:
+            archive.writestr("OEBPS/nav.xhtml", _nav(chapters))
+        for n in range(1, chapters + 1):
+            # Images are spread over the first chapters
+            image = n if n <= images else None
+            archive.writestr(f"OEBPS/chap_{n}.xhtml", _chapter(rng, n, shape["chapter_kb"] * 1024, image))
+        # JPEG data is already compressed
+        archive.writestr("OEBPS/images/cover.jpg", _jpeg(rng, shape["cover_kb"]), compress_type=zipfile.ZIP_STORED)
+        for n in range(1, images + 1):
+            archive.writestr(
+                f"OEBPS/images/img_{n}.jpg", _jpeg(rng, shape["image_kb"]), compress_type=zipfile.ZIP_STORED
+            )
+
+
+def generate_library(directory: str, count: int, shape: str = "novel", seed: int = 0, **overrides) -> List[dict]:
+    """
+    Writes `count` synthetic books into `directory`. Same arguments, same library (byte for byte,
+    apart from zip timestamps). `overrides` replace fields of the shape (e.g. chapters=50).
+    Returns the spec of every book (metadata, quirks and `path`).
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown library shape '{shape}' (expected one of: {', '.join(SHAPES)})")
+    settings = {**SHAPES[shape], **overrides}
+    unknown = set(settings["quirks"]) - set(QUIRKS)
+    if unknown:
+        raise ValueError(f"Unknown quirk(s): {', '.join(sorted(unknown))}")
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    specs = []
+    for index in range(count):
+        spec = book_spec(rng, index, settings)
+        spec["path"] = os.path.join(directory, spec["filename"])
+        write_book(spec["path"], spec, settings, rng)
+        specs.append(spec)
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic EPUB library.")
+    parser.add_argument("directory", help="Output directory.")
+    parser.add_argument("-n", "--count", type=int, default=50, help="Number of books.")
+    parser.add_argument("--shape", choices=list(SHAPES), default="novel", help="Library shape.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same library).")
+    parser.add_argument("--chapters", type=int, help="Override the shape's chapter count.")
+    parser.add_argument("--image-kb", type=int, help="Override the shape's image weight.")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.chapters is not None:
+        overrides["chapters"] = args.chapters
+    if args.image_kb is not None:
+        overrides["image_kb"] = args.image_kb
+    specs = generate_library(args.directory, args.count, args.shape, args.seed, **overrides)
+    size = sum(os.path.getsize(spec["path"]) for spec in specs)
+    print(f"{len(specs)} books written to {args.directory} ({size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
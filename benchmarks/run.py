@@ -0,0 +1,427 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.library import SHAPES, generate_library
+from epub_pipeline import config
+
+# JSON layout version: bump when the meaning of a field changes
+SCHEMA_VERSION = 1
+COVER_URL = "https://covers.bench.invalid/{isbn}.jpg"
+
+# name -> setup(context) returning (timed callable, operations per call)
+Benchmark = Callable[[dict], Tuple[Callable[[], object], int]]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def measure(fn: Callable[[], object], ops: int, repeat: int) -> dict:
+    """Times `repeat` calls of `fn` (after one warm-up call). Figures are per operation, in milliseconds."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000 / ops)
+    median = statistics.median(timings)
+    return {
+        "unit": "ms/op",
+        "ops": ops,
+        "runs": repeat,
+        "min": round(min(timings), 4),
+        "median": round(median, 4),
+        "mean": round(statistics.fmean(timings), 4),
+        "stdev": round(statistics.stdev(timings), 4) if repeat > 1 else 0.0,
+        "ops_per_sec": round(1000 / median, 2) if median else None,
+    }
+
+
+@contextlib.contextmanager
+def overrides(**values):
+    """Temporarily sets config values."""
+    previous = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+
+def _image(size: Tuple[int, int], mode: str, fmt: str) -> bytes:
+    from PIL import Image
+
+    image = Image.effect_noise(size, 48).convert(mode)
+    output = io.BytesIO()
+    image.save(output, format=fmt)
+    return output.getvalue()
+
+
+# --- Components ---
+
+
+@benchmark("epub_manager.parse")
+def bench_parse(context):
+    from epub_pipeline.pipeline.epub_manager import EpubManager
+
+    paths = [spec["path"] for spec in context["specs"]]
+    return lambda: [EpubManager(path, streaming=False) for path in paths], len(paths)
+
+
+@benchmark("epub_manager.get_curated_metadata")
+def bench_curated(context):
+    from epub_pipeline.pipeline.epub_manager import EpubManager
+
+    managers = [EpubManager(spec["path"], streaming=False) for spec in context["specs"]]
+    return lambda: [manager.get_curated_metadata() for manager in managers], len(managers)
+
+
+@benchmark("opf_reader.get_curated_metadata")
+def bench_opf_reader(context):
+    from epub_pipeline.pipeline.metadata_reader import OpfReader
+
+    paths = [spec["path"] for spec in context["specs"]]
+    return lambda: [OpfReader(path).get_curated_metadata() for path in paths], len(paths)
+
+
+@benchmark("epub_manager.save")
+def bench_save(context):
+    from epub_pipeline.pipeline.epub_manager import EpubManager
+
+    managers = []
+    for spec in context["specs"]:
+        manager = EpubManager(spec["path"], streaming=False)
+        manager.update_metadata({"title": spec["title"], "authors": ["Bench Author"], "isbn": spec["true_isbn"]})
+        managers.append(manager)
+    output = os.path.join(context["workdir"], "saved.epub")
+    return lambda: [manager.save(output) for manager in managers], len(managers)
+
+
+@benchmark("confidence.calculate")
+def bench_confidence(context):
+    from epub_pipeline.search.confidence import ConfidenceScorer
+
+    rng = random.Random(context["seed"])
+    pairs = []
+    for spec in context["specs"]:
+        local = {"title": spec["title"], "authors": spec["authors"] or ["Unknown"], "isbn": spec["isbn"]}
+        # Remote titles as providers return them: exact, with a subtitle, reordered or unrelated
+        variants = [
+            spec["title"],
+            f"{spec['title']}: A Novel",
+            " ".join(reversed(spec["title"].split())),
+            "An Entirely Different Book",
+        ]
+        for title in variants:
+            remote = {"title": title, "authors": spec["authors"] or ["Someone Else"]}
+            pairs.append(("ISBN" if spec["isbn"] else "Text", local, remote, rng.randint(1, 50)))
+    return lambda: [ConfidenceScorer.calculate(*pair) for pair in pairs], len(pairs)
+
+
+def _anthologies(seed: int, count: int = 20, size: int = 40) -> List[Tuple[List[str], List[str]]]:
+    """Pairs of large author lists (anthologies): every remote name is reordered, abbreviated or misspelled."""
+    from benchmarks.library import FIRST_NAMES, LAST_NAMES
+
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        local = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}-{rng.randrange(1000)}" for _ in range(size)]
+        remote = []
+        for name in rng.sample(local, size):
+            first, last = name.split(" ", 1)
+            remote.append(rng.choice([f"{last[:-1]}x, {first}", f"{first[0]}. {last}", f"{first} {last[:-1]}x"]))
+        pairs.append((local, remote))
+    return pairs
+
+
+def _legacy_author_similarity(local: List[str], remote: List[str]) -> float:
+    """Author comparison before the similarity engine: difflib on every pair."""
+    import difflib
+
+    best = 0.0
+    for l_auth in local:
+        for r_auth in remote:
+            best = max(best, difflib.SequenceMatcher(None, l_auth.lower(), r_auth.lower()).ratio())
+    return best
+
+
+@benchmark("similarity.authors.legacy")
+def bench_authors_legacy(context):
+    pairs = _anthologies(context["seed"])
+    return lambda: [_legacy_author_similarity(local, remote) for local, remote in pairs], len(pairs)
+
+
+def _bench_authors(backend: str) -> Benchmark:
+    def setup(context):
+        from epub_pipeline.utils.similarity import best_name_similarity
+
+        pairs = _anthologies(context["seed"])
+        context["stack"].enter_context(overrides(SIMILARITY_BACKEND=backend))
+        return lambda: [best_name_similarity(local, remote) for local, remote in pairs], len(pairs)
+
+    return setup
+
+
+for _backend in ("difflib", "indel"):
+    benchmark(f"similarity.authors.{_backend}")(_bench_authors(_backend))
+
+
+@benchmark("cover.process_image")
+def bench_cover(context):
+    from epub_pipeline.pipeline.cover_manager import CoverManager
+
+    # A large store JPEG (resized down) and a transparent PNG (flattened, converted)
+    images = [_image((2400, 3600), "RGB", "JPEG"), _image((1000, 1500), "RGBA", "PNG")]
+    return lambda: [CoverManager.process_image(image) for image in images], len(images)
+
+
+@benchmark("text.sanitize_filename")
+def bench_sanitize(context):
+    from epub_pipeline.utils.text_utils import sanitize_filename
+
+    names = [f"{spec['title']} - {', '.join(spec['authors'])}: <draft>?" for spec in context["specs"]] * 50
+    return lambda: [sanitize_filename(name) for name in names], len(names)
+
+
+# Books in the offline index searched by the local_index benchmarks
+LOCAL_INDEX_BOOKS = 20000
+
+
+def _local_index(context) -> Tuple[object, List[dict]]:
+    """Offline index of LOCAL_INDEX_BOOKS fixture books (built once per run), and the indexed records."""
+    from benchmarks.standin import fixture_records, write_openlibrary_dump
+    from epub_pipeline.search.local_index import LocalIndex
+
+    records = fixture_records(LOCAL_INDEX_BOOKS, context["seed"])
+    path = os.path.join(context["workdir"], "openlibrary_index.sqlite")
+    built = os.path.exists(path)
+    index = LocalIndex(path)
+    if not built:
+        dump = os.path.join(context["workdir"], "openlibrary_dump.txt.gz")
+        write_openlibrary_dump(records, dump)
+        index.import_dump(dump)
+        index.build_text_index()
+    context["stack"].callback(index.close)
+    return index, records
+
+
+@benchmark("local_index.get_by_isbn")
+def bench_local_isbn(context):
+    index, records = _local_index(context)
+    isbns = [record["isbn"] for record in random.Random(context["seed"]).sample(records, 1000)]
+    return lambda: [index.get_by_isbn(isbn) for isbn in isbns], len(isbns)
+
+
+@benchmark("local_index.search")
+def bench_local_search(context):
+    index, records = _local_index(context)
+    rng = random.Random(context["seed"])
+    queries = []
+    for record in rng.sample(records, 100):
+        # Exact titles, and titles with a typo (trigram path)
+        title = record["title"]
+        cut = rng.randrange(len(title))
+        queries += [(title, record["authors"][0]), (title[:cut] + title[cut + 1 :], record["authors"][0])]
+    return lambda: [index.search(title, author) for title, author in queries], len(queries)
+
+
+# --- Full pipeline ---
+
+
+def _google_item(spec: dict) -> dict:
+    return {
+        "id": f"bench-{spec['true_isbn']}",
+        "volumeInfo": {
+            "title": spec["title"],
+            "authors": spec["authors"] or ["Unknown"],
+            "publisher": spec["publisher"],
+            "publishedDate": spec["date"],
+            "description": "Synthetic book.",
+            "language": spec["language"],
+            "industryIdentifiers": [{"type": "ISBN_13", "identifier": spec["true_isbn"]}],
+            "imageLinks": {"thumbnail": COVER_URL.format(isbn=spec["true_isbn"])},
+        },
+    }
+
+
+@contextlib.contextmanager
+def mocked_apis(specs: List[dict]):
+    """
+    Google Books answers from the library specs (ISBN and title queries), OpenLibrary knows nothing,
+    covers are served from memory. Anything else fails: a benchmark never reaches the network.
+    """
+    import requests_mock
+
+    by_isbn = {spec["true_isbn"]: spec for spec in specs}
+    cover = _image((600, 900), "RGB", "JPEG")
+
+    def google(request, context):
+        query = parse_qs(urlparse(request.url).query).get("q", [""])[0]
+        if query.startswith("isbn:"):
+            spec = by_isbn.get(query[len("isbn:") :])
+            matches = [spec] if spec else []
+        else:
+            matches = [spec for spec in specs if spec["title"].lower() in query.lower()]
+        return {"totalItems": len(matches), "items": [_google_item(spec) for spec in matches]}
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(config.GOOGLE_API_URL, json=google)
+        mocker.get(f"{config.OPENLIBRARY_URL}/api/books", json={})
+        mocker.get(f"{config.OPENLIBRARY_URL}/search.json", json={"numFound": 0, "docs": []})
+        mocker.get(COVER_URL.split("{")[0], content=cover, headers={"Content-Type": "image/jpeg"})
+        yield mocker
+
+
+@benchmark("pipeline.process_directory")
+def bench_pipeline(context):
+    from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+
+    library = os.path.dirname(context["specs"][0]["path"])
+    data_dir = os.path.join(context["workdir"], "data")
+    stack = context["stack"]
+    stack.enter_context(
+        overrides(
+            DATA_DIR=data_dir,
+            STATE_DB_PATH=os.path.join(data_dir, "state.sqlite"),
+            CATALOG_DB_PATH=os.path.join(data_dir, "catalog.sqlite"),
+            FINGERPRINT_DB_PATH=os.path.join(data_dir, "fingerprints.sqlite"),
+            RATE_LIMIT_PATH=os.path.join(data_dir, "rate_limits.sqlite"),
+            CACHE_MODE="off",
+            GOOGLE_RATE_LIMIT=0.0,
+            OPENLIBRARY_RATE_LIMIT=0.0,
+            KEPUB_CONVERTER="native",
+            DRIVE_FOLDER_ID=None,
+        )
+    )
+    stack.enter_context(mocked_apis(context["specs"]))
+    # Outputs land in ./output
+    stack.enter_context(contextlib.chdir(context["workdir"]))
+
+    def run():
+        # Fresh orchestrator: a run starts with cold per-run state, like the CLI
+        PipelineOrchestrator(auto_save=True, enable_upload=False, jobs=context["jobs"]).process_directory(library)
+
+    return run, len(context["specs"])
+
+
+# --- Driver ---
+
+
+def _commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _version() -> Optional[str]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("epub-pipeline")
+    except PackageNotFoundError:
+        return None
+
+
+def environment() -> dict:
+    """Header of every JSON report: what was measured, where."""
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "version": _version(),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(names: List[str], books: int, shape: str, seed: int, repeat: int, jobs: int = 1) -> dict:
+    """Runs the selected benchmarks on a freshly generated library. Returns the JSON-ready report."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="epub-bench-") as workdir:
+        specs = generate_library(os.path.join(workdir, "library"), books, shape, seed)
+        for name in names:
+            with contextlib.ExitStack() as stack:
+                context = {"specs": specs, "workdir": workdir, "seed": seed, "jobs": jobs, "stack": stack}
+                fn, ops = BENCHMARKS[name](context)
+                # The pipeline logs every book: keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = measure(fn, ops, repeat)
+            print(f"{name:<36} {results[name]['median']:>10.3f} ms/op  (min {results[name]['min']:.3f})")
+
+    return {
+        **environment(),
+        "params": {"books": books, "shape": shape, "seed": seed, "repeat": repeat, "jobs": jobs},
+        "results": results,
+    }
+
+
+def compare(baseline: dict, report: dict):
+    """Prints the median change of every benchmark present in both reports."""
+    if baseline.get("params") != report["params"]:
+        print(f"Warning: parameters differ from the baseline ({baseline.get('params')})")
+    print(f"\n{'benchmark':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        change = (result["median"] - old["median"]) / old["median"] * 100 if old["median"] else 0.0
+        print(f"{name:<36} {old['median']:>10.3f} {result['median']:>10.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the performance benchmarks on a synthetic library.")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of a previous run to compare against.")
+    parser.add_argument("-n", "--books", type=int, default=20, help="Books in the generated library.")
+    parser.add_argument("--shape", choices=list(SHAPES), default="novel", help="Library shape.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the library and inputs.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per benchmark.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Workers of the process_directory benchmark.")
+    parser.add_argument(
+        "--only", action="append", metavar="PREFIX", help="Run the benchmarks starting with PREFIX (repeatable)."
+    )
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(p) for p in args.only)]
+    if not names:
+        parser.error(f"No benchmark matches {args.only} (available: {', '.join(BENCHMARKS)})")
+
+    report = run_suite(names, args.books, args.shape, args.seed, max(1, args.repeat), args.jobs)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,503 @@
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.library import book_spec
+
+GOOGLE_PATH = "/books/v1/volumes"
+APIS = ("google", "openlibrary")
+# Trailing year of a Google text query ("intitle:Dune inauthor:Herbert 1965")
+_YEAR = re.compile(r"\s(\d{4})$")
+_FIELD = re.compile(r"(intitle|inauthor|inpublisher|isbn):")
+
+
+class Latency:
+    """
+    Latency distribution, parsed from a spec string (times in milliseconds):
+    'none', 'fixed:MS', 'uniform:MIN:MAX', 'normal:MEAN:STDEV' or 'lognormal:MEDIAN:SIGMA'.
+    """
+
+    KINDS = {"none": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+    def __init__(self, spec: str = "none"):
+        kind, *args = spec.split(":")
+        if kind not in self.KINDS or len(args) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency '{spec}' (expected e.g. fixed:50, uniform:20:80, lognormal:100:0.5)")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(a) for a in args]
+
+    def sample(self, rng: random.Random) -> float:
+        """Returns one delay, in seconds."""
+        if self.kind == "fixed":
+            ms = self.args[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.args)
+        elif self.kind == "normal":
+            ms = rng.gauss(*self.args)
+        elif self.kind == "lognormal":
+            median, sigma = self.args
+            ms = median * rng.lognormvariate(0, sigma)
+        else:
+            ms = 0.0
+        return max(0.0, ms) / 1000
+
+
+class ApiProfile:
+    """
+    Scripted behaviour of one API: response latency, and the share of requests answered
+    429 (rate limited), 503 (overloaded) or never answered at all (the client times out).
+    """
+
+    def __init__(self, latency="none", rate_429=0.0, rate_503=0.0, timeout_rate=0.0, retry_after=None, hang=60.0):
+        self.latency = Latency(latency)
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.timeout_rate = timeout_rate
+        # Retry-After header of the 429/503 answers (seconds), None = not sent
+        self.retry_after = retry_after
+        # How long a "timed out" request hangs before the connection is dropped
+        self.hang = hang
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ApiProfile":
+        """Profile of a scenario file: {"latency": "lognormal:120:0.5", "429": 0.02, "503": 0.01, "timeout": 0.005}."""
+        return cls(
+            latency=data.get("latency", "none"),
+            rate_429=data.get("429", 0.0),
+            rate_503=data.get("503", 0.0),
+            timeout_rate=data.get("timeout", 0.0),
+            retry_after=data.get("retry_after"),
+            hang=data.get("hang", 60.0),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "latency": self.latency.spec,
+            "429": self.rate_429,
+            "503": self.rate_503,
+            "timeout": self.timeout_rate,
+            "retry_after": self.retry_after,
+        }
+
+    def fault(self, rng: random.Random) -> Optional[str]:
+        """Draws the fate of a request: '429', '503', 'timeout' or None (answered normally)."""
+        roll = rng.random()
+        for fault, rate in (("429", self.rate_429), ("503", self.rate_503), ("timeout", self.timeout_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def fixture_records(count: int, seed: int = 0) -> List[dict]:
+    """Catalog of `count` random books (same seed, same catalog)."""
+    rng = random.Random(seed)
+    shape = {"quirks": {"unicode": 0.1}}
+    records = []
+    for index in range(count):
+        spec = book_spec(rng, index, shape)
+        records.append(
+            {
+                "isbn": spec["true_isbn"],
+                "title": spec["title"],
+                "authors": spec["authors"] or ["Anonymous"],
+                "publisher": spec["publisher"],
+                "date": spec["date"],
+                "language": spec["language"],
+            }
+        )
+    return records
+
+
+def write_openlibrary_dump(records: List[dict], path: str):
+    """
+    Writes fixture records as a gzipped OpenLibrary dump (official tab-separated layout):
+    one author record per distinct name, one work and one edition per book.
+    """
+    authors: Dict[str, str] = {}
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+
+        def write(record: dict):
+            kind = record["type"]["key"]
+            f.write(f"{kind}\t{record['key']}\t1\t2024-01-01T00:00:00\t{json.dumps(record)}\n")
+
+        for n, record in enumerate(records, start=1):
+            refs = []
+            for name in record["authors"]:
+                if name not in authors:
+                    authors[name] = f"/authors/OL{len(authors) + 1}A"
+                    write({"type": {"key": "/type/author"}, "key": authors[name], "name": name})
+                refs.append({"key": authors[name]})
+            write(
+                {
+                    "type": {"key": "/type/work"},
+                    "key": f"/works/OL{n}W",
+                    "title": record["title"],
+                    "authors": [{"author": ref, "type": {"key": "/type/author_role"}} for ref in refs],
+                }
+            )
+            write(
+                {
+                    "type": {"key": "/type/edition"},
+                    "key": f"/books/OL{n}M",
+                    "title": record["title"],
+                    "authors": refs,
+                    "works": [{"key": f"/works/OL{n}W"}],
+                    "isbn_13": [record["isbn"]],
+                    "publishers": [record["publisher"]],
+                    "publish_date": record["date"],
+                    "languages": [{"key": f"/languages/{record['language']}"}],
+                }
+            )
+
+
+class Catalog:
+    """Fixture books served by the stand-in, with the lookups both APIs need."""
+
+    # Lookalikes ranked before the real book (study guides, summaries): a poor first hit
+    DISTRACTORS = ("Summary and Analysis of {}", "Study Guide for {}", "{} (Abridged Audio Edition)")
+
+    def __init__(self, records: List[dict], distractors: int = 0):
+        # Lookalikes returned first by text searches that match a book
+        self.distractors = distractors
+        self.by_isbn = {record["isbn"]: record for record in records}
+        self.by_title: Dict[str, List[dict]] = defaultdict(list)
+        for record in records:
+            self.by_title[_norm(record["title"])].append(record)
+
+    def search(self, title, author=None, publisher=None, year=None) -> List[dict]:
+        """
+        Exact (normalized) title, the other criteria as loose filters, like a strict API query.
+        Ranks `distractors` lookalikes first when a book matches.
+        """
+        matches = []
+        for record in self.by_title.get(_norm(title), []):
+            if author and not any(_norm(author) in _norm(a) for a in record["authors"]):
+                continue
+            if publisher and _norm(publisher) not in _norm(record["publisher"]):
+                continue
+            if year and not record["date"].startswith(year):
+                continue
+            matches.append(record)
+        if not matches:
+            return matches
+        book = matches[0]
+        lookalikes = [
+            {
+                **book,
+                "isbn": f"979{book['isbn'][3:-1]}{n}",
+                "title": self.DISTRACTORS[n % len(self.DISTRACTORS)].format(book["title"]),
+                "authors": ["Editorial Staff"],
+            }
+            for n in range(self.distractors)
+        ]
+        return lookalikes + matches
+
+    # --- Google Books ---
+
+    def google(self, params: dict) -> dict:
+        query = params.get("q", [""])[0].strip()
+        fields = {}
+        match = _YEAR.search(query)
+        year = None
+        if match and not query.startswith("isbn:"):
+            year, query = match.group(1), query[: match.start()]
+        parts = _FIELD.split(query)
+        # ['', 'intitle', 'Dune ', 'inauthor', 'Frank Herbert']
+        for name, value in zip(parts[1::2], parts[2::2]):
+            fields[name] = value.strip()
+
+        if "isbn" in fields:
+            record = self.by_isbn.get(fields["isbn"])
+            matches = [record] if record else []
+        else:
+            matches = self.search(fields.get("intitle", ""), fields.get("inauthor"), fields.get("inpublisher"), year)
+        if not matches:
+            return {"kind": "books#volumes", "totalItems": 0}
+        return {"kind": "books#volumes", "totalItems": len(matches), "items": [self._volume(r) for r in matches]}
+
+    def _volume(self, record: dict) -> dict:
+        return {
+            "id": f"standin-{record['isbn']}",
+            "volumeInfo": {
+                "title": record["title"],
+                "authors": record["authors"],
+                "publisher": record["publisher"],
+                "publishedDate": record["date"],
+                "language": record["language"],
+                "industryIdentifiers": [{"type": "ISBN_13", "identifier": record["isbn"]}],
+            },
+        }
+
+    # --- OpenLibrary ---
+
+    def openlibrary_books(self, params: dict) -> dict:
+        answer = {}
+        for bibkey in params.get("bibkeys", [""])[0].split(","):
+            record = self.by_isbn.get(bibkey.removeprefix("ISBN:"))
+            if record:
+                answer[bibkey] = {
+                    "title": record["title"],
+                    "authors": [{"name": a} for a in record["authors"]],
+                    "publishers": [{"name": record["publisher"]}],
+                    "publish_date": record["date"],
+                    "identifiers": {"isbn_13": [record["isbn"]]},
+                    "key": f"/books/OL{record['isbn'][-7:]}M",
+                }
+        return answer
+
+    def openlibrary_search(self, params: dict) -> dict:
+        def first(name):
+            return params.get(name, [None])[0]
+
+        matches = self.search(first("title") or "", first("author"), first("publisher"))
+        docs = [
+            {
+                "title": r["title"],
+                "author_name": r["authors"],
+                "publisher": [r["publisher"]],
+                "first_publish_year": int(r["date"][:4]),
+                "key": f"/works/OL{r['isbn'][-7:]}W",
+            }
+            for r in matches
+        ]
+        return {"numFound": len(docs), "docs": docs}
+
+
+class StandInServer:
+    """
+    Local lookalike of the Google Books and OpenLibrary APIs (threaded HTTP server), answering from
+    fixture records with scripted latency and faults. Point `config.GOOGLE_API_URL` at `google_url`
+    and `config.OPENLIBRARY_URL` at `openlibrary_url`.
+    """
+
+    def __init__(
+        self,
+        records: List[dict],
+        profiles: Optional[Dict[str, ApiProfile]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+        distractors: int = 0,
+    ):
+        self.catalog = Catalog(records, distractors)
+        self.profiles = {api: (profiles or {}).get(api) or ApiProfile() for api in APIS}
+        self.routes = {
+            GOOGLE_PATH: ("google", self.catalog.google),
+            "/api/books": ("openlibrary", self.catalog.openlibrary_books),
+            "/search.json": ("openlibrary", self.catalog.openlibrary_search),
+        }
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats: Dict[str, Counter] = {api: Counter() for api in APIS}
+        self._stats_lock = threading.Lock()
+        self.host = host
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_port}"
+
+    @property
+    def google_url(self) -> str:
+        return self.url + GOOGLE_PATH
+
+    @property
+    def openlibrary_url(self) -> str:
+        return self.url
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves in the calling thread, until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests received per API, by outcome ('200', '429', '503', 'timeout')."""
+        with self._stats_lock:
+            return {api: {"requests": sum(c.values()), **c} for api, c in self._stats.items()}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for counter in self._stats.values():
+                counter.clear()
+
+    def respond(self, path: str, params: dict) -> Tuple[int, Optional[dict], dict]:
+        """
+        Answers one request: (status, JSON body, headers). Sleeps for the scripted latency first.
+        A 'timeout' fault returns only after the profile's hang time (status 0: drop the connection).
+        """
+        if path not in self.routes:
+            return 404, {"error": "not found"}, {}
+        api, handler = self.routes[path]
+        profile = self.profiles[api]
+        with self._rng_lock:
+            delay = profile.latency.sample(self._rng)
+            fault = profile.fault(self._rng)
+        with self._stats_lock:
+            self._stats[api][fault or "200"] += 1
+
+        if fault == "timeout":
+            time.sleep(profile.hang)
+            return 0, None, {}
+        time.sleep(delay)
+        if fault:
+            headers = {"Retry-After": f"{profile.retry_after:g}"} if profile.retry_after is not None else {}
+            return int(fault), {"error": {"code": int(fault)}}, headers
+        return 200, handler(params), {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real APIs: the client's connection pool is exercised
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        standin: StandInServer = self.server.standin  # type: ignore[attr-defined]
+        url = urlparse(self.path)
+        if url.path == "/_stats":
+            status, body, headers = 200, standin.stats(), {}
+        else:
+            status, body, headers = standin.respond(url.path, parse_qs(url.query))
+        if not status:
+            self.close_connection = True
+            return
+
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (its timeout is shorter than our latency)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_profiles(
+    latencies: List[str],
+    rate_429: float = 0.0,
+    rate_503: float = 0.0,
+    timeout_rate: float = 0.0,
+    retry_after: Optional[float] = None,
+    hang: float = 60.0,
+    scenario: Optional[str] = None,
+) -> Dict[str, ApiProfile]:
+    """
+    Builds the per-API profiles from command line options: a scenario file (JSON, {api: profile}),
+    then `latencies` entries ('SPEC' for both APIs, 'API=SPEC' for one) and fault rates applied to both.
+    """
+    data: Dict[str, dict] = {api: {} for api in APIS}
+    if scenario:
+        with open(scenario, encoding="utf-8") as f:
+            for api, profile in json.load(f).items():
+                if api not in APIS:
+                    raise ValueError(f"Unknown API '{api}' in {scenario} (expected one of: {', '.join(APIS)})")
+                data[api].update(profile)
+
+    for entry in latencies:
+        api, _, spec = entry.rpartition("=")
+        if api and api not in APIS:
+            raise ValueError(f"Unknown API '{api}' (expected one of: {', '.join(APIS)})")
+        for target in [api] if api else APIS:
+            data[target]["latency"] = spec
+
+    for api in APIS:
+        for key, value in (("429", rate_429), ("503", rate_503), ("timeout", timeout_rate)):
+            if value:
+                data[api][key] = value
+        if retry_after is not None:
+            data[api]["retry_after"] = retry_after
+        data[api].setdefault("hang", hang)
+    return {api: ApiProfile.from_dict(profile) for api, profile in data.items()}
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Command line options shared by the stand-in server and the search benchmark."""
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="[API=]SPEC",
+        help="Latency distribution, e.g. lognormal:120:0.5 or google=uniform:50:150 (repeatable).",
+    )
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests rejected with 429.")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="Share of requests rejected with 503.")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests never answered.")
+    parser.add_argument("--retry-after", type=float, help="Retry-After header (seconds) of 429/503 answers.")
+    parser.add_argument("--scenario", help='JSON file of per-API profiles ({"google": {"latency": ...}}).')
+
+
+def profiles_from_args(args: argparse.Namespace, hang: float = 60.0) -> Dict[str, ApiProfile]:
+    return parse_profiles(
+        args.latency, args.rate_429, args.rate_503, args.timeout_rate, args.retry_after, hang, args.scenario
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local stand-ins of the Google Books and OpenLibrary APIs.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("-n", "--books", type=int, default=1000, help="Number of generated fixture books.")
+    parser.add_argument("--fixtures", help="JSON list of fixture books (isbn, title, authors, publisher, date).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the fixtures and faults.")
+    parser.add_argument(
+        "--distractors", type=int, default=0, help="Lookalikes ranked before the real book in text searches."
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        with open(args.fixtures, encoding="utf-8") as f:
+            records = json.load(f)
+    else:
+        records = fixture_records(args.books, args.seed)
+
+    server = StandInServer(records, profiles_from_args(args), args.host, args.port, args.seed, args.distractors)
+    print(f"Serving {len(records)} books on {server.url} (statistics: {server.url}/_stats)")
+    print(f"  GOOGLE_API_URL={server.google_url}")
+    print(f"  OPENLIBRARY_URL={server.openlibrary_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
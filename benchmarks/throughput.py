@@ -0,0 +1,254 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, cast
+
+import requests
+
+from benchmarks.run import environment, overrides
+from benchmarks.standin import StandInServer, add_profile_arguments, fixture_records, profiles_from_args
+from epub_pipeline import config
+
+# Share of the books per lookup profile, i.e. which step of the waterfall should find them
+MIX = {
+    "isbn": 0.4,  # ISBN known to the APIs
+    "unknown-isbn": 0.1,  # ISBN the APIs don't know: text search, full context
+    "text": 0.2,  # No ISBN, same publisher and year as the APIs
+    "other-publisher": 0.1,  # Matches once the publisher is dropped
+    "other-year": 0.1,  # Matches once the year is dropped
+    "unknown": 0.1,  # Not in any API: walks the whole waterfall
+}
+
+
+class CountingSession:
+    """Forwards requests to a shared session, counting them (one counter per searched book)."""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        return self.session.get(*args, **kwargs)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0.0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(len(ordered) * pct / 100) - 1))]
+
+
+def make_books(count: int, seed: int) -> tuple:
+    """
+    Local metadata of `count` books to search, and the fixture records served by the stand-in.
+    Every book gets a lookup profile from MIX; its local metadata is altered accordingly.
+    """
+    rng = random.Random(seed)
+    records = fixture_records(count, seed)
+    profiles = rng.choices(list(MIX), weights=list(MIX.values()), k=count)
+
+    books, served = [], []
+    for record, profile in zip(records, profiles):
+        meta = {
+            "title": record["title"],
+            "authors": list(record["authors"]),
+            "isbn": record["isbn"] if profile == "isbn" else None,
+            "publisher": record["publisher"],
+            "date": record["date"],
+            "language": record["language"],
+        }
+        if profile == "unknown-isbn":
+            meta["isbn"] = "9780000000002"
+        elif profile == "other-publisher":
+            meta["publisher"] = "Some Small Press"
+        elif profile == "other-year":
+            meta["date"] = str(int(record["date"][:4]) + 7)
+        if profile != "unknown":
+            served.append(record)
+        books.append((profile, meta))
+    return books, served
+
+
+def search_all(books: list, concurrency: int) -> tuple:
+    """Searches every book with `find_book` (`concurrency` at a time). Returns (per-book samples, wall time)."""
+    from epub_pipeline.search.book_finder import find_book, get_providers
+    from epub_pipeline.utils.http import get_session
+
+    shared = get_session()
+
+    def search(book):
+        profile, meta = book
+        session = CountingSession(shared)
+        providers = get_providers(session=cast(requests.Session, session))
+        start = time.perf_counter()
+        data, score, strategy = find_book(meta, providers)
+        seconds = time.perf_counter() - start
+        return {"profile": profile, "strategy": strategy, "seconds": seconds, "calls": session.calls}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(search, books))
+    return samples, time.perf_counter() - start
+
+
+def _summary(samples: List[dict]) -> dict:
+    latencies = [s["seconds"] * 1000 for s in samples]
+    return {
+        "books": len(samples),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "calls_per_book": round(sum(s["calls"] for s in samples) / len(samples), 2) if samples else 0.0,
+    }
+
+
+def report(samples: List[dict], wall: float) -> dict:
+    """Throughput, latency percentiles and API calls per book, overall and per waterfall strategy."""
+    by_strategy: Dict[str, List[dict]] = defaultdict(list)
+    for sample in samples:
+        by_strategy[sample["strategy"]].append(sample)
+    return {
+        "books_per_sec": round(len(samples) / wall, 2) if wall else None,
+        "wall_s": round(wall, 3),
+        "overall": _summary(samples),
+        "strategies": {name: _summary(group) for name, group in sorted(by_strategy.items())},
+    }
+
+
+def run(
+    books: int,
+    concurrency: int,
+    seed: int,
+    profiles: dict,
+    request_timeout: float,
+    throttle=False,
+    distractors=0,
+    copies=1,
+) -> dict:
+    """
+    Starts a stand-in server, points the providers at it and searches a generated set of books.
+    With `copies`, every book is searched that many times in a row (copies searched concurrently).
+    """
+    from epub_pipeline.search.racing import COALESCER
+
+    book_list, served = make_books(books, seed)
+    book_list = [book for book in book_list for _ in range(copies)]
+    with contextlib.ExitStack() as stack:
+        data_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="epub-bench-"))
+        server = stack.enter_context(StandInServer(served, profiles, seed=seed, distractors=distractors))
+        settings = {
+            "GOOGLE_API_URL": server.google_url,
+            "OPENLIBRARY_URL": server.openlibrary_url,
+            "CACHE_MODE": "off",
+            "REQUEST_TIMEOUT": request_timeout,
+            "RATE_LIMIT_PATH": os.path.join(data_dir, "rate_limits.sqlite"),
+        }
+        if not throttle:
+            settings.update(GOOGLE_RATE_LIMIT=0.0, OPENLIBRARY_RATE_LIMIT=0.0)
+        stack.enter_context(overrides(**settings))
+
+        before = COALESCER.stats()["coalesced"]
+        samples, wall = search_all(book_list, concurrency)
+        results = report(samples, wall)
+        results["coalesced"] = COALESCER.stats()["coalesced"] - before
+        results["server"] = server.stats()
+
+    return {
+        **environment(),
+        "params": {
+            "books": books,
+            "concurrency": concurrency,
+            "seed": seed,
+            "request_timeout": request_timeout,
+            "throttle": throttle,
+            "hedge": config.HEDGE_REQUESTS,
+            "speculative": config.SPECULATIVE_SEARCH,
+            "coalesce": config.COALESCE_REQUESTS,
+            "candidates": config.SEARCH_CANDIDATES,
+            "distractors": distractors,
+            "copies": copies,
+            "profiles": {api: profile.to_dict() for api, profile in profiles.items()},
+        },
+        "results": results,
+    }
+
+
+def print_report(results: dict):
+    overall = results["overall"]
+    print(f"{results['books_per_sec']} books/sec ({overall['books']} books in {results['wall_s']}s)")
+    print(f"\n{'strategy':<40} {'books':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/book':>11}")
+    for name, row in [*results["strategies"].items(), ("(all)", overall)]:
+        print(
+            f"{name:<40} {row['books']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+            f"{row['calls_per_book']:>11.2f}"
+        )
+    print(f"\nRequests coalesced: {results['coalesced']}")
+    print("Server:", ", ".join(f"{api} {stats}" for api, stats in results["server"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure find_book throughput against local API stand-ins.")
+    parser.add_argument("-n", "--books", type=int, default=200, help="Number of books searched.")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Books searched at once.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the books and faults.")
+    parser.add_argument(
+        "--request-timeout", type=float, default=2.0, help="Client timeout (seconds), for injected timeouts."
+    )
+    parser.add_argument("--throttle", action="store_true", help="Keep the configured client rate limits.")
+    parser.add_argument("--no-hedge", action="store_true", help="Disable hedged requests.")
+    parser.add_argument("--no-coalesce", action="store_true", help="Disable request coalescing.")
+    parser.add_argument("--speculative", action="store_true", help="Speculative text relaxation waterfall.")
+    parser.add_argument("--candidates", type=int, help="Results scored per text query (default: SEARCH_CANDIDATES).")
+    parser.add_argument(
+        "--distractors", type=int, default=0, help="Lookalikes the stand-ins rank before the real book."
+    )
+    parser.add_argument("--copies", type=int, default=1, help="Times each book is searched (duplicate copies).")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    # Unanswered requests hang a bit longer than the client waits
+    profiles = profiles_from_args(args, hang=args.request_timeout + 1)
+    settings: Dict[str, object] = {}
+    if args.no_hedge:
+        settings["HEDGE_REQUESTS"] = False
+    if args.no_coalesce:
+        settings["COALESCE_REQUESTS"] = False
+    if args.speculative:
+        settings["SPECULATIVE_SEARCH"] = True
+    if args.candidates is not None:
+        settings["SEARCH_CANDIDATES"] = args.candidates
+    with overrides(**settings):
+        result = run(
+            args.books,
+            args.concurrency,
+            args.seed,
+            profiles,
+            args.request_timeout,
+            args.throttle,
+            args.distractors,
+            args.copies,
+        )
+
+    print_report(result["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,25 @@
-# Utils
-from .pipeline.cover_manager import CoverManager
-from .pipeline.drive_uploader import DriveUploader
+import importlib
+from typing import TYPE_CHECKING
 
-# Pipeline
-from .pipeline.epub_manager import EpubManager
-from .pipeline.kepub_handler import KepubHandler
-
-# Search
-from .search.book_finder import find_book
-from .search.confidence import ConfidenceScorer
-from .search.provider import MetadataProvider
-from .utils.formatter import Formatter
-from .utils.isbn_utils import (
-    clean_isbn_string,
-    convert_isbn10_to_13,
-    extract_isbn_from_filename,
-    is_valid_isbn,
-)
-from .utils.logger import Logger
-from .utils.text_utils import get_similarity, sanitize_filename
+# Public API, imported on first access (PEP 562): `import epub_pipeline` (and the CLI)
+# stay fast, the heavy dependencies only load with the component that needs them.
+_EXPORTS = {
+    "Logger": ".utils.logger",
+    "Formatter": ".utils.formatter",
+    "sanitize_filename": ".utils.text_utils",
+    "get_similarity": ".utils.text_utils",
+    "clean_isbn_string": ".utils.isbn_utils",
+    "extract_isbn_from_filename": ".utils.isbn_utils",
+    "is_valid_isbn": ".utils.isbn_utils",
+    "convert_isbn10_to_13": ".utils.isbn_utils",
+    "EpubManager": ".pipeline.epub_manager",
+    "CoverManager": ".pipeline.cover_manager",
+    "KepubHandler": ".pipeline.kepub_handler",
+    "DriveUploader": ".pipeline.drive_uploader",
+    "find_book": ".search.book_finder",
+    "ConfidenceScorer": ".search.confidence",
+    "MetadataProvider": ".search.provider",
+}
 
 __all__ = [
     # Utils
@@ -40,3 +41,34 @@ __all__ = [
     "ConfidenceScorer",
     "MetadataProvider",
 ]
+
+if TYPE_CHECKING:
+    from .pipeline.cover_manager import CoverManager
+    from .pipeline.drive_uploader import DriveUploader
+    from .pipeline.epub_manager import EpubManager
+    from .pipeline.kepub_handler import KepubHandler
+    from .search.book_finder import find_book
+    from .search.confidence import ConfidenceScorer
+    from .search.provider import MetadataProvider
+    from .utils.formatter import Formatter
+    from .utils.isbn_utils import (
+        clean_isbn_string,
+        convert_isbn10_to_13,
+        extract_isbn_from_filename,
+        is_valid_isbn,
+    )
+    from .utils.logger import Logger
+    from .utils.text_utils import get_similarity, sanitize_filename
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    # Cached: later accesses are plain module attribute lookups
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,12 +2,33 @@ import argparse
 import os
 import sys
 import traceback
+from datetime import datetime
 
 from epub_pipeline import config
-from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+from epub_pipeline.search.response_cache import CACHE_MODES
+from epub_pipeline.utils.library_scanner import LibraryScanner
 from epub_pipeline.utils.logger import Logger
 
 
+def date_to_timestamp(value):
+    """argparse type: converts a YYYY-MM-DD date to a POSIX timestamp."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}' (expected YYYY-MM-DD).")
+
+
+def positive_int(value):
+    """argparse type: an integer >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid number '{value}'.")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Expected a positive number, got {number}.")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(description="Full Ebook Pipeline.")
     parser.add_argument("path", help="Directory or file to process.")
@@ -16,11 +37,23 @@ def main():
     parser.add_argument(
         "-s",
         "--source",
-        choices=["all", "google", "openlibrary"],
+        choices=["all", "google", "openlibrary", "local"],
         default="all",
         help="Metadata Source.",
     )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default=config.CACHE_MODE,
+        help="HTTP response cache behavior (default: %(default)s).",
+    )
     parser.add_argument("--no-kepub", action="store_true", help="Disable KEPUB conversion.")
+    parser.add_argument(
+        "--kepub-converter",
+        choices=["kepubify", "native"],
+        default=config.KEPUB_CONVERTER,
+        help="KEPUB engine: the kepubify binary, or the built-in converter (default: %(default)s).",
+    )
     parser.add_argument("--no-rename", action="store_true", help="Disable renaming.")
     parser.add_argument("--no-upload", action="store_true", help="Disable uploading.")
     parser.add_argument(
@@ -34,6 +67,73 @@ def main():
         action="store_true",
         help="Interactive mode: confirm each metadata field change manually.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Number of files processed concurrently (directory mode).",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Extract and search the next N files in the background while prompts are shown.",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=config.MEMORY_BUDGET_MB,
+        metavar="MB",
+        help="Memory ceiling: books are edited as streamed zip members and --jobs is lowered to fit (0 = off).",
+    )
+    parser.add_argument(
+        "--isbn-batch",
+        action="store_true",
+        help="Resolve ISBNs in batched requests, one chunk of files ahead of the lookups.",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Send all the text search relaxation queries at once instead of one after another.",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Process a single copy of identical books and link the other copies to its result.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Remember processed files and skip them when unchanged on later runs.",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Read the library's metadata once, in parallel, into a catalog reused by later runs and tools.",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="Only process files matching this pattern (repeatable, default: *.epub).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip files and folders matching this pattern (repeatable).",
+    )
+    parser.add_argument("--min-size", type=int, metavar="BYTES", help="Skip files smaller than this size.")
+    parser.add_argument("--max-size", type=int, metavar="BYTES", help="Skip files larger than this size.")
+    parser.add_argument(
+        "--newer-than",
+        type=date_to_timestamp,
+        metavar="YYYY-MM-DD",
+        help="Skip files last modified before this date.",
+    )
     parser.add_argument(
         "--isbn",
         help="Force a specific ISBN for the search (single file only).",
@@ -44,6 +144,20 @@ def main():
     config.VERBOSE = args.verbose
     if args.source != "all":
         config.API_SOURCE = args.source
+    config.CACHE_MODE = args.cache_mode
+    config.KEPUB_CONVERTER = args.kepub_converter
+    config.MEMORY_BUDGET_MB = args.memory_budget
+    if args.isbn_batch:
+        config.BATCH_ISBN_LOOKUP = True
+    if args.dedupe:
+        config.DEDUPLICATE = True
+    if args.speculative:
+        config.SPECULATIVE_SEARCH = True
+    # Lookups run up to 2 x jobs at once, each querying both ISBN variants in parallel
+    config.HTTP_POOL_SIZE = max(config.HTTP_POOL_SIZE, args.jobs * 4)
+
+    # Imported once the arguments are parsed: `--help` and invalid options return right away
+    from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
 
     orchestrator = PipelineOrchestrator(
         auto_save=args.auto,
@@ -51,6 +165,17 @@ def main():
         enable_rename=not args.no_rename,
         interactive_fields=args.interactive,
         enable_upload=not args.no_upload,
+        jobs=args.jobs,
+        prefetch=args.prefetch,
+        incremental=args.incremental,
+        catalog=args.catalog,
+        scanner=LibraryScanner(
+            include=args.include or ("*.epub",),
+            exclude=args.exclude,
+            min_size=args.min_size,
+            max_size=args.max_size,
+            newer_than=args.newer_than,
+        ),
     )
 
     target_path = args.path
@@ -35,15 +35,30 @@ DRIVE_FOLDER_ID = os.getenv("DRIVE_FOLDER_ID")
 
 # --- Metadata Sources ---
 # Controls which APIs are queried.
-# Options: 'google', 'openlibrary', 'all'
+# Options: 'google', 'openlibrary', 'local' (offline index of OpenLibrary dumps), 'all'
+# ('all' queries the local index first when one was imported)
 API_SOURCE = os.getenv("API_SOURCE", "all")
 
 # --- Pipeline Features ---
 ENABLE_KEPUBIFY = get_bool_env("ENABLE_KEPUBIFY", True)
+# KEPUB conversion engine. Options: 'kepubify' (external binary), 'native' (built-in, written in the
+# same pass as the metadata update)
+KEPUB_CONVERTER = os.getenv("KEPUB_CONVERTER", "kepubify")
 ENABLE_RENAME = get_bool_env("ENABLE_RENAME", True)
 UPDATE_COVER = get_bool_env("UPDATE_COVER", True)
 # If True, applies changes automatically without asking, even for low confidence.
 AUTO_SAVE = get_bool_env("AUTO_SAVE", False)
+# If True, saving only replaces the OPF (and cover) inside the original archive:
+# other files are copied as-is instead of being re-compressed by EbookLib
+SURGICAL_SAVE = get_bool_env("SURGICAL_SAVE", True)
+
+# Memory ceiling for directory runs, in MB (0 = unlimited). When set, books are edited and saved
+# as streamed zip members (never fully loaded), and --jobs is lowered to stay under the ceiling.
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+# Upload chunk size for Drive resumable uploads (multiple of 256 KB)
+UPLOAD_CHUNK_MB = int(os.getenv("UPLOAD_CHUNK_MB", "8"))
+# Covers larger than this are not downloaded
+MAX_COVER_MB = int(os.getenv("MAX_COVER_MB", "20"))
 
 # --- Display / Logging ---
 VERBOSE = get_bool_env("VERBOSE", False)
@@ -63,11 +78,69 @@ USE_PUBLISHER_IN_SEARCH = get_bool_env("USE_PUBLISHER_IN_SEARCH", True)
 USE_YEAR_IN_SEARCH = get_bool_env("USE_YEAR_IN_SEARCH", True)
 # If True, filters API results to match the EPUB's language (reduces noise)
 FILTER_BY_LANGUAGE = get_bool_env("FILTER_BY_LANGUAGE", True)
+# Results of each text query scored by the confidence scorer (the best one is kept):
+# a poor first hit no longer forces a looser (extra) query
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "5"))
+# String similarity used by confidence scoring. Options: 'difflib' (difflib.SequenceMatcher),
+# 'indel' (bit-parallel Indel ratio: much faster, but scores differ slightly, so confidence may shift)
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "difflib")
+
+# --- Local State ---
+# Directory holding the pipeline's local databases.
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.expanduser("~"), ".cache", "epub-pipeline"))
+# Per-file stage results used by incremental runs (--incremental)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(DATA_DIR, "state.sqlite"))
+# Library catalog (--catalog): metadata of every file, read by one parallel pre-pass
+CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", os.path.join(DATA_DIR, "catalog.sqlite"))
+# If True, directory runs process one copy of each group of identical books (same spine content)
+DEDUPLICATE = get_bool_env("DEDUPLICATE", False)
+FINGERPRINT_DB_PATH = os.getenv("FINGERPRINT_DB_PATH", os.path.join(DATA_DIR, "fingerprints.sqlite"))
+# Offline metadata index built from OpenLibrary data dumps (python -m tools.import_openlibrary)
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", os.path.join(DATA_DIR, "openlibrary_index.sqlite"))
+
+# --- HTTP Response Cache ---
+# Provider responses are cached on disk to avoid repeating identical API calls.
+# Options: 'read-write', 'read-only', 'refresh' (ignore cached entries), 'offline' (never hit the network), 'off'
+CACHE_MODE = os.getenv("CACHE_MODE", "read-write")
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(DATA_DIR, "http_cache.sqlite"))
+CACHE_TTL_DAYS = float(os.getenv("CACHE_TTL_DAYS", "30"))
+# Empty answers ("not found") are kept for a shorter time
+CACHE_NEGATIVE_TTL_DAYS = float(os.getenv("CACHE_NEGATIVE_TTL_DAYS", "1"))
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "200"))
 
 # --- Network Constants ---
-GOOGLE_API_URL = "https://www.googleapis.com/books/v1/volumes"
+# API endpoints (overridable to use a mirror, or the local stand-in of benchmarks.standin)
+GOOGLE_API_URL = os.getenv("GOOGLE_API_URL", "https://www.googleapis.com/books/v1/volumes")
+OPENLIBRARY_URL = os.getenv("OPENLIBRARY_URL", "https://openlibrary.org").rstrip("/")
 REQUEST_TIMEOUT = 10  # Seconds
-MAX_RETRIES = 3  # Exponential backoff attempts
+# Warm keep-alive connections kept per host (raised automatically to match --jobs)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = 3  # Attempts on rate limiting / server errors (with backoff)
+
+# If True, a request slower than the provider's usual p95 latency is duplicated
+# and the first answer wins (cuts tail latency at the cost of a few extra calls).
+HEDGE_REQUESTS = get_bool_env("HEDGE_REQUESTS", True)
+# If True, concurrent identical provider requests (same ISBN or text query) share one network call
+COALESCE_REQUESTS = get_bool_env("COALESCE_REQUESTS", True)
+
+# If True, the text relaxation waterfall sends all its distinct queries at once (same result as
+# the sequential waterfall, fewer round-trips in a row, more requests per book)
+SPECULATIVE_SEARCH = get_bool_env("SPECULATIVE_SEARCH", False)
+
+# If True, directory runs resolve ISBNs in batched requests, ISBN_BATCH_SIZE files ahead of the lookups
+BATCH_ISBN_LOOKUP = get_bool_env("BATCH_ISBN_LOOKUP", False)
+ISBN_BATCH_SIZE = int(os.getenv("ISBN_BATCH_SIZE", "50"))  # Files per chunk, ISBNs per OpenLibrary request
+
+# --- Rate Limiting ---
+# Requests per second and burst size per API, shared by all threads and worker processes.
+# 0 = no static limit: the adaptive concurrency and Retry-After pauses throttle us when the API pushes back
+GOOGLE_RATE_LIMIT = float(os.getenv("GOOGLE_RATE_LIMIT", "0"))
+GOOGLE_RATE_BURST = int(os.getenv("GOOGLE_RATE_BURST", "10"))
+OPENLIBRARY_RATE_LIMIT = float(os.getenv("OPENLIBRARY_RATE_LIMIT", "0"))
+OPENLIBRARY_RATE_BURST = int(os.getenv("OPENLIBRARY_RATE_BURST", "6"))
+# Upper bound of in-flight requests per API (lowered automatically when the API starts rejecting us)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(DATA_DIR, "rate_limits.sqlite"))
 
 # --- Confidence Thresholds ---
 CONFIDENCE_THRESHOLD_HIGH = 80
@@ -0,0 +1,203 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from epub_pipeline import config
+from epub_pipeline.models import BookMetadata
+from epub_pipeline.pipeline.metadata_reader import OpfReader
+from epub_pipeline.utils.logger import Logger
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    isbn TEXT,
+    title TEXT,
+    authors TEXT,
+    language TEXT,
+    publisher TEXT,
+    date TEXT,
+    tags TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn);
+"""
+
+# Below this many files per worker, spawning processes costs more than parsing the OPFs inline
+MIN_FILES_PER_WORKER = 16
+
+# Parse error of a readable book without any metadata
+NO_METADATA = "No metadata"
+
+CatalogEntry = Tuple[Optional[BookMetadata], Optional[str]]
+
+
+def catalog_worker(file_path: str) -> CatalogEntry:
+    """Parses one book's OPF (runs in a worker process). Returns (metadata | None, parse error | None)."""
+    try:
+        meta = OpfReader(file_path).get_curated_metadata()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    if not meta:
+        return None, NO_METADATA
+    return meta, None
+
+
+class LibraryCatalog:
+    """
+    Local catalog of the library's metadata (path, size, mtime, ISBN, title, authors...),
+    filled by one parallel sweep over the OPFs.
+
+    Builds are incremental: a file is only parsed again when its size or mtime changed.
+    The pipeline and the tools then read the metadata from here instead of re-opening every EPUB.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def update(self, paths: Sequence[str], jobs: int = 1, root: Optional[str] = None) -> Dict[str, int]:
+        """
+        Parses the new and changed files among `paths` (in a process pool when there are enough of them).
+        With `root`, catalog entries under it whose file no longer exists are removed (files that are
+        only missing from `paths`, e.g. filtered out of this run, are kept).
+        Returns counts: {"parsed", "unchanged", "removed", "errors"}.
+        """
+        keys = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            keys[os.path.abspath(path)] = (st.st_size, st.st_mtime)
+
+        with self._lock:
+            if root:
+                prefix = os.path.join(os.path.abspath(root), "")
+                known = {
+                    row[0]: (row[1], row[2])
+                    for row in self._conn.execute(
+                        "SELECT path, size, mtime FROM books WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+                    )
+                }
+            else:
+                known = {}
+                for path in keys:
+                    row = self._conn.execute("SELECT size, mtime FROM books WHERE path = ?", (path,)).fetchone()
+                    if row:
+                        known[path] = row
+
+        changed = [path for path, key in keys.items() if known.get(path) != key]
+        removed = [path for path in known if path not in keys and not os.path.exists(path)]
+        entries = self._parse(changed, jobs)
+
+        now = time.time()
+        with self._lock, self._conn:
+            for path, (entry, error) in zip(changed, entries):
+                meta = entry or BookMetadata()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO books (path, size, mtime, isbn, title, authors, language, publisher, "
+                    "date, tags, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        path,
+                        *keys[path],
+                        meta.get("isbn"),
+                        meta.get("title"),
+                        json.dumps(meta.get("authors", []), ensure_ascii=False),
+                        meta.get("language"),
+                        meta.get("publisher"),
+                        meta.get("date"),
+                        json.dumps(meta.get("tags", []), ensure_ascii=False),
+                        error,
+                        now,
+                    ),
+                )
+            self._conn.executemany("DELETE FROM books WHERE path = ?", [(path,) for path in removed])
+
+        return {
+            "parsed": len(changed),
+            "unchanged": len(keys) - len(changed),
+            "removed": len(removed),
+            "errors": sum(1 for _, error in entries if error),
+        }
+
+    @staticmethod
+    def _parse(paths: List[str], jobs: int) -> List[CatalogEntry]:
+        workers = min(jobs, len(paths) // MIN_FILES_PER_WORKER)
+        if workers <= 1:
+            return [catalog_worker(path) for path in paths]
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(catalog_worker, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+    def lookup(self, file_path: str) -> Optional[CatalogEntry]:
+        """
+        (metadata | None, parse error | None) of a file, as cataloged.
+        None if the file is not in the catalog or changed since it was parsed.
+        """
+        path = os.path.abspath(file_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM books WHERE path = ? AND size = ? AND mtime = ?", (path, st.st_size, st.st_mtime)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            columns = [d[0] for d in cursor.description]
+        return self._entry(dict(zip(columns, row)))
+
+    def entries(self, root: Optional[str] = None) -> Iterator[Tuple[str, Optional[BookMetadata], Optional[str]]]:
+        """Yields (path, metadata | None, parse error | None) of every cataloged file (under `root`), by path."""
+        query, params = "SELECT * FROM books", []
+        if root:
+            prefix = os.path.join(os.path.abspath(root), "")
+            query += " WHERE substr(path, 1, ?) = ?"
+            params = [len(prefix), prefix]
+
+        with self._lock:
+            cursor = self._conn.execute(query + " ORDER BY path", params)
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            yield (row["path"], *self._entry(row))
+
+    @staticmethod
+    def _entry(row: dict) -> CatalogEntry:
+        if row["error"]:
+            return None, row["error"]
+        meta = BookMetadata(
+            filename=os.path.basename(row["path"]),
+            title=row["title"],
+            authors=json.loads(row["authors"]),
+            isbn=row["isbn"],
+            publisher=row["publisher"],
+            language=row["language"],
+            date=row["date"],
+            tags=json.loads(row["tags"]),
+        )
+        return meta, None
+
+    def close(self):
+        self._conn.close()
+
+
+def open_catalog(paths: Sequence[str], root: Optional[str] = None) -> LibraryCatalog:
+    """Opens the library catalog and brings it up to date for these files (used by the tools)."""
+    catalog = LibraryCatalog(config.CATALOG_DB_PATH)
+    counts = catalog.update(paths, jobs=os.cpu_count() or 1, root=root)
+    Logger.info(f"Catalog: {counts['parsed']} parsed, {counts['unchanged']} unchanged, {counts['errors']} error(s)")
+    return catalog
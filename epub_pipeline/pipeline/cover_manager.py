@@ -1,8 +1,7 @@
 import io
 
-import requests
-from PIL import Image
-
+from epub_pipeline import config
+from epub_pipeline.utils.http import get_session
 from epub_pipeline.utils.logger import Logger
 
 
@@ -16,18 +15,29 @@ class CoverManager:
     MAX_SIZE = (1600, 2400)
 
     @staticmethod
-    def download_cover(url):
-        """Downloads image data from a URL with basic error handling."""
+    def download_cover(url, session=None):
+        """
+        Downloads image data from a URL with basic error handling.
+        Args:
+            session: requests Session to reuse (default: the process-wide pooled session).
+        """
         if not url:
             return None
 
         try:
             Logger.verbose(f"Downloading cover from {url}...")
-            # User-Agent is important to avoid 403 Forbidden from some CDNs
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.content
+            # The pooled session sends a browser-like User-Agent (avoids 403 Forbidden from some CDNs)
+            # Streamed, so that an oversized image is dropped before being fully buffered
+            max_bytes = config.MAX_COVER_MB * 1024 * 1024
+            with (session or get_session()).get(url, timeout=config.REQUEST_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                data = bytearray()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    data += chunk
+                    if len(data) > max_bytes:
+                        Logger.warning(f"Cover larger than {config.MAX_COVER_MB} MB, ignored.")
+                        return None
+            return bytes(data)
         except Exception as e:
             Logger.warning(f"Failed to download cover: {e}")
             return None
@@ -43,8 +53,13 @@ class CoverManager:
         if not image_bytes:
             return None
 
+        # Pillow is only imported when a cover is actually processed
+        from PIL import Image
+
         try:
             img = Image.open(io.BytesIO(image_bytes))
+            # JPEG: decode directly at a reduced scale (a huge scan is never fully decoded in memory)
+            img.draft("RGB", CoverManager.MAX_SIZE)
 
             # Convert CMYK or RGBA to RGB for JPEG compatibility
             if img.mode != "RGB":
@@ -1,13 +1,9 @@
 import os.path
 import pickle
 import shutil
+import threading
 from typing import Any, Dict
 
-from google.auth.transport.requests import Request  # type: ignore
-from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
-from googleapiclient.discovery import build  # type: ignore
-from googleapiclient.http import MediaFileUpload  # type: ignore
-
 from epub_pipeline import config
 from epub_pipeline.utils.logger import Logger
 
@@ -19,15 +15,61 @@ class DriveUploader:
     """
     Manages authentication and file uploads to Google Drive using the official API.
     Also provides a fallback mechanism to copy files locally if the API is disabled.
+
+    Nothing happens at construction: the token is loaded and the Drive client built on the
+    first upload (a run where every file is skipped never authenticates). The client uses the
+    discovery document bundled with googleapiclient (no network call to build it), and is
+    shared by all upload threads: each request gets its own HTTP connection.
     """
 
     def __init__(self, enable_upload=True):
-        self.service = None
+        self._service = None
         self.creds = None
         self.enable_upload = enable_upload and config.DRIVE_FOLDER_ID is not None
+        self._lock = threading.Lock()
+        # Set once authentication failed: it is not attempted again for every file
+        self._failed = False
+
+    @property
+    def service(self):
+        """The Drive client, authenticated and built on first use (None if uploads are disabled or auth failed)."""
+        if self._service is None and self.enable_upload and not self._failed:
+            with self._lock:
+                if self._service is None and not self._failed:
+                    self._service = self._build_service()
+                    self._failed = self._service is None
+        return self._service
+
+    def _build_service(self):
+        from googleapiclient.discovery import build  # type: ignore
+
+        creds = self._authenticate()
+        if not creds:
+            return None
+        self.creds = creds
 
-        if self.enable_upload:
-            self._authenticate()
+        try:
+            return build(
+                "drive",
+                "v3",
+                credentials=creds,
+                static_discovery=True,
+                requestBuilder=self._build_request,
+            )
+        except Exception as e:
+            Logger.error(f"Failed to build Drive service: {e}")
+            return None
+
+    def _build_request(self, http, *args, **kwargs):
+        """
+        googleapiclient request factory: httplib2 connections are not thread-safe,
+        so every request gets a fresh authorized connection.
+        """
+        import google_auth_httplib2  # type: ignore
+        import httplib2  # type: ignore
+        from googleapiclient.http import HttpRequest  # type: ignore
+
+        return HttpRequest(google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http()), *args, **kwargs)
 
     def _authenticate(self):
         """
@@ -37,7 +79,12 @@ class DriveUploader:
         3. Starts new auth flow if no valid token exists:
            - Tries local browser (Desktop).
            - Falls back to Console copy-paste (Headless/Docker).
+        Returns the credentials, or None.
         """
+        # The Google client libraries are slow to import: only loaded when uploads are enabled
+        from google.auth.transport.requests import Request  # type: ignore
+        from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
+
         creds = None
         if os.path.exists(config.GOOGLE_TOKEN_PATH):
             try:
@@ -57,7 +104,7 @@ class DriveUploader:
                 if not os.path.exists(config.GOOGLE_CREDENTIALS_PATH):
                     Logger.error(f"Missing '{config.GOOGLE_CREDENTIALS_PATH}'. cannot authenticate with Google Drive.")
                     Logger.info("Please download OAuth 2.0 Client IDs from Google Cloud Console.")
-                    return
+                    return None
 
                 try:
                     flow = InstalledAppFlow.from_client_secrets_file(config.GOOGLE_CREDENTIALS_PATH, SCOPES)
@@ -73,17 +120,13 @@ class DriveUploader:
 
                 except Exception as e:
                     Logger.error(f"Authentication failed: {e}")
-                    return
+                    return None
 
             # Save the credentials for the next run
             with open(config.GOOGLE_TOKEN_PATH, "wb") as token:
                 pickle.dump(creds, token)
 
-        self.creds = creds
-        try:
-            self.service = build("drive", "v3", credentials=creds)
-        except Exception as e:
-            Logger.error(f"Failed to build Drive service: {e}")
+        return creds
 
     def process_file(self, file_path: str):
         """
@@ -100,15 +143,21 @@ class DriveUploader:
         return self.copy_to_local_output(file_path)
 
     def upload_to_drive(self, file_path: str):
-        """Uploads a file to Google Drive using a resumable upload session."""
-        if not self.service:
-            Logger.error("Drive service not initialized. Skipping upload.")
-            return False
-
+        """
+        Uploads a file to Google Drive using a resumable upload session.
+        Returns the Drive file ID on success, False otherwise.
+        """
         if not os.path.exists(file_path):
             Logger.error(f"File not found: {file_path}")
             return False
 
+        service = self.service
+        if not service:
+            Logger.error("Drive service not initialized. Skipping upload.")
+            return False
+
+        from googleapiclient.http import MediaFileUpload  # type: ignore
+
         file_name = os.path.basename(file_path)
 
         # Explicit typing to appease mypy regarding list assignment
@@ -119,9 +168,15 @@ class DriveUploader:
         try:
             Logger.info(f"Uploading to Drive: {file_name}...")
 
-            media = MediaFileUpload(file_path, mimetype="application/epub+zip", resumable=True)
+            # Streamed from disk, one chunk at a time
+            media = MediaFileUpload(
+                file_path,
+                mimetype="application/epub+zip",
+                chunksize=config.UPLOAD_CHUNK_MB * 1024 * 1024,
+                resumable=True,
+            )
 
-            request = self.service.files().create(body=file_metadata, media_body=media, fields="id")
+            request = service.files().create(body=file_metadata, media_body=media, fields="id")
 
             # Execute upload in chunks and show progress
             response = None
@@ -131,16 +186,21 @@ class DriveUploader:
                     Logger.verbose(f"Uploaded {int(status.progress() * 100)}%")
 
             Logger.success(f"Upload complete. File ID: {response.get('id')}")
-            return True
+            return response.get("id") or True
 
         except Exception as e:
             Logger.error(f"Drive upload failed: {e}")
             return False
 
+    @staticmethod
+    def local_output_dir() -> str:
+        """Folder of the local copies (upload disabled or failed)."""
+        return os.path.join(os.getcwd(), "output")
+
     def copy_to_local_output(self, file_path: str):
         """Copies the file to a local 'output' directory."""
         try:
-            output_dir = os.path.join(os.getcwd(), "output")
+            output_dir = self.local_output_dir()
             os.makedirs(output_dir, exist_ok=True)
 
             file_name = os.path.basename(file_path)
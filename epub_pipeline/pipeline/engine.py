@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.catalog import NO_METADATA
+from epub_pipeline.pipeline.metadata_reader import OpfReader
+from epub_pipeline.utils.logger import Logger
+from epub_pipeline.utils.memory import MB, MemoryBudget, PeakMemory
+from epub_pipeline.utils.text_utils import truncate
+
+
+def _config_snapshot():
+    """Collects the runtime settings (CLI overrides included) to replay in worker processes."""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def _init_worker(settings):
+    """Process pool initializer: workers are spawned, so CLI overrides must be re-applied."""
+    for name, value in settings.items():
+        setattr(config, name, value)
+
+
+def read_metadata(file_path, catalog=None, read_path=None):
+    """
+    Extraction stage: the book's curated metadata, or None (with a warning) if it cannot be read.
+    Served by the library catalog when the file is cataloged and unchanged, else read from the OPF
+    (of `read_path`, e.g. a workspace copy, when given).
+    """
+    filename = os.path.basename(file_path)
+    entry = catalog.lookup(file_path) if catalog else None
+    if entry:
+        meta, error = entry
+        if error == NO_METADATA:
+            Logger.warning(f"Skipping (No Meta): {filename}")
+        elif error:
+            Logger.warning(f"Skipping (No Book): {filename}")
+            Logger.verbose(f"Catalog: {error}")
+        return meta
+
+    try:
+        reader = OpfReader(read_path or file_path)
+    except Exception:
+        Logger.warning(f"Skipping (No Book): {filename}")
+        return None
+
+    meta = reader.get_curated_metadata()
+    if not meta:
+        Logger.warning(f"Skipping (No Meta): {filename}")
+        return None
+    return meta
+
+
+def extract_worker(file_path, catalog=None):
+    """
+    Extraction stage (reads the OPF only: cheap enough to run in the search threads).
+    Returns: (BookMetadata | None, captured log lines)
+    """
+    with Logger.capture() as logs:
+        meta = read_metadata(file_path, catalog)
+    return meta, logs
+
+
+def isbn_worker(file_path):
+    """ISBN pre-pass. Returns the book's ISBN, or None."""
+    try:
+        return OpfReader(file_path).get_curated_metadata().get("isbn")
+    except Exception:
+        return None
+
+
+def collect_isbns(paths, jobs=1):
+    """Reads the ISBN of every file (OPF only, I/O-bound: threads are enough)."""
+    if jobs <= 1:
+        return [isbn_worker(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(isbn_worker, paths))
+
+
+def report_write_peak(peak):
+    """Logs the peak RSS of a file's write stage (always shown when a memory budget is set)."""
+    message = f"Write stage peak memory: {peak / MB:.0f} MB"
+    if config.MEMORY_BUDGET_MB > 0:
+        Logger.info(message)
+    else:
+        Logger.verbose(message)
+
+
+def write_worker(file_path, approved_data, final_meta, options):
+    """
+    Write/convert stage (CPU-bound, runs in a worker process).
+    Works in a new temporary workspace directory, which the caller must remove.
+    Returns: (path to upload | None, temp dir, captured log lines, peak RSS of the write in bytes)
+    """
+    from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+    from epub_pipeline.pipeline.workspace import Workspace
+
+    temp_dir = tempfile.mkdtemp()
+
+    with Logger.capture() as logs:
+        try:
+            workspace = Workspace(file_path, temp_dir)
+        except Exception as e:
+            Logger.error(f"Failed to prepare workspace: {e}")
+            return None, temp_dir, logs, 0
+
+        orchestrator = PipelineOrchestrator(enable_upload=False, **options)
+        with PeakMemory() as usage:
+            output_path = orchestrator._finalize(workspace, approved_data, final_meta)
+        report_write_peak(usage.peak)
+
+    return output_path, temp_dir, logs, usage.peak
+
+
+class StagedPipeline:
+    """
+    Concurrent engine behind `process_directory` (--jobs / --prefetch).
+
+    Each file goes through the same stages as a serial run:
+    1. Extraction (OPF only, in the search threads)
+    2. Search (thread pool, network-bound)
+    3. Review (main thread, in file order, since it may prompt the user)
+    4. Write/Convert (process pool)
+    5. Upload (thread pool, network-bound)
+
+    Stages are joined by bounded windows so that a large directory never has more
+    than a few files in flight. Output is captured per stage and replayed on the
+    main thread, in file order, so each file's log stays readable.
+
+    With a single job, only the lookup (stages 1 & 2) runs ahead, in threads, for the
+    next `prefetch` files: prompts appear without waiting for the network, while
+    writes and uploads still happen in order, right after each approval.
+
+    With a memory budget (MEMORY_BUDGET_MB), the process pool is sized to fit in it, and
+    each write waits until its estimated peak fits next to the ones in flight.
+    """
+
+    def __init__(self, orchestrator, jobs=1, prefetch=0):
+        self.orchestrator = orchestrator
+        self.jobs = max(1, jobs)
+        self.budget = MemoryBudget(config.MEMORY_BUDGET_MB) if config.MEMORY_BUDGET_MB > 0 else None
+        if self.budget and self.jobs > 1:
+            fitting = self.budget.max_workers(self.jobs)
+            if fitting < self.jobs:
+                Logger.warning(f"Lowering --jobs from {self.jobs} to {fitting} to fit the memory budget.")
+                self.jobs = fitting
+        # Maximum number of files waiting between two stages
+        self.window = max(prefetch, self.jobs * 2 if self.jobs > 1 else 1)
+        self.cpu_pool = None
+        self.search_pool = None
+        self.upload_pool = None
+
+    def run(self, paths):
+        with ExitStack() as stack:
+            self.search_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(self.jobs, self.window)))
+            pools = [self.search_pool]
+
+            if self.jobs > 1:
+                self.cpu_pool = stack.enter_context(
+                    ProcessPoolExecutor(
+                        max_workers=self.jobs,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(_config_snapshot(),),
+                    )
+                )
+                self.upload_pool = stack.enter_context(ThreadPoolExecutor(max_workers=self.jobs))
+                pools += [self.cpu_pool, self.upload_pool]
+
+            # On error (or Ctrl+C), drop queued work instead of draining it
+            for pool in pools:
+                stack.callback(pool.shutdown, cancel_futures=True)
+
+            lookups: deque = deque()
+            finishing: deque = deque()
+
+            for path in paths:
+                lookups.append(self.search_pool.submit(self._lookup, path))
+                if len(lookups) > self.window:
+                    self._review_next(lookups, finishing)
+
+            while lookups:
+                self._review_next(lookups, finishing)
+
+            while finishing:
+                self._flush(finishing.popleft())
+
+    def _run_cpu(self, fn, *args):
+        """Runs a CPU-bound stage in the process pool, or inline in single-job mode."""
+        if self.cpu_pool:
+            return self.cpu_pool.submit(fn, *args).result()
+        return fn(*args)
+
+    def _lookup(self, path):
+        """Stages 1 & 2. Runs in the search pool."""
+        meta, logs = extract_worker(path, self.orchestrator.catalog)
+        if not meta:
+            return path, None, None, logs
+
+        with Logger.capture() as search_logs:
+            result = self.orchestrator._search(meta, path)
+        return path, meta, result, logs + search_logs
+
+    def _review_next(self, lookups, finishing):
+        """Stage 3. Runs on the main thread, then hands the file over to the write stage."""
+        path, meta, result, logs = lookups.popleft().result()
+        Logger.replay(logs)
+
+        decision = None
+        if meta:
+            decision = self.orchestrator._review(path, meta, *result)
+
+        if decision is None:
+            self.orchestrator._release_duplicates(path, "was rejected" if meta else "could not be read")
+        elif not self.upload_pool:
+            # Single job: write and upload right away, in order
+            Logger.replay(self._finish(path, decision)[1])
+        print("-" * 60)
+
+        if decision is not None and self.upload_pool:
+            finishing.append(self.upload_pool.submit(self._finish, path, decision))
+
+        # Replay completed files in order; block on the oldest one if the window is full
+        while finishing and (finishing[0].done() or len(finishing) > self.window):
+            self._flush(finishing.popleft())
+
+    def _finish(self, path, decision):
+        """Stages 4 & 5. Runs in the upload pool (or inline in single-job mode)."""
+        approved_data, final_meta = decision
+        args = (path, approved_data, final_meta, self.orchestrator._worker_options())
+        if self.budget and self.cpu_pool:
+            # Waits until this file's estimated peak fits next to the writes in flight
+            with self.budget.reserve(self.budget.estimate(path)):
+                output_path, temp_dir, logs, peak = self._run_cpu(write_worker, *args)
+            self.budget.record(path, peak)
+        else:
+            output_path, temp_dir, logs, _ = self._run_cpu(write_worker, *args)
+
+        try:
+            with Logger.capture() as upload_logs:
+                if not output_path:
+                    self.orchestrator._release_duplicates(path, "could not be written")
+                elif not self.orchestrator._deliver(path, output_path):
+                    self.orchestrator._release_duplicates(path, "could not be delivered")
+            logs += upload_logs
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return path, logs
+
+    def _flush(self, future):
+        path, logs = future.result()
+        Logger.info(f"Finalizing: {truncate(os.path.basename(path))}")
+        Logger.replay(logs)
+        print("-" * 60)
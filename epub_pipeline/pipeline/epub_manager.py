@@ -1,121 +1,56 @@
 import argparse
 import os
 import warnings
-from typing import Any, Dict, List, Optional
+from typing import Optional
 
-from epub_pipeline.models import BookMetadata
-from epub_pipeline.utils.isbn_utils import clean_isbn_string, extract_isbn_from_filename
+from epub_pipeline import config
+from epub_pipeline.pipeline.epub_writer import SurgicalSaveError, SurgicalWriter
+from epub_pipeline.pipeline.kepub_converter import KepubConverter
+from epub_pipeline.pipeline.metadata_reader import MetadataReader, OpfPackage, OpfReader
 from epub_pipeline.utils.logger import Logger
 from epub_pipeline.utils.text_utils import format_author_sort
 
-# Suppress annoying ebooklib warnings
-# Must be done BEFORE importing ebooklib
-warnings.filterwarnings("ignore", category=UserWarning, module="ebooklib")
-warnings.filterwarnings("ignore", category=FutureWarning, module="ebooklib")
 
-from ebooklib import epub  # type: ignore  # noqa: E402
+def load_ebooklib():
+    """
+    Imports EbookLib's `epub` module on first use.
+    It is only needed to load or rewrite a whole book, and is slow to import.
+    """
+    # Suppress annoying ebooklib warnings
+    # Must be done BEFORE importing ebooklib
+    warnings.filterwarnings("ignore", category=UserWarning, module="ebooklib")
+    warnings.filterwarnings("ignore", category=FutureWarning, module="ebooklib")
+
+    from ebooklib import epub  # type: ignore
+
+    return epub
 
 
-class EpubManager:
+class EpubManager(MetadataReader):
     """
     Manages reading and writing metadata for an EPUB file using EbookLib.
     It abstracts away the complexity of Dublin Core (DC) and custom OPF metadata.
+    With SURGICAL_SAVE or in streaming mode (memory-bounded runs), only the OPF metadata is
+    loaded and edited: the book is saved surgically, and only loaded by EbookLib if a full
+    rewrite is unavoidable. Otherwise the whole book is loaded up front.
     """
 
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, streaming: Optional[bool] = None):
         self.filepath = filepath
         self.filename = os.path.basename(filepath)
         self.book = None
+        # New cover image, applied when saving
+        self.cover: Optional[bytes] = None
+        self.streaming = config.MEMORY_BUDGET_MB > 0 if streaming is None else streaming
 
         try:
             # Attempt to read the EPUB file structure
-            self.book = epub.read_epub(filepath)
+            lightweight = config.SURGICAL_SAVE or self.streaming
+            self.book = OpfPackage(filepath) if lightweight else load_ebooklib().read_epub(filepath)
         except Exception as e:
             Logger.error(f"Standard parsing failed ({e}).")
             raise e
 
-    def get_raw_metadata(self) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        Extracts ALL metadata available in the OPF, including custom namespaces.
-        Useful for debugging to see exactly what tags exist.
-        """
-        if not self.book:
-            return {}
-        raw_data: Dict[str, List[Dict[str, Any]]] = {}
-        for namespace, name_dict in self.book.metadata.items():
-            # Simplifies namespace URLs to prefixes (e.g., 'DC' or 'OPF')
-            ns_prefix = namespace.split("/")[-1].split("#")[-1]
-            if "elements/1.1" in namespace:
-                ns_prefix = "DC"
-            for name, items in name_dict.items():
-                key = f"{ns_prefix}:{name}"
-                raw_data[key] = []
-                for value, attrs in items:
-                    raw_data[key].append({"value": value, "attrs": attrs})
-        return raw_data
-
-    def get_curated_metadata(self) -> Optional[BookMetadata]:
-        """
-        Extracts essential metadata (Title, Author, ISBN, etc.) into a normalized structure.
-        Implements fallback strategies for finding ISBNs (metadata vs filename).
-        """
-        if not self.book:
-            return None
-
-        # Basic Dublin Core fields
-        titles = self.book.get_metadata("DC", "title")
-        title = titles[0][0] if titles else "Unknown"
-        creators = self.book.get_metadata("DC", "creator")
-        authors = [c[0] for c in creators] if creators else ["Unknown"]
-
-        # ISBN Extraction Strategy:
-        # 1. Look for 'identifier' tags with scheme="ISBN"
-        # 2. Look for identifiers that look like ISBNs (10 or 13 digits, starting with 978/979)
-        isbn = None
-        identifiers = self.book.get_metadata("DC", "identifier")
-        for value, attrs in identifiers:
-            c_val = clean_isbn_string(value)
-            scheme = ""
-            for k, v in attrs.items():
-                if "scheme" in k.lower():
-                    scheme = v.lower()
-                    break
-            if "isbn" in scheme or (
-                c_val.isdigit() and len(c_val) in [10, 13] and c_val.startswith(("978", "979", ""))
-            ):
-                if len(c_val) in [10, 13]:
-                    isbn = c_val
-                    break
-
-        # Fallback: Check filename for ISBN pattern
-        if not isbn:
-            isbn = extract_isbn_from_filename(self.filename)
-
-        publishers = self.book.get_metadata("DC", "publisher")
-        publisher = publishers[0][0] if publishers else None
-
-        langs = self.book.get_metadata("DC", "language")
-        language = langs[0][0] if langs else None
-
-        pub_dates = self.book.get_metadata("DC", "date")
-        date = pub_dates[0][0] if pub_dates else None
-
-        subjects = []
-        subj_items = self.book.get_metadata("DC", "subject")
-        for s, _ in subj_items:
-            subjects.append(s)
-
-        return BookMetadata(
-            filename=self.filename,
-            title=title,
-            authors=authors,
-            isbn=isbn,
-            publisher=publisher,
-            language=language,
-            date=str(date) if date else None,
-            tags=subjects,
-        )
-
     def _clear_metadata(self, namespace, name):
         """Helper to remove specific metadata entries directly from the internal dict."""
         if namespace in self.book.metadata and name in self.book.metadata[namespace]:
@@ -190,19 +125,13 @@ class EpubManager:
                     break  # Only add the first ISBN-13 found
 
     def set_cover(self, image_data):
-        """Sets the cover image. EbookLib handles the manifest item creation."""
+        """Sets the cover image (applied by `save`)."""
         if not self.book or not image_data:
             return
-        self.book.set_cover("cover.jpg", image_data)
+        self.cover = image_data
 
-    def save(self, output_path=None):
-        """Writes the modified EPUB to disk with safe metadata cleanup."""
-        if not self.book:
-            return
-        if not output_path:
-            output_path = self.filepath
-
-        # Cleanup problematic custom metadata
+    def _clean_metadata(self):
+        """Removes problematic custom metadata (calibre, user_metadata, empty entries)."""
         for ns in list(self.book.metadata.keys()):
             if not ns:
                 continue
@@ -239,12 +168,53 @@ class EpubManager:
             for k in keys_to_del:
                 del self.book.metadata[ns][k]
 
+    def save(self, output_path=None, kepub=False):
+        """
+        Writes the modified EPUB to disk with safe metadata cleanup.
+        With SURGICAL_SAVE, only the OPF (and cover) are replaced and every other member is
+        copied byte for byte; EbookLib rewrites the whole book when that is not possible.
+        With `kepub`, the native converter writes the KEPUB version instead, in the same pass
+        (raises KepubConversionError if it cannot).
+        """
+        if not self.book:
+            return
+        if not output_path:
+            output_path = self.filepath
+
+        self._clean_metadata()
+
+        if kepub:
+            KepubConverter.convert(self.filepath, output_path, self.book.metadata, self.cover)
+            return
+
+        if config.SURGICAL_SAVE or self.streaming:
+            try:
+                SurgicalWriter.write(self.filepath, output_path, self.book.metadata, self.cover)
+                return
+            except SurgicalSaveError as e:
+                Logger.verbose(f"Rewriting the whole book ({e}).")
+
+        book = self._load_full_book() if isinstance(self.book, OpfPackage) else self.book
+        if self.cover:
+            # EbookLib handles the manifest item creation
+            book.set_cover("cover.jpg", self.cover)
         try:
-            epub.write_epub(output_path, self.book, {})
+            load_ebooklib().write_epub(output_path, book, {})
         except Exception as e:
             Logger.error(f"Failed to write EPUB: {e}")
             raise e
 
+    def _load_full_book(self):
+        """Surgical save fallback: loads the book with EbookLib and applies the edited metadata."""
+        if self.streaming:
+            Logger.warning("This book needs a full rewrite: loading it in memory.")
+        book = load_ebooklib().read_epub(self.filepath)
+        book.metadata = self.book.metadata
+        languages = self.book.get_metadata("DC", "language")
+        if languages:
+            book.language = languages[0][0]
+        return book
+
 
 if __name__ == "__main__":
     from epub_pipeline.utils.formatter import Formatter
@@ -255,6 +225,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if os.path.isfile(args.path):
-        Formatter.print_metadata(EpubManager(args.path), args.full)
+        Formatter.print_metadata(OpfReader(args.path), args.full)
     else:
         print("Invalid path or file not found.")
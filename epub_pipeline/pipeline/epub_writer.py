@@ -0,0 +1,290 @@
+import copy
+import datetime
+import os
+import posixpath
+import re
+import struct
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+from xml.sax.saxutils import escape, quoteattr
+
+from epub_pipeline.pipeline.metadata_reader import NAMESPACES, OPF_NS, OpfPackage
+
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+MIMETYPE = "mimetype"
+
+# Local file header: signature, versions, flags, method, time, date, crc, sizes, name length, extra length
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+DATA_DESCRIPTOR_FLAG = 0x08
+ZIP64_EXTRA_ID = 0x0001
+COPY_BUFFER = 1024 * 1024
+
+METADATA_OPEN = re.compile(rb"<(?:[\w.-]+:)?metadata\b[^>]*?(/?)>")
+METADATA_CLOSE = re.compile(rb"</(?:[\w.-]+:)?metadata\s*>")
+XMLNS_DECL = re.compile(r"""\bxmlns(?::([\w.-]+))?\s*=\s*(["'])(.*?)\2""")
+ENCODING_DECL = re.compile(rb"""^<\?xml[^>]*encoding\s*=\s*["']([\w.-]+)["']""")
+
+
+class SurgicalSaveError(Exception):
+    """The book cannot be saved surgically (a full rewrite is needed)."""
+
+
+class SurgicalWriter:
+    """
+    Saves metadata changes without rewriting the book.
+    The original archive is streamed into the output:
+    - Untouched members are copied as raw compressed bytes (no inflate/deflate).
+    - Only the OPF (and the cover image, when replaced) get new data.
+    - `mimetype` is written first and stored; the original member order is kept.
+    """
+
+    @staticmethod
+    def write(source_path: str, output_path: str, metadata: dict, cover: Optional[bytes] = None):
+        """
+        Writes `source_path` with a new OPF <metadata> block (and cover image) to `output_path`.
+        Saving onto the source itself is safe: the output is written next to it, then swapped in.
+        Raises: SurgicalSaveError if the source cannot be patched in place.
+        """
+        try:
+            package = OpfPackage(source_path)
+            with zipfile.ZipFile(source_path) as source:
+                opf = source.read(package.opf_path)
+                replacements = {package.opf_path: SurgicalWriter.render_opf(opf, metadata, package.version)}
+                if cover:
+                    cover_path, media_type = SurgicalWriter.find_cover(opf, package.opf_path)
+                    if not cover_path or cover_path not in source.NameToInfo:
+                        raise SurgicalSaveError("No cover image to replace")
+                    if media_type != "image/jpeg":
+                        raise SurgicalSaveError(f"Cover is {media_type}, new cover is JPEG")
+                    replacements[cover_path] = cover
+        except (zipfile.BadZipFile, KeyError, ValueError, OSError, ET.ParseError) as e:
+            raise SurgicalSaveError(str(e)) from e
+
+        with SurgicalWriter.replacing(output_path) as temp_path:
+            with zipfile.ZipFile(source_path) as source, zipfile.ZipFile(temp_path, "w") as target:
+                SurgicalWriter.copy_members(source, target, replacements)
+
+    @staticmethod
+    @contextmanager
+    def replacing(output_path: str):
+        """Yields a temporary path next to `output_path`, swapped in once the block succeeds."""
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(suffix=".epub", dir=directory)
+        os.close(fd)
+        try:
+            yield temp_path
+            os.replace(temp_path, output_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def copy_members(source: zipfile.ZipFile, target: zipfile.ZipFile, replacements: Dict[str, bytes]):
+        """Streams every member of `source` into `target`, substituting the data of `replacements`."""
+        for info in SurgicalWriter.ordered_members(source):
+            if info.filename == MIMETYPE and info.compress_type != zipfile.ZIP_STORED:
+                replacements = {**replacements, MIMETYPE: source.read(info)}
+
+            if info.filename in replacements:
+                SurgicalWriter.write_member(target, info, replacements[info.filename])
+            else:
+                SurgicalWriter.copy_raw(source, target, info)
+
+    @staticmethod
+    def ordered_members(source: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Members in archive order, `mimetype` first (EPUB OCF spec)."""
+        infos = source.infolist()
+        infos.sort(key=lambda info: info.filename != MIMETYPE)
+        return infos
+
+    @staticmethod
+    def write_member(target: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes, compress_type: Optional[int] = None):
+        """Writes new data for a member, keeping its name, date and attributes (`mimetype` is always stored)."""
+        new_info = copy.copy(info)
+        new_info.flag_bits &= ~DATA_DESCRIPTOR_FLAG
+        new_info.extra = _strip_zip64(info.extra)
+        if info.filename == MIMETYPE:
+            compress_type = zipfile.ZIP_STORED
+        target.writestr(new_info, data, compress_type=info.compress_type if compress_type is None else compress_type)
+
+    @staticmethod
+    def copy_raw(source: zipfile.ZipFile, target: zipfile.ZipFile, info: zipfile.ZipInfo):
+        """
+        Copies a member's compressed bytes as-is.
+        zipfile has no public API for this: the local header is written by hand,
+        and the entry registered so that `close()` lists it in the central directory.
+        """
+        src = source.fp
+        assert src is not None and target.fp is not None
+        src.seek(info.header_offset)
+        header = LOCAL_HEADER.unpack(src.read(LOCAL_HEADER.size))
+        name_length, extra_length = header[-2], header[-1]
+        src.seek(info.header_offset + LOCAL_HEADER.size + name_length + extra_length)
+
+        new_info = copy.copy(info)
+        # Sizes and CRC are known: they go in the local header instead of a trailing data descriptor
+        new_info.flag_bits &= ~DATA_DESCRIPTOR_FLAG
+        new_info.extra = _strip_zip64(info.extra)
+
+        out = target.fp
+        out.seek(target.start_dir)
+        new_info.header_offset = out.tell()
+        zip64 = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+        out.write(new_info.FileHeader(zip64))
+
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = src.read(min(COPY_BUFFER, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated member: {info.filename}")
+            out.write(chunk)
+            remaining -= len(chunk)
+
+        target.filelist.append(new_info)
+        target.NameToInfo[new_info.filename] = new_info
+        target.start_dir = out.tell()
+
+    @staticmethod
+    def render_opf(opf: bytes, metadata: dict, version: Optional[str] = None) -> bytes:
+        """Returns the OPF with its <metadata> children regenerated from `metadata` (ebooklib layout)."""
+        encoding_match = ENCODING_DECL.match(opf.lstrip())
+        encoding = encoding_match.group(1).decode("ascii") if encoding_match else "utf-8"
+
+        start = METADATA_OPEN.search(opf)
+        if not start:
+            raise SurgicalSaveError("No <metadata> element in the OPF")
+        if start.group(1):
+            # <metadata/>: becomes an open/close pair
+            close_tag = b"</" + start.group(0)[1:].split()[0].rstrip(b"/>") + b">"
+            head, tail = opf[: start.start()] + start.group(0)[:-2] + b">", close_tag + opf[start.end() :]
+            closing_indent = ""
+        else:
+            end = METADATA_CLOSE.search(opf, start.end())
+            if not end:
+                raise SurgicalSaveError("Unterminated <metadata> element in the OPF")
+            head, tail = opf[: start.end()], opf[end.start() :]
+            indent_match = re.search(rb"\n([ \t]*)$", opf[: end.start()])
+            closing_indent = indent_match.group(1).decode("ascii") if indent_match else ""
+
+        head_text = head.decode(encoding)
+        # Namespaces declared by <package> and <metadata>, i.e. in scope for the new children
+        prefixes: Dict[str, str] = {}
+        default_ns = ""
+        for prefix, _, uri in XMLNS_DECL.findall(head_text):
+            if prefix:
+                prefixes[uri] = prefix
+            else:
+                default_ns = uri
+
+        renderer = _MetadataRenderer(prefixes, default_ns)
+        indent = _child_indent(opf[start.end() :])
+        lines = renderer.render(metadata, refresh_modified=bool(version and version.startswith("3")))
+
+        if renderer.declarations:
+            # Prefixes the original document did not declare: added to the <metadata> start tag
+            open_tag_end = head_text.rstrip().rfind(">")
+            declarations = "".join(f" xmlns:{prefix}={quoteattr(uri)}" for uri, prefix in renderer.declarations)
+            head_text = head_text[:open_tag_end] + declarations + head_text[open_tag_end:]
+
+        body = "".join(f"\n{indent}{line}" for line in lines) + f"\n{closing_indent}"
+        return head_text.encode(encoding) + body.encode(encoding, "xmlcharrefreplace") + tail
+
+    @staticmethod
+    def find_cover(opf: bytes, opf_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (archive path, media type) of the cover image declared in the OPF, or (None, None)."""
+        root = ET.fromstring(opf)
+        items = root.findall(f"{{{OPF_NS}}}manifest/{{{OPF_NS}}}item")
+
+        cover = next((i for i in items if "cover-image" in (i.get("properties") or "").split()), None)
+        if cover is None:
+            cover_id = next(
+                (m.get("content") for m in root.iter(f"{{{OPF_NS}}}meta") if m.get("name") == "cover"),
+                None,
+            )
+            cover = next((i for i in items if cover_id and i.get("id") == cover_id), None)
+        if cover is None or not cover.get("href"):
+            return None, None
+
+        href = unquote(cover.get("href", ""))
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(opf_path), href))
+        return path, cover.get("media-type")
+
+
+def _child_indent(after_open_tag: bytes) -> str:
+    """Indentation of the original first <metadata> child (4 spaces by default)."""
+    match = re.match(rb"\s*?\n([ \t]*)<", after_open_tag)
+    return match.group(1).decode("ascii") if match else "    "
+
+
+def _strip_zip64(extra: bytes) -> bytes:
+    """Drops zip64 extra fields (they are regenerated when needed)."""
+    result = b""
+    i = 0
+    while i + 4 <= len(extra):
+        header_id, size = struct.unpack("<HH", extra[i : i + 4])
+        if header_id != ZIP64_EXTRA_ID:
+            result += extra[i : i + 4 + size]
+        i += 4 + size
+    return result
+
+
+class _MetadataRenderer:
+    """Serializes an ebooklib-style metadata dict as <metadata> children."""
+
+    PREFERRED_PREFIXES = {NAMESPACES["DC"]: "dc", OPF_NS: "opf"}
+
+    def __init__(self, prefixes: Dict[str, str], default_ns: str):
+        self.prefixes = dict(prefixes)
+        self.default_ns = default_ns
+        # (uri, prefix) pairs missing from the original declarations
+        self.declarations: List[Tuple[str, str]] = []
+
+    def render(self, metadata: dict, refresh_modified: bool = False) -> List[str]:
+        lines = []
+        for namespace, entries in metadata.items():
+            for name, values in entries.items():
+                for value, attrs in values:
+                    attrs = attrs or {}
+                    if refresh_modified and attrs.get("property") == "dcterms:modified":
+                        continue
+                    # ebooklib files its own <meta> additions (file-as, role...) under the None namespace
+                    lines.append(self._element(namespace or OPF_NS, name, value, attrs))
+
+        if refresh_modified:
+            # Content changed: EPUB 3 requires an up-to-date modification date
+            modified = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            lines.append(self._element(OPF_NS, "meta", modified, {"property": "dcterms:modified"}))
+        return lines
+
+    def _element(self, namespace: str, name: str, value, attrs: dict) -> str:
+        tag = self._qualify(namespace, name, is_attribute=False)
+        rendered_attrs = "".join(
+            f" {self._qualify_attribute(key)}={quoteattr(str(val))}" for key, val in attrs.items() if val is not None
+        )
+        if value is None or value == "":
+            return f"<{tag}{rendered_attrs}/>"
+        return f"<{tag}{rendered_attrs}>{escape(str(value))}</{tag}>"
+
+    def _qualify_attribute(self, key: str) -> str:
+        if not key.startswith("{"):
+            return key
+        namespace, local = key[1:].split("}", 1)
+        if namespace == XML_NS:
+            return f"xml:{local}"
+        return self._qualify(namespace, local, is_attribute=True)
+
+    def _qualify(self, namespace: str, local: str, is_attribute: bool) -> str:
+        # Unprefixed attributes have no namespace: only elements can use the default one
+        if not is_attribute and namespace == self.default_ns:
+            return local
+        if namespace not in self.prefixes:
+            prefix = self.PREFERRED_PREFIXES.get(namespace) or f"ns{len(self.declarations)}"
+            while prefix in self.prefixes.values():
+                prefix += "_"
+            self.prefixes[namespace] = prefix
+            self.declarations.append((namespace, prefix))
+        return f"{self.prefixes[namespace]}:{local}"
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import posixpath
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Optional, Tuple
+from urllib.parse import unquote
+
+from epub_pipeline.pipeline.metadata_reader import OPF_NS, OpfPackage
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS paths (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS paths_fingerprint ON paths (fingerprint);
+CREATE TABLE IF NOT EXISTS processed (
+    fingerprint TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    output_name TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def content_fingerprint(file_path: str) -> Optional[str]:
+    """
+    SHA-256 of the book's spine content documents (uncompressed, in reading order).
+    The OPF metadata, the member names and the zip packing (compression level, member
+    order, timestamps) are left out: a re-tagged or re-zipped copy has the same fingerprint.
+    Returns None if the book has no readable spine.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            opf_path = OpfPackage._find_opf(archive)
+            root = ET.fromstring(archive.read(opf_path))
+            hrefs = {
+                item.get("id"): item.get("href", "") for item in root.findall(f"{{{OPF_NS}}}manifest/{{{OPF_NS}}}item")
+            }
+
+            digest = hashlib.sha256()
+            documents = 0
+            for itemref in root.findall(f"{{{OPF_NS}}}spine/{{{OPF_NS}}}itemref"):
+                href = hrefs.get(itemref.get("idref"))
+                if not href:
+                    continue
+                name = posixpath.normpath(posixpath.join(posixpath.dirname(opf_path), unquote(href)))
+                info = archive.getinfo(name)
+                # Length prefix: document boundaries are part of the fingerprint
+                digest.update(info.file_size.to_bytes(8, "big"))
+                with archive.open(info) as member:
+                    while chunk := member.read(CHUNK_SIZE):
+                        digest.update(chunk)
+                documents += 1
+    except (zipfile.BadZipFile, KeyError, ValueError, OSError, ET.ParseError):
+        return None
+
+    return digest.hexdigest() if documents else None
+
+
+class FingerprintIndex:
+    """
+    Persistent content fingerprints of the library, used to spot duplicate books.
+
+    Fingerprints are cached behind a (path, size, mtime) key so that unchanged files are
+    never read again, and indexed by value so that checking a new file against everything
+    seen before is a single lookup. Processed representatives are recorded as well, so a
+    copy found in a later run is linked to the book that was already processed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """Returns the fingerprint of one file, hashing it only if it is not in the index."""
+        key = self._key(path)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM paths WHERE path = ? AND size = ? AND mtime = ?", key
+            ).fetchone()
+        if row:
+            return row[0]
+
+        fingerprint = content_fingerprint(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paths (path, size, mtime, fingerprint) VALUES (?, ?, ?, ?)",
+                (*key, fingerprint),
+            )
+        return fingerprint
+
+    def processed_copy(self, fingerprint: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(path, output name) of an already processed book with this fingerprint, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, output_name FROM processed WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def mark_processed(self, fingerprint: str, file_path: str, output_name: Optional[str]):
+        """Records the book processed for a fingerprint (the one later copies are linked to)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed (fingerprint, path, output_name, updated_at) VALUES (?, ?, ?, ?)",
+                (fingerprint, os.path.abspath(file_path), output_name, time.time()),
+            )
+
+    @staticmethod
+    def _key(path: str) -> Optional[Tuple[str, int, float]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), st.st_size, st.st_mtime
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,262 @@
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import List, Optional
+
+from epub_pipeline.pipeline.epub_writer import ENCODING_DECL, MIMETYPE, SurgicalSaveError, SurgicalWriter
+from epub_pipeline.pipeline.metadata_reader import OPF_NS, OpfPackage
+
+CONTENT_EXTENSIONS = (".xhtml", ".html", ".htm")
+
+# Elements starting a new Kobo "paragraph" (the first number of a koboSpan id)
+PARAGRAPH_TAGS = {"p", "ol", "ul", "table", "h1", "h2", "h3", "h4", "h5", "h6"}
+# Elements whose text is never split into spans
+SKIPPED_TAGS = {"script", "style", "pre", "audio", "video", "svg", "math"}
+
+# A sentence ends with . ! or ? (plus an optional closing quote) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?]['\"”’“…]?\s+")
+# Markup tokens: comments, CDATA sections, processing instructions, declarations, then tags
+TOKEN = re.compile(
+    r"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<![^>]*>"
+    r"|<(?P<close>/)?(?P<name>[A-Za-z_][\w.:-]*)(?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*(?P<empty>/)?>",
+    re.S,
+)
+MANIFEST_ITEM = re.compile(rb"<(?:[\w.-]+:)?item\b[^>]*?/?>")
+ATTRIBUTE = re.compile(rb"""\b([\w.:-]+)\s*=\s*(["'])(.*?)\2""", re.S)
+
+# Byte for byte what kepubify adds
+STYLE_HACKS = "div#book-inner { margin-top: 0; margin-bottom: 0;}"
+
+
+class KepubConversionError(Exception):
+    """The book cannot be converted (KepubHandler falls back to a plain EPUB)."""
+
+
+class KepubConverter:
+    """
+    Pure-Python EPUB -> KEPUB conversion, following kepubify's transformations:
+    - Content documents: text split into `koboSpan` sentences (ids `kobo.<paragraph>.<segment>`),
+      images wrapped in their own span, body wrapped in `book-columns` / `book-inner` divs,
+      and the Kobo style hacks (CSS) added to the head.
+    - OPF: the cover image gets the `cover-image` property Kobo devices look for.
+
+    The archive is streamed member by member: content documents are transformed one at a time,
+    every other member is copied as raw compressed bytes (see SurgicalWriter). A metadata update
+    (and new cover) can be applied in the same pass, so the book is only written once.
+    """
+
+    @staticmethod
+    def convert(source_path: str, output_path: str, metadata: Optional[dict] = None, cover: Optional[bytes] = None):
+        """
+        Writes the KEPUB version of `source_path` to `output_path`.
+        `metadata` (ebooklib-style dict) replaces the OPF <metadata> block when given.
+        Raises: KepubConversionError
+        """
+        try:
+            package = OpfPackage(source_path)
+            with zipfile.ZipFile(source_path) as source:
+                opf = source.read(package.opf_path)
+                replacements = {}
+                if cover:
+                    cover_path, media_type = SurgicalWriter.find_cover(opf, package.opf_path)
+                    if not cover_path or cover_path not in source.NameToInfo or media_type != "image/jpeg":
+                        raise KepubConversionError("No JPEG cover image to replace")
+                    replacements[cover_path] = cover
+                if metadata is not None:
+                    opf = SurgicalWriter.render_opf(opf, metadata, package.version)
+                replacements[package.opf_path] = KepubConverter.transform_opf(opf)
+
+            with SurgicalWriter.replacing(output_path) as temp_path:
+                with zipfile.ZipFile(source_path) as source, zipfile.ZipFile(temp_path, "w") as target:
+                    KepubConverter._write_members(source, target, replacements)
+        except KepubConversionError:
+            raise
+        except (zipfile.BadZipFile, KeyError, ValueError, OSError, SurgicalSaveError, ET.ParseError) as e:
+            raise KepubConversionError(str(e)) from e
+
+    @staticmethod
+    def _write_members(source: zipfile.ZipFile, target: zipfile.ZipFile, replacements: dict):
+        for info in SurgicalWriter.ordered_members(source):
+            name = info.filename
+            if name in replacements:
+                SurgicalWriter.write_member(target, info, replacements[name])
+            elif name == MIMETYPE and info.compress_type != zipfile.ZIP_STORED:
+                SurgicalWriter.write_member(target, info, source.read(info))
+            elif name.lower().endswith(CONTENT_EXTENSIONS):
+                content = KepubConverter.transform_content(source.read(info))
+                SurgicalWriter.write_member(target, info, content, zipfile.ZIP_DEFLATED)
+            else:
+                SurgicalWriter.copy_raw(source, target, info)
+
+    @staticmethod
+    def transform_opf(opf: bytes) -> bytes:
+        """Adds the `cover-image` property to the manifest item named by <meta name="cover">."""
+        root = ET.fromstring(opf)
+        cover_id = next(
+            (m.get("content") for m in root.iter(f"{{{OPF_NS}}}meta") if m.get("name") == "cover" and m.get("content")),
+            None,
+        )
+        if not cover_id:
+            return opf
+
+        def add_property(match):
+            tag = match.group(0)
+            attrs = {m.group(1): m.group(3) for m in ATTRIBUTE.finditer(tag)}
+            if attrs.get(b"id") != cover_id.encode() or not attrs.get(b"media-type", b"").startswith(b"image/"):
+                return tag
+            if b"cover-image" in attrs.get(b"properties", b"").split():
+                return tag
+            if b"properties" in attrs:
+                return ATTRIBUTE.sub(
+                    lambda m: (
+                        m.group(1) + b"=" + m.group(2) + m.group(3) + b" cover-image" + m.group(2)
+                        if m.group(1) == b"properties"
+                        else m.group(0)
+                    ),
+                    tag,
+                )
+            end = -2 if tag.endswith(b"/>") else -1
+            return tag[:end].rstrip() + b' properties="cover-image"' + tag[end:]
+
+        return MANIFEST_ITEM.sub(add_property, opf)
+
+    @staticmethod
+    def transform_content(data: bytes) -> bytes:
+        """
+        Returns the Kobo version of an XHTML document.
+        The markup is tokenized, not parsed into a tree: the original bytes are kept as-is
+        around the inserted elements. Unbalanced documents are returned unchanged.
+        """
+        if b"koboSpan" in data:
+            return data  # Already converted
+
+        match = ENCODING_DECL.match(data.lstrip())
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            text = data.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            return data
+
+        converted = _ContentTransformer().run(text)
+        if converted is None:
+            # Malformed markup: shipping it untouched is better than breaking it
+            return data
+        return converted.encode(encoding, "xmlcharrefreplace")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text the way kepubify does: trailing whitespace stays with its sentence."""
+    sentences = []
+    end = 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[end : match.end()])
+        end = match.end()
+    if end < len(text):
+        sentences.append(text[end:])
+    return sentences
+
+
+class _ContentTransformer:
+    """
+    Single pass over the tokens of a content document:
+    - text in <body> is split into numbered koboSpans (a new paragraph starts at each
+      PARAGRAPH_TAGS element and image, text in SKIPPED_TAGS is left alone),
+    - images get a span of their own,
+    - the body content is wrapped in the Kobo divs, and the style hacks added to <head>.
+    """
+
+    def __init__(self):
+        self.out: List[str] = []
+        self.stack: List[str] = []
+        self.prefix = ""
+        self.in_body = False
+        self.skipped = 0
+        self.paragraph = 0
+        self.segment = 0
+        self.open_image = False
+        self.failed = False
+
+    def run(self, text: str) -> Optional[str]:
+        position = 0
+        for token in TOKEN.finditer(text):
+            self._text(text[position : token.start()])
+            position = token.end()
+            name = token.group("name")
+            if name is None:
+                self.out.append(token.group(0))  # Comment, CDATA, PI, doctype
+            elif token.group("close"):
+                if not self._close(name.lower(), token.group(0)):
+                    return None
+            else:
+                self._open(name.lower(), token.group(0), bool(token.group("empty")))
+        self._text(text[position:])
+        return "".join(self.out) if not self.stack and not self.failed else None
+
+    def _local(self, name: str) -> str:
+        return name.rsplit(":", 1)[-1]
+
+    def _text(self, text: str):
+        if not text:
+            return
+        if "<" in text:
+            # Markup the tokenizer does not understand (e.g. unquoted attributes)
+            self.failed = True
+        if not self.in_body or self.skipped or not text.strip():
+            self.out.append(text)
+            return
+        for sentence in split_sentences(text):
+            self.out.append(self._span_open() + sentence + f"</{self.prefix}span>")
+
+    def _span_open(self) -> str:
+        self.segment += 1
+        return f'<{self.prefix}span class="koboSpan" id="kobo.{self.paragraph}.{self.segment}">'
+
+    def _open(self, name: str, tag: str, empty: bool):
+        local = self._local(name)
+        if local == "html" and ":" in name:
+            self.prefix = name.split(":", 1)[0] + ":"
+
+        if self.in_body and not self.skipped:
+            if local == "img":
+                # Images are a paragraph of their own
+                self.paragraph += 1
+                self.segment = 0
+                self.out.append(self._span_open())
+                self.open_image = not empty
+                self.out.append(tag if not empty else tag + f"</{self.prefix}span>")
+                if not empty:
+                    self.stack.append(name)
+                return
+            if local in PARAGRAPH_TAGS:
+                self.paragraph += 1
+                self.segment = 0
+
+        self.out.append(tag)
+        if empty:
+            return
+        self.stack.append(name)
+        if local in SKIPPED_TAGS:
+            self.skipped += 1
+        if local == "body":
+            self.in_body = True
+            self.out.append(f'<{self.prefix}div id="book-columns"><{self.prefix}div id="book-inner">')
+
+    def _close(self, name: str, tag: str) -> bool:
+        if not self.stack or self.stack.pop() != name:
+            return False
+        local = self._local(name)
+        if local in SKIPPED_TAGS:
+            self.skipped -= 1
+        elif local == "body":
+            self.in_body = False
+            self.out.append(f"</{self.prefix}div></{self.prefix}div>")
+        elif local == "head":
+            self.out.append(
+                f'<{self.prefix}style type="text/css" class="kobostylehacks">{STYLE_HACKS}</{self.prefix}style>'
+            )
+
+        self.out.append(tag)
+        if local == "img" and self.open_image:
+            self.out.append(f"</{self.prefix}span>")
+            self.open_image = False
+        return True
@@ -2,6 +2,8 @@ import os
 import shutil
 import subprocess
 
+from epub_pipeline import config
+from epub_pipeline.pipeline.kepub_converter import KepubConversionError, KepubConverter
 from epub_pipeline.utils.logger import Logger
 
 
@@ -10,6 +12,7 @@ class KepubHandler:
     Wrapper for the 'kepubify' tool (Golang binary) used to convert EPUBs to KEPUBs.
     Kepubify is not included in this Python package and must be installed separately
     (or via Docker).
+    With KEPUB_CONVERTER=native, the built-in KepubConverter is used instead.
     """
 
     BINARY_NAME = "kepubify"
@@ -29,6 +32,24 @@ class KepubHandler:
 
         return None
 
+    @staticmethod
+    def kepub_path(input_path):
+        """Default output path: source name + .kepub.epub suffix."""
+        if input_path.lower().endswith(".epub"):
+            return input_path[:-5] + ".kepub.epub"
+        return input_path + ".kepub.epub"
+
+    @staticmethod
+    def convert_native(input_path, output_path):
+        """Converts with the built-in converter (no external process)."""
+        try:
+            KepubConverter.convert(input_path, output_path)
+            Logger.success(f"Converted to KEPUB: {os.path.basename(output_path)}")
+            return True
+        except KepubConversionError as e:
+            Logger.error(f"KEPUB conversion failed: {e}")
+            return False
+
     @staticmethod
     def convert_to_kepub(input_path, output_path=None):
         """
@@ -43,6 +64,12 @@ class KepubHandler:
             Logger.warning("Skipping conversion (already KEPUB).")
             return True
 
+        if not output_path:
+            output_path = KepubHandler.kepub_path(input_path)
+
+        if config.KEPUB_CONVERTER == "native":
+            return KepubHandler.convert_native(input_path, output_path)
+
         binary = KepubHandler.get_binary_path()
         if not binary:
             Logger.error("'kepubify' not found in PATH.")
@@ -50,12 +77,6 @@ class KepubHandler:
             Logger.info("Or ensure it is in your system PATH.")
             return False
 
-        if not output_path:
-            if input_path.lower().endswith(".epub"):
-                output_path = input_path[:-5] + ".kepub.epub"
-            else:
-                output_path = input_path + ".kepub.epub"
-
         # kepubify input.epub -o output.kepub.epub
         cmd = [binary, input_path, "-o", output_path]
 
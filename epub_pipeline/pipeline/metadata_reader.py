@@ -0,0 +1,216 @@
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from epub_pipeline.models import BookMetadata
+from epub_pipeline.utils.isbn_utils import clean_isbn_string, extract_isbn_from_filename
+
+CONTAINER_PATH = "META-INF/container.xml"
+CONTAINER_NS = "urn:oasis:names:tc:opendocument:xmlns:container"
+OPF_NS = "http://www.idpf.org/2007/opf"
+
+# Same shortcuts as ebooklib's NAMESPACES, so that get_metadata("DC", ...) works on both
+NAMESPACES = {
+    "XML": "http://www.w3.org/XML/1998/namespace",
+    "EPUB": "http://www.idpf.org/2007/ops",
+    "DAISY": "http://www.daisy.org/z3986/2005/ncx/",
+    "OPF": OPF_NS,
+    "CONTAINERNS": CONTAINER_NS,
+    "DC": "http://purl.org/dc/elements/1.1/",
+    "XHTML": "http://www.w3.org/1999/xhtml",
+}
+
+MetadataDict = Dict[str, Dict[str, List[Tuple[Optional[str], Dict[str, str]]]]]
+
+
+class MetadataReader:
+    """
+    Read-side logic shared by EpubManager (full ebooklib book) and OpfReader (OPF only).
+    Works on any `book` exposing ebooklib's `metadata` dict and `get_metadata()`.
+    """
+
+    filename: str
+    book: Any
+
+    def get_raw_metadata(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extracts ALL metadata available in the OPF, including custom namespaces.
+        Useful for debugging to see exactly what tags exist.
+        """
+        if not self.book:
+            return {}
+        raw_data: Dict[str, List[Dict[str, Any]]] = {}
+        for namespace, name_dict in self.book.metadata.items():
+            # Simplifies namespace URLs to prefixes (e.g., 'DC' or 'OPF')
+            ns_prefix = namespace.split("/")[-1].split("#")[-1]
+            if "elements/1.1" in namespace:
+                ns_prefix = "DC"
+            for name, items in name_dict.items():
+                key = f"{ns_prefix}:{name}"
+                raw_data[key] = []
+                for value, attrs in items:
+                    raw_data[key].append({"value": value, "attrs": attrs})
+        return raw_data
+
+    def get_curated_metadata(self) -> Optional[BookMetadata]:
+        """
+        Extracts essential metadata (Title, Author, ISBN, etc.) into a normalized structure.
+        Implements fallback strategies for finding ISBNs (metadata vs filename).
+        """
+        if not self.book:
+            return None
+
+        # Basic Dublin Core fields
+        titles = self.book.get_metadata("DC", "title")
+        title = titles[0][0] if titles else "Unknown"
+        creators = self.book.get_metadata("DC", "creator")
+        authors = [c[0] for c in creators] if creators else ["Unknown"]
+
+        # ISBN Extraction Strategy:
+        # 1. Look for 'identifier' tags with scheme="ISBN"
+        # 2. Look for identifiers that look like ISBNs (10 or 13 digits, starting with 978/979)
+        isbn = None
+        identifiers = self.book.get_metadata("DC", "identifier")
+        for value, attrs in identifiers:
+            c_val = clean_isbn_string(value)
+            scheme = ""
+            for k, v in attrs.items():
+                if "scheme" in k.lower():
+                    scheme = v.lower()
+                    break
+            if "isbn" in scheme or (
+                c_val.isdigit() and len(c_val) in [10, 13] and c_val.startswith(("978", "979", ""))
+            ):
+                if len(c_val) in [10, 13]:
+                    isbn = c_val
+                    break
+
+        # Fallback: Check filename for ISBN pattern
+        if not isbn:
+            isbn = extract_isbn_from_filename(self.filename)
+
+        publishers = self.book.get_metadata("DC", "publisher")
+        publisher = publishers[0][0] if publishers else None
+
+        langs = self.book.get_metadata("DC", "language")
+        language = langs[0][0] if langs else None
+
+        pub_dates = self.book.get_metadata("DC", "date")
+        date = pub_dates[0][0] if pub_dates else None
+
+        subjects = []
+        subj_items = self.book.get_metadata("DC", "subject")
+        for s, _ in subj_items:
+            subjects.append(s)
+
+        return BookMetadata(
+            filename=self.filename,
+            title=title,
+            authors=authors,
+            isbn=isbn,
+            publisher=publisher,
+            language=language,
+            date=str(date) if date else None,
+            tags=subjects,
+        )
+
+
+class OpfPackage:
+    """
+    EPUB package metadata read straight from the OPF, without loading any content document.
+    Only the zip central directory, `container.xml` and the OPF `<metadata>` block are read:
+    parsing stops as soon as `</metadata>` is reached.
+    Mirrors the metadata API of ebooklib's EpubBook (`metadata`, `get_metadata`, `add_metadata`,
+    `set_title`...): EpubManager edits it directly in memory-bounded mode, and SurgicalWriter saves it.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.version: Optional[str] = None
+        self.metadata: MetadataDict = {}
+
+        with zipfile.ZipFile(filepath) as archive:
+            self.opf_path = self._find_opf(archive)
+            with archive.open(self.opf_path) as opf:
+                self._parse(opf)
+
+    @staticmethod
+    def _find_opf(archive: zipfile.ZipFile) -> str:
+        """Returns the OPF path declared in META-INF/container.xml."""
+        root = ET.fromstring(archive.read(CONTAINER_PATH))
+        rootfile = root.find(f".//{{{CONTAINER_NS}}}rootfile")
+        if rootfile is None or not rootfile.get("full-path"):
+            raise ValueError("No rootfile declared in container.xml")
+        return posixpath.normpath(rootfile.get("full-path", ""))
+
+    def _parse(self, stream):
+        """Streams the OPF and stores `<metadata>` children the same way ebooklib does."""
+        namespaces: List[str] = []
+        in_metadata = False
+        depth = 0  # Nesting level below <metadata>
+
+        for event, item in ET.iterparse(stream, events=("start-ns", "start", "end")):
+            if event == "start-ns":
+                namespaces.append(item[1])
+            elif event == "start":
+                if in_metadata:
+                    depth += 1
+                elif item.tag == f"{{{OPF_NS}}}package":
+                    self.version = item.get("version")
+                elif item.tag == f"{{{OPF_NS}}}metadata":
+                    in_metadata = True
+                    # ebooklib pre-creates an entry for every namespace in scope
+                    for uri in namespaces:
+                        self.metadata.setdefault(uri, {})
+            elif in_metadata:
+                if depth == 0:
+                    # </metadata>: the manifest and spine are never parsed
+                    break
+                depth -= 1
+                if depth == 0 and item.tag.startswith("{"):
+                    namespace, tag = item.tag[1:].split("}", 1)
+                    self._add(namespace, tag, item.text, dict(item.items()))
+                    item.clear()
+
+    def _add(self, namespace, name, value, attrs):
+        self.metadata.setdefault(namespace, {}).setdefault(name, []).append((value, attrs))
+
+    def get_metadata(self, namespace: str, name: str) -> List[Tuple[Optional[str], Dict[str, str]]]:
+        """Retrieves metadata entries as (value, attributes) pairs."""
+        namespace = NAMESPACES.get(namespace, namespace)
+        return self.metadata.get(namespace, {}).get(name, [])
+
+    def add_metadata(self, namespace: Optional[str], name: str, value, others=None):
+        """Adds a metadata entry (same semantics as ebooklib: `None` files EbookLib's own <meta>)."""
+        namespace = NAMESPACES.get(namespace, namespace) if namespace else namespace
+        self._add(namespace, name, value, others)
+
+    def set_title(self, title: str):
+        self.add_metadata("DC", "title", title)
+
+    def set_language(self, lang: str):
+        self.add_metadata("DC", "language", lang)
+
+    def add_author(self, author: str, file_as=None, role=None, uid="creator"):
+        """Adds a creator, with its EPUB 3 refinements (like ebooklib)."""
+        self.add_metadata("DC", "creator", author, {"id": uid})
+        if file_as:
+            self.add_metadata(
+                None, "meta", file_as, {"refines": "#" + uid, "property": "file-as", "scheme": "marc:relators"}
+            )
+        if role:
+            self.add_metadata(None, "meta", role, {"refines": "#" + uid, "property": "role", "scheme": "marc:relators"})
+
+
+class OpfReader(MetadataReader):
+    """
+    Fast, read-only access to an EPUB's metadata (inspection, search).
+    Use EpubManager when the file has to be modified.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+        self.book = OpfPackage(filepath)
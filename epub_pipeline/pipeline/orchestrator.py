@@ -1,17 +1,31 @@
+import collections
+import itertools
 import os
 import shutil
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import termcolor
 
 from epub_pipeline import config
+from epub_pipeline.pipeline.catalog import LibraryCatalog
 from epub_pipeline.pipeline.cover_manager import CoverManager
 from epub_pipeline.pipeline.drive_uploader import DriveUploader
+from epub_pipeline.pipeline.engine import StagedPipeline, collect_isbns, read_metadata, report_write_peak
 from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.fingerprint import FingerprintIndex
+from epub_pipeline.pipeline.kepub_converter import KepubConversionError
 from epub_pipeline.pipeline.kepub_handler import KepubHandler
-from epub_pipeline.search.book_finder import find_book
+from epub_pipeline.pipeline.state_store import STAGES, StateStore
+from epub_pipeline.pipeline.workspace import Workspace
+from epub_pipeline.search.book_finder import find_book, get_providers
+from epub_pipeline.search.isbn_batch import resolve_isbns
+from epub_pipeline.search.racing import COALESCER
 from epub_pipeline.utils.formatter import Formatter
+from epub_pipeline.utils.library_scanner import LibraryScanner
 from epub_pipeline.utils.logger import Logger
+from epub_pipeline.utils.memory import PeakMemory
 from epub_pipeline.utils.text_utils import sanitize_filename, truncate
 
 
@@ -28,109 +42,414 @@ class PipelineOrchestrator:
         enable_rename=True,
         interactive_fields=False,
         enable_upload=True,
+        jobs=1,
+        prefetch=0,
+        scanner=None,
+        incremental=False,
+        catalog=False,
     ):
         self.auto_save = auto_save
         self.enable_kepub = enable_kepub
         self.enable_rename = enable_rename
         self.interactive_fields = interactive_fields
+        self.jobs = jobs
+        # Number of files extracted and searched ahead while the user answers prompts
+        self.prefetch = prefetch
+        self.scanner = scanner or LibraryScanner()
+        # Incremental mode: per-file stage results are persisted, finished files are skipped
+        self.state = StateStore(config.STATE_DB_PATH) if incremental else None
+        # Library catalog: metadata of the directory read once, by a parallel pre-pass
+        self.catalog = LibraryCatalog(config.CATALOG_DB_PATH) if catalog else None
         self.uploader = DriveUploader(enable_upload)
+        # Providers pre-loaded by the ISBN batch pre-pass (None = fresh providers per lookup)
+        self.providers = None
+        # Duplicate detection (directory runs): fingerprint per path, copies per representative,
+        # output name per delivered representative (copies found after the delivery are linked at once),
+        # reason per representative that ended without delivery, and the copies skipped because of it
+        self.fingerprint_index = None
+        self.fingerprints = {}
+        self.duplicates = {}
+        self.delivered = {}
+        self.undelivered = {}
+        self.skipped_duplicates = {}
+        self._dedupe_lock = threading.Lock()
 
     def process_directory(self, directory):
-        """Batch processes all EPUB files in a given directory."""
+        """
+        Batch processes all EPUB files found (recursively) in a given directory.
+        Files are streamed into the pipeline as soon as they are discovered.
+        """
         if not os.path.exists(directory):
             Logger.error(f"Directory '{directory}' does not exist.")
             return
 
-        files = [f for f in os.listdir(directory) if f.lower().endswith(".epub")]
+        # Local copies may land inside the scanned tree: they must not be processed again
+        files = self.scanner.scan(directory, skip=[DriveUploader.local_output_dir()])
+        first = next(files, None)
 
-        if not files:
+        if first is None:
             Logger.warning(f"No standard .epub files found in '{directory}/'.")
             return
 
-        Logger.info(f"Starting Pipeline on {len(files)} files in '{directory}'...")
+        Logger.info(f"Starting Pipeline in '{directory}'...")
         print("-" * 60)
 
-        for f in files:
-            path = os.path.join(directory, f)
-            try:
-                self.process_file(path)
-            except Exception as e:
-                raise e
-            print("-" * 60)
+        paths = itertools.chain([first], files)
+        if self.catalog:
+            # The catalog pre-pass reads every file's metadata up front (only new or changed files are parsed)
+            paths = list(paths)
+            self._build_catalog(paths, directory)
+
+        if self.state:
+            paths = (path for path in paths if not self._already_done(path))
+
+        if config.DEDUPLICATE:
+            # Files are fingerprinted as they stream in: only the first copy of a book is looked up
+            paths = self._deduplicate(paths)
+
+        if config.BATCH_ISBN_LOOKUP:
+            # ISBNs are resolved in batches, one chunk of files ahead of the lookups
+            paths = self._prefetch_isbns(paths)
+
+        coalesced = COALESCER.stats()["coalesced"]
+        if self.jobs > 1 or self.prefetch > 0:
+            StagedPipeline(self, self.jobs, self.prefetch).run(paths)
+        else:
+            for path in paths:
+                try:
+                    self.process_file(path)
+                except Exception as e:
+                    raise e
+                print("-" * 60)
+
+        coalesced = COALESCER.stats()["coalesced"] - coalesced
+        if coalesced:
+            Logger.verbose(f"{coalesced} search request(s) shared an identical request already in flight.")
+        if self.skipped_duplicates:
+            Logger.warning(
+                f"{len(self.skipped_duplicates)} duplicate(s) not processed: their first copy was not delivered."
+            )
 
     def process_file(self, file_path, forced_isbn=None):
         """
-        Runs the full pipeline securely using a temporary workspace.
+        Runs the full pipeline securely using a temporary copy-on-write workspace.
         Ensures the source file is never modified.
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
-            filename = os.path.basename(file_path)
-            working_path = os.path.join(temp_dir, filename)
+        reason = self._process_file(file_path, forced_isbn)
+        if reason:
+            self._release_duplicates(file_path, reason)
 
-            # Secure Copy
+    def _process_file(self, file_path, forced_isbn=None):
+        """Returns why the file was not delivered, or None once it is."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Secure Workspace (a private copy is only made when something is written)
             try:
-                shutil.copy2(file_path, working_path)
+                workspace = Workspace(file_path, temp_dir)
             except Exception as e:
-                Logger.error(f"Failed to copy file to temp dir: {e}")
-                return
-
-            try:
-                manager = EpubManager(working_path)
-            except Exception:
-                Logger.warning(f"Skipping (No Book): {filename}")
-                return
+                Logger.error(f"Failed to prepare workspace: {e}")
+                return "could not be read"
 
-            meta = manager.get_curated_metadata()
+            # Only the OPF is read here (or the catalog): the full book is loaded if (and when) it has to be written
+            meta = read_metadata(file_path, self.catalog, workspace.path)
             if not meta:
-                Logger.warning(f"Skipping (No Meta): {filename}")
-                return
+                return "could not be read"
 
             if forced_isbn:
                 Logger.info(f"Using Forced ISBN: {forced_isbn}")
                 meta["isbn"] = forced_isbn
 
-            Logger.info(f"Processing: {meta.get('title', 'Unknown')} ({truncate(filename)})")
+            online_data, confidence, strategy = self._search(meta, file_path)
 
-            online_data, confidence, strategy = find_book(meta)
+            decision = self._review(file_path, meta, online_data, confidence, strategy)
+            if decision is None:
+                return "was rejected"
+            approved_data, final_meta = decision
 
-            final_meta = meta
-            current_path = working_path
+            with PeakMemory() as usage:
+                current_path = self._finalize(workspace, approved_data, final_meta)
+            report_write_peak(usage.peak)
+            if not current_path:
+                return "could not be written"
 
-            if online_data:
-                Formatter.print_search_result(online_data, confidence, strategy)
+            # --- 6. Upload ---
+            if not self._deliver(file_path, current_path):
+                return "could not be delivered"
+            return None
 
-                approved_data = None
+    def _build_catalog(self, paths, directory):
+        counts = self.catalog.update(paths, jobs=max(self.jobs, os.cpu_count() or 1), root=directory)
+        Logger.verbose(
+            f"Catalog: {counts['parsed']} parsed, {counts['unchanged']} unchanged, "
+            f"{counts['removed']} removed, {counts['errors']} error(s)"
+        )
 
-                if self.interactive_fields:
-                    # Granular manual review
-                    approved_data = self._review_metadata_changes(meta, online_data)
-                else:
-                    # Automatic or Boolean check
-                    Formatter.print_comparison(meta, online_data)
-                    if self._should_save(confidence):
-                        approved_data = online_data
+    def _prefetch_isbns(self, paths):
+        """
+        Yields the files ISBN_BATCH_SIZE at a time, once the ISBNs of each chunk are resolved
+        in batched requests (for `find_book` to reuse).
+        """
+        paths = iter(paths)
+        while chunk := list(itertools.islice(paths, max(1, config.ISBN_BATCH_SIZE))):
+            if self.catalog:
+                isbns = [(entry[0] or {}).get("isbn") if entry else None for entry in map(self.catalog.lookup, chunk)]
+            else:
+                isbns = collect_isbns(chunk, self.jobs)
+            self.providers = resolve_isbns(isbns, self.providers or get_providers())
+            yield from chunk
 
-                if approved_data:
-                    self._update_metadata(manager, approved_data)
-                    final_meta = self._get_updated_meta_dict(meta, approved_data)
-                elif self.interactive_fields:
-                    Logger.info("No metadata changes selected. Continuing with local metadata.")
-                else:
-                    Logger.warning("Skipping file (Metadata update rejected by user).")
+    def _deduplicate(self, paths):
+        """
+        Yields one representative per group of byte-equivalent books (same spine content), in scan order.
+        Files are hashed a few at a time ahead of the pipeline, so the first book starts right away.
+        A copy is skipped and linked to its representative's result, at once if it was already delivered,
+        otherwise on delivery (if the representative ends without delivery, its copies are reported as
+        not processed, see `_release_duplicates`). In incremental mode, a book already processed by a previous run
+        (under another path) is skipped too.
+        """
+        if not self.fingerprint_index:
+            self.fingerprint_index = FingerprintIndex(config.FINGERPRINT_DB_PATH)
+        workers = max(self.jobs, os.cpu_count() or 1)
+        representatives = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            window = collections.deque()
+            paths = iter(paths)
+            while True:
+                # Decompression and hashing release the GIL: a bounded window is hashed in parallel
+                for path in itertools.islice(paths, 2 * workers - len(window)):
+                    window.append((path, pool.submit(self.fingerprint_index.fingerprint, path)))
+                if not window:
                     return
-            else:
-                Logger.warning("No online match. Using local metadata for pipeline.")
+                path, future = window.popleft()
+                fingerprint = future.result()
+                self.fingerprints[path] = fingerprint
+                if fingerprint is None:
+                    yield path
+                    continue
 
-            # --- 4. Renaming ---
-            if self.enable_rename:
-                current_path = self._handle_renaming(current_path, final_meta)
+                representative = representatives.get(fingerprint)
+                if representative:
+                    Logger.info(
+                        f"Skipping (Duplicate): {truncate(os.path.basename(path))} (same content as {representative})"
+                    )
+                    with self._dedupe_lock:
+                        output_name = self.delivered.get(representative)
+                        reason = self.undelivered.get(representative)
+                        if output_name is None and reason is None:
+                            self.duplicates.setdefault(representative, []).append(path)
+                    if output_name is not None:
+                        self._link_copies(representative, [path], output_name)
+                    elif reason is not None:
+                        self._skip_copies(representative, [path], reason)
+                    continue
+
+                representatives[fingerprint] = path
+                previous = self.state and self.fingerprint_index.processed_copy(fingerprint)
+                if previous and previous[0] != os.path.abspath(path):
+                    Logger.info(
+                        f"Skipping (Duplicate): {truncate(os.path.basename(path))} (already processed as {previous[0]})"
+                    )
+                    self._record(path, output_name=previous[1])
+                    self.state.mark_done(path)
+                    with self._dedupe_lock:
+                        self.delivered[path] = previous[1]
+                    continue
+                yield path
 
-            # --- 5. Conversion ---
-            if self.enable_kepub:
-                current_path = self._handle_conversion(current_path)
+    def _link_duplicates(self, file_path, output_name):
+        """Gives the copies of a delivered book the same result (they are skipped by incremental runs)."""
+        fingerprint = self.fingerprints.get(file_path)
+        if fingerprint:
+            self.fingerprint_index.mark_processed(fingerprint, file_path, output_name)
 
-            # --- 6. Upload ---
-            self.uploader.process_file(current_path)
+        with self._dedupe_lock:
+            self.delivered[file_path] = output_name
+            copies = self.duplicates.pop(file_path, [])
+        if copies:
+            self._link_copies(file_path, copies, output_name)
+
+    def _release_duplicates(self, file_path, reason):
+        """
+        Called when a file ends without being delivered: its queued copies (and the ones found later)
+        are skipped with the reason. They are not marked done, so the next run processes them.
+        """
+        if self.fingerprint_index is None:
+            return
+        with self._dedupe_lock:
+            self.undelivered[file_path] = reason
+            copies = self.duplicates.pop(file_path, [])
+        if copies:
+            self._skip_copies(file_path, copies, reason)
+
+    def _skip_copies(self, file_path, copies, reason):
+        for copy in copies:
+            Logger.warning(
+                f"Duplicate not processed: {truncate(os.path.basename(copy))} "
+                f"(its first copy {truncate(os.path.basename(file_path))} {reason})"
+            )
+        with self._dedupe_lock:
+            self.skipped_duplicates.update(dict.fromkeys(copies, reason))
+
+    def _link_copies(self, file_path, copies, output_name):
+        Logger.verbose(f"Linked {len(copies)} duplicate(s) to {output_name}")
+        if self.state:
+            result = self.state.get(file_path) or {}
+            stages = {stage: result.get(stage) for stage in STAGES if result.get(stage) is not None}
+            for copy in copies:
+                self.state.record(copy, **stages)
+                self.state.mark_done(copy)
+
+    def _already_done(self, file_path):
+        if self.state.is_done(file_path):
+            Logger.verbose(f"Skipping (Unchanged): {file_path}")
+            return True
+        return False
+
+    def _record(self, file_path, **stages):
+        """Persists stage results when running in incremental mode."""
+        if self.state:
+            self.state.record(file_path, **stages)
+
+    def _search(self, meta, file_path):
+        """Search stage: looks the book up online. Safe to run off the main thread."""
+        Logger.info(f"Processing: {meta.get('title', 'Unknown')} ({truncate(os.path.basename(file_path))})")
+        online_data, confidence, strategy = find_book(meta, self.providers)
+        self._record(
+            file_path,
+            search_result={"data": online_data, "confidence": confidence, "strategy": strategy},
+        )
+        return online_data, confidence, strategy
+
+    def _review(self, file_path, meta, online_data, confidence, strategy):
+        """
+        Review stage: shows the match and decides which changes to apply.
+        May prompt the user, so it always runs on the main thread, in file order.
+
+        Returns:
+            tuple: (Approved Data or None, Final Metadata), or None if the file must be skipped.
+        """
+        if not online_data:
+            Logger.warning("No online match. Using local metadata for pipeline.")
+            return None, meta
+
+        Formatter.print_search_result(online_data, confidence, strategy)
+
+        approved_data = None
+
+        if self.interactive_fields:
+            # Granular manual review
+            approved_data = self._review_metadata_changes(meta, online_data)
+        else:
+            # Automatic or Boolean check
+            Formatter.print_comparison(meta, online_data)
+            if self._should_save(confidence):
+                approved_data = online_data
+
+        if approved_data:
+            self._record(file_path, approved_metadata=approved_data)
+            return approved_data, self._get_updated_meta_dict(meta, approved_data)
+        elif self.interactive_fields:
+            Logger.info("No metadata changes selected. Continuing with local metadata.")
+            return None, meta
+        else:
+            Logger.warning("Skipping file (Metadata update rejected by user).")
+            return None
+
+    def _finalize(self, workspace, approved_data, final_meta):
+        """
+        Write stage: applies approved metadata, renames and converts the working copy.
+        Returns the path of the file to upload (None if the book cannot be written).
+        """
+        if self._native_kepub(workspace.path):
+            return self._finalize_kepub(workspace, approved_data, final_meta)
+
+        if approved_data:
+            # Saving rewrites the file in place: it must not share data with the source
+            output_path = workspace.materialize()
+            try:
+                manager = EpubManager(output_path)
+            except Exception:
+                Logger.warning(f"Skipping (No Book): {os.path.basename(output_path)}")
+                return None
+            self._update_metadata(manager, approved_data, output_path)
+
+        current_path = workspace.path
+        if self.enable_rename or self.enable_kepub:
+            # Both create new files next to the working copy
+            current_path = workspace.local()
+
+        # --- 4. Renaming ---
+        if self.enable_rename:
+            current_path = self._handle_renaming(current_path, final_meta)
+
+        # --- 5. Conversion ---
+        if self.enable_kepub:
+            current_path = self._handle_conversion(current_path)
+
+        return current_path
+
+    def _native_kepub(self, path):
+        return self.enable_kepub and config.KEPUB_CONVERTER == "native" and not path.lower().endswith(".kepub.epub")
+
+    def _finalize_kepub(self, workspace, approved_data, final_meta):
+        """
+        Write stage with the native converter: the metadata update and the KEPUB conversion
+        are written in a single pass, straight from the untouched working file.
+        """
+        manager = None
+        if approved_data:
+            try:
+                # Only the metadata is needed: the converter streams the content itself
+                manager = EpubManager(workspace.path, streaming=True)
+            except Exception:
+                Logger.warning(f"Skipping (No Book): {os.path.basename(workspace.path)}")
+                return None
+            self._apply_metadata(manager, approved_data)
+
+        Logger.info("Converting to KEPUB...")
+        kepub_path = KepubHandler.kepub_path(os.path.join(workspace.directory, os.path.basename(workspace.path)))
+        if manager:
+            try:
+                manager.save(kepub_path, kepub=True)
+                Logger.success(f"EPUB saved and converted to KEPUB: {os.path.basename(kepub_path)}")
+                current_path = kepub_path
+            except KepubConversionError as e:
+                Logger.warning(f"Conversion failed ({e}). Using standard EPUB.")
+                current_path = workspace.materialize()
+                manager.save(current_path)
+                Logger.success("EPUB saved.")
+        elif KepubHandler.convert_native(workspace.path, kepub_path):
+            current_path = kepub_path
+        else:
+            Logger.warning("Conversion failed. Using standard EPUB.")
+            current_path = workspace.local()
+
+        if self.enable_rename:
+            current_path = self._handle_renaming(current_path, final_meta)
+        return current_path
+
+    def _deliver(self, file_path, output_path):
+        """Upload stage: sends the final file to Drive (or the local output folder)."""
+        result = self.uploader.process_file(output_path)
+        if result and self.state:
+            self.state.record(
+                file_path,
+                output_name=os.path.basename(output_path),
+                upload_id=result if isinstance(result, str) else None,
+            )
+            self.state.mark_done(file_path)
+        if result:
+            self._link_duplicates(file_path, os.path.basename(output_path))
+        return result
+
+    def _worker_options(self):
+        """Constructor arguments needed to rebuild this orchestrator inside a worker process."""
+        return {
+            "auto_save": self.auto_save,
+            "enable_kepub": self.enable_kepub,
+            "enable_rename": self.enable_rename,
+            "interactive_fields": self.interactive_fields,
+        }
 
     def _should_save(self, confidence):
         if self.auto_save or confidence >= config.CONFIDENCE_THRESHOLD_HIGH:
@@ -222,7 +541,13 @@ class PipelineOrchestrator:
 
         return approved
 
-    def _update_metadata(self, manager, online_data):
+    def _update_metadata(self, manager, online_data, output_path):
+        self._apply_metadata(manager, online_data)
+        manager.save(output_path)
+        Logger.success("EPUB saved.")
+
+    def _apply_metadata(self, manager, online_data):
+        """Applies the approved metadata (and cover) to the manager, without saving."""
         Logger.info("Updating metadata...")
         manager.update_metadata(online_data)
 
@@ -238,9 +563,6 @@ class PipelineOrchestrator:
                     manager.set_cover(processed_img)
                     Logger.success("Cover updated.", indent=4)
 
-        manager.save()
-        Logger.success("EPUB saved.")
-
     def _get_updated_meta_dict(self, original_meta, online_data):
         new_meta = original_meta.copy()
 
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS paths (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    content_hash TEXT PRIMARY KEY,
+    search_result TEXT,
+    approved_metadata TEXT,
+    output_name TEXT,
+    upload_id TEXT,
+    completed_at REAL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Stage columns that can be recorded for a file
+STAGES = ("search_result", "approved_metadata", "output_name", "upload_id")
+
+
+class StateStore:
+    """
+    Persistent per-file pipeline state, used by incremental runs.
+
+    Files are identified by their content hash (so renamed or moved copies are still
+    recognized), with a (path, size, mtime) index in front of it so that unchanged
+    files are looked up without reading them.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """SHA-256 of the file content, read in chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def is_done(self, file_path: str) -> bool:
+        """
+        True if this exact file already went through the whole pipeline.
+        Unchanged files are answered from the (path, size, mtime) index without any read.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT f.completed_at FROM paths p JOIN files f ON f.content_hash = p.content_hash "
+                "WHERE p.path = ? AND p.size = ? AND p.mtime = ?",
+                (os.path.abspath(file_path), st.st_size, st.st_mtime),
+            ).fetchone()
+        if row:
+            return row[0] is not None
+
+        # Unknown or touched path: the content may still have been processed elsewhere
+        content_hash = self._register(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completed_at FROM files WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return bool(row and row[0] is not None)
+
+    def record(self, file_path: str, **stages):
+        """
+        Records the outcome of one or more stages for a file.
+        Values are stored as JSON (except plain strings).
+        """
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage(s): {', '.join(sorted(unknown))}")
+
+        content_hash = self._register(file_path)
+        values = {
+            k: v if isinstance(v, str) or v is None else json.dumps(v, ensure_ascii=False) for k, v in stages.items()
+        }
+        assignments = "".join(f", {k} = excluded.{k}" for k in values)
+        columns = "".join(f", {k}" for k in values)
+        placeholders = "".join(", ?" for _ in values)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO files (content_hash, updated_at{columns}) VALUES (?, ?{placeholders}) "
+                f"ON CONFLICT(content_hash) DO UPDATE SET updated_at = excluded.updated_at{assignments}",
+                (content_hash, time.time(), *values.values()),
+            )
+
+    def mark_done(self, file_path: str):
+        """Flags a file as fully processed: later incremental runs will skip it."""
+        content_hash = self._register(file_path)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO files (content_hash, updated_at, completed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET updated_at = excluded.updated_at, "
+                "completed_at = excluded.completed_at",
+                (content_hash, now, now),
+            )
+
+    def get(self, file_path: str) -> Optional[dict]:
+        """Returns the recorded stages for a file (JSON values decoded), or None if unknown."""
+        content_hash = self._register(file_path)
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM files WHERE content_hash = ?", (content_hash,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            columns = [d[0] for d in cursor.description]
+
+        state = dict(zip(columns, row))
+        for key in ("search_result", "approved_metadata"):
+            if state[key]:
+                state[key] = json.loads(state[key])
+        return state
+
+    def _register(self, file_path: str) -> str:
+        """Returns the content hash of a file, hashing it only if its (path, size, mtime) changed."""
+        abs_path = os.path.abspath(file_path)
+        st = os.stat(abs_path)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM paths WHERE path = ? AND size = ? AND mtime = ?",
+                (abs_path, st.st_size, st.st_mtime),
+            ).fetchone()
+        if row:
+            return row[0]
+
+        content_hash = self.hash_file(abs_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paths (path, size, mtime, content_hash) VALUES (?, ?, ?, ?)",
+                (abs_path, st.st_size, st.st_mtime, content_hash),
+            )
+        return content_hash
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,98 @@
+import os
+import shutil
+
+from epub_pipeline.utils.logger import Logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+# Linux ioctl cloning a whole file (btrfs, XFS, bcachefs...): _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+class Workspace:
+    """
+    Copy-on-write view of a source file inside a temporary directory.
+
+    Instead of copying the source up front, the workspace tries (in order):
+    1. Reflink: an instant, private clone sharing blocks with the source (CoW filesystems).
+    2. Hardlink: same inode as the source. Fine for reading and renaming, but it must be
+       turned into a private copy before any in-place write (see `materialize`).
+    3. Reference: nothing is created; reads go to the source itself (e.g. other filesystem).
+    A full copy is only made when a write actually requires it.
+    """
+
+    def __init__(self, source_path, directory):
+        self.source_path = source_path
+        self.directory = directory
+        self.local_path = os.path.join(directory, os.path.basename(source_path))
+
+        if self._reflink(source_path, self.local_path):
+            self.mode = "reflink"
+        elif self._hardlink(source_path, self.local_path):
+            self.mode = "hardlink"
+        else:
+            self.mode = "reference"
+        Logger.verbose(f"Workspace mode: {self.mode}")
+
+    @property
+    def path(self):
+        """Current path of the working file (read-only unless materialized)."""
+        return self.source_path if self.mode == "reference" else self.local_path
+
+    def local(self):
+        """
+        Ensures the working file lives inside the workspace directory.
+        Required before renaming it or creating sibling files (e.g. conversion output).
+        """
+        if self.mode == "reference":
+            self._copy(self.source_path, self.local_path)
+        return self.local_path
+
+    def materialize(self):
+        """
+        Ensures the working file is a private copy that can be modified in place.
+        Must be called before any write to the file; the source is never touched.
+        """
+        if self.mode == "hardlink":
+            # Write the copy aside, then swap: replacing the link leaves the source inode alone
+            tmp_path = self.local_path + ".tmp"
+            self._copy(self.local_path, tmp_path)
+            os.replace(tmp_path, self.local_path)
+        elif self.mode == "reference":
+            self._copy(self.source_path, self.local_path)
+        return self.local_path
+
+    def _copy(self, src, dst):
+        """Private copy of `src`, cloned when possible, fully copied otherwise."""
+        if self._reflink(src, dst):
+            self.mode = "reflink"
+        else:
+            shutil.copy2(src, dst)
+            self.mode = "copy"
+
+    @staticmethod
+    def _reflink(src, dst):
+        if fcntl is None or not hasattr(fcntl, "ioctl"):
+            return False
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return True
+        except OSError:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            return False
+
+    @staticmethod
+    def _hardlink(src, dst):
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            return False
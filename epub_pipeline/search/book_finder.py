@@ -1,64 +1,117 @@
-from typing import List, Optional, Tuple
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
 
 from epub_pipeline import config
 from epub_pipeline.models import BookMetadata, SearchResult
 from epub_pipeline.search.confidence import ConfidenceScorer
+from epub_pipeline.search.isbn_batch import isbn_variants
+from epub_pipeline.search.local_index import get_local_index
 from epub_pipeline.search.provider import MetadataProvider
 from epub_pipeline.search.providers.google import GoogleBooksProvider
+from epub_pipeline.search.providers.local import LocalIndexProvider
 from epub_pipeline.search.providers.openlibrary import OpenLibraryProvider
-from epub_pipeline.utils.isbn_utils import convert_isbn10_to_13
+from epub_pipeline.search.racing import first_accepted, hedged_call
+from epub_pipeline.search.response_cache import ResponseCache, get_shared_cache
+from epub_pipeline.utils.http import get_session
 from epub_pipeline.utils.logger import Logger
 
 
-def get_providers() -> List[MetadataProvider]:
-    """Initializes the metadata providers based on configuration."""
+def get_providers(
+    cache: Optional[ResponseCache] = None, session: Optional[requests.Session] = None
+) -> List[MetadataProvider]:
+    """
+    Initializes the metadata providers based on configuration.
+    Args:
+        cache: Response cache to use (default: the shared cache configured by CACHE_MODE).
+        session: HTTP session shared by all providers (default: the process-wide pooled session).
+    """
+    if cache is None:
+        cache = get_shared_cache()
+    if session is None:
+        session = get_session()
+
     providers: List[MetadataProvider] = []
+    if config.API_SOURCE in ["all", "local"]:
+        # Offline answers first: the network is only used for the books the local index misses
+        index = get_local_index()
+        if index:
+            providers.append(LocalIndexProvider(index, cache=cache, session=session))
+        elif config.API_SOURCE == "local":
+            Logger.warning(f"No local index at {config.LOCAL_INDEX_PATH} (see python -m tools.import_openlibrary)")
     if config.API_SOURCE in ["all", "google"]:
-        providers.append(GoogleBooksProvider())
+        providers.append(GoogleBooksProvider(cache=cache, session=session))
     if config.API_SOURCE in ["all", "openlibrary"]:
-        providers.append(OpenLibraryProvider())
+        providers.append(OpenLibraryProvider(cache=cache, session=session))
     return providers
 
 
-def find_book(meta: BookMetadata) -> Tuple[Optional[SearchResult], float, str]:
+def find_book(
+    meta: BookMetadata, providers: Optional[List[MetadataProvider]] = None
+) -> Tuple[Optional[SearchResult], float, str]:
+    """
+    Synchronous entry point: runs `find_book_async` on a private event loop.
+    See `find_book_async` for the search strategy.
+    """
+    return asyncio.run(find_book_async(meta, providers))
+
+
+async def find_book_async(
+    meta: BookMetadata, providers: Optional[List[MetadataProvider]] = None
+) -> Tuple[Optional[SearchResult], float, str]:
     """
     Core logic for finding a book online using a 'Waterfall' strategy.
 
     1. ISBN Strategy: High confidence, fast. Tries ISBN-13 and ISBN-10.
+       All providers are queried at once, each one trying the ISBN-13 only if the ISBN-10 missed;
+       the provider priority still decides which answer wins, and slower requests not sent yet
+       are dropped as soon as the winner is known.
     2. Text Relaxation Strategy: Used if ISBN fails. Tries progressively looser queries:
        - Full Context (Title + Author + Publisher + Year)
        - No Publisher
        - No Year
        - Basic (Title + Author)
+       With config.SPECULATIVE_SEARCH, all the distinct queries are sent at once;
+       the result (and strategy name) is the one the sequential waterfall would return.
+
+    Args:
+        providers: Providers to query, in priority order (default: `get_providers()`).
+            Directory runs pass providers pre-loaded with batched ISBN answers.
 
     Returns:
-        tuple: (Best Match Data, Confidence Score, Strategy Name, Total Hits)
+        tuple: (Best Match Data, Confidence Score, Strategy Name)
     """
-    providers = get_providers()
+    if providers is None:
+        providers = get_providers()
 
     # --- 1. ISBN Strategy (Priority 1) ---
     # ISBNs are unique identifiers, so if we match one, confidence is naturally high (90+).
     isbn = meta.get("isbn")
     if isbn:
         Logger.verbose(f"Strategy: ISBN ({isbn})")
-        variants = [isbn]
-        # Always try to generate the ISBN-13 equivalent for better hit rates
-        if len(isbn) == 10:
-            v13 = convert_isbn10_to_13(isbn)
-            if v13:
-                variants.append(v13)
-
-        for provider in providers:
+        variants = isbn_variants(isbn)
+
+        async def lookup(provider):
+            # Variants one after another: the second one is only sent if the first one missed
             for v_isbn in variants:
-                data, total = provider.get_by_isbn(v_isbn)
+                data, total = await hedged_call(f"{provider.name} ISBN", provider.get_by_isbn, v_isbn)
                 Logger.verbose(f"Hits: {total}")
                 if data:
-                    conf, reasons = ConfidenceScorer.calculate("ISBN", meta, data, total)
-                    for r in reasons:
-                        Logger.verbose(f"   - {r}")
-                    Logger.full_json(data)
-                    return data, conf, f"ISBN ({provider.name})"
+                    return data, total
             Logger.verbose(f"{provider.name}: ISBN not found.")
+            return None, 0
+
+        # Providers race each other, their priority decides the winner
+        index, result = await first_accepted([lookup(provider) for provider in providers], lambda i, r: bool(r[0]))
+        if index is not None:
+            provider = providers[index]
+            data, total = result
+            conf, reasons = ConfidenceScorer.calculate("ISBN", meta, data, total)
+            for r in reasons:
+                Logger.verbose(f"   - {r}")
+            Logger.full_json(data)
+            return data, conf, f"ISBN ({provider.name})"
 
     # --- 2. Text Relaxation Strategy (Priority 2) ---
     # If ISBN fails, we fall back to text search.
@@ -75,27 +128,93 @@ def find_book(meta: BookMetadata) -> Tuple[Optional[SearchResult], float, str]:
         {"name": "Basic", "pub": False, "year": False},
     ]
 
-    for provider in providers:
-        for attempt in attempts:
+    # Sequential order of the waterfall: providers by priority, then attempts from strict to loose
+    plan = [(provider, attempt) for provider in providers for attempt in attempts]
+    matches: Dict[int, Tuple[SearchResult, float, List[str]]] = {}
+
+    def accept_text(index, result):
+        """Keeps the best candidate of an attempt when it beats CONFIDENCE_THRESHOLD_LOW."""
+        candidates, total = result
+        Logger.verbose(f"Hits: {total}")
+        if not candidates:
+            return False
+
+        data, conf, reasons = pick_best(meta, candidates, total)
+        # Early exit if we find a decent match (> 40%)
+        if conf > config.CONFIDENCE_THRESHOLD_LOW:
+            matches[index] = (data, conf, reasons)
+            return True
+        Logger.verbose(f"Low confidence ({conf}%). Continuing...")
+        return False
+
+    match: Optional[int] = None
+    if config.SPECULATIVE_SEARCH:
+        match = await _speculative_waterfall(meta, plan, accept_text)
+    else:
+        for i, (provider, attempt) in enumerate(plan):
             Logger.verbose(f"{provider.name} Trying ({attempt['name']})")
+            result = await hedged_call(f"{provider.name} Text", provider.search_candidates, meta, attempt)
+            if accept_text(i, result):
+                match = i
+                break
+
+    if match is None:
+        return None, 0, "None"
+
+    data, conf, reasons = matches[match]
+    provider, attempt = plan[match]
+    for r in reasons:
+        Logger.verbose(f"   - {r}")
+    Logger.full_json(data)
+    return data, conf, f"Text {provider.name} ({attempt['name']})"
+
 
-            data, total = provider.search_by_text(meta, attempt)
-            Logger.verbose(f"Hits: {total}")
-
-            if data:
-                conf, reasons = ConfidenceScorer.calculate("Text", meta, data, total)
-
-                # Early exit if we find a decent match (> 40%)
-                if conf > config.CONFIDENCE_THRESHOLD_LOW:
-                    for r in reasons:
-                        Logger.verbose(f"   - {r}")
-                    Logger.full_json(data)
-                    return (
-                        data,
-                        conf,
-                        f"Text {provider.name} ({attempt['name']})",
-                    )
-                else:
-                    Logger.verbose(f"Low confidence ({conf}%). Continuing...")
-
-    return None, 0, "None"
+async def _speculative_waterfall(
+    meta: BookMetadata, plan: List[Tuple[MetadataProvider, dict]], accept: Callable[[int, Any], bool]
+) -> Optional[int]:
+    """
+    Sends every distinct request of the text waterfall at once (attempts sending the same request,
+    e.g. "No year" and "Basic", share one call), then accepts the results in waterfall order:
+    the winner is the one the sequential waterfall would pick. Slower requests are cancelled
+    (dropped if not sent yet).
+    Returns the index of the accepted attempt in `plan`, or None.
+    """
+    shared: Dict[Any, asyncio.Future] = {}
+    calls = []
+    for i, (provider, attempt) in enumerate(plan):
+        query = provider.text_query(meta, attempt)
+        key = (id(provider), query if query is not None else i)
+        if key not in shared:
+            shared[key] = asyncio.ensure_future(
+                hedged_call(f"{provider.name} Text", provider.search_candidates, meta, attempt)
+            )
+        calls.append(shared[key])
+    Logger.verbose(f"Speculative search: {len(shared)} distinct queries for {len(plan)} attempts")
+
+    def accept_in_order(index, result):
+        provider, attempt = plan[index]
+        Logger.verbose(f"{provider.name} Trying ({attempt['name']})")
+        return accept(index, result)
+
+    index, _ = await first_accepted(calls, accept_in_order)
+    return index
+
+
+def pick_best(meta: BookMetadata, candidates: List[SearchResult], total: int) -> Tuple[SearchResult, float, List[str]]:
+    """
+    Scores all the candidates of a text query in one pass and returns the best one
+    (the provider's order breaks ties): (SearchResult, confidence, reasons).
+    """
+    scored = ConfidenceScorer.calculate_batch("Text", meta, candidates, total)
+    best = max(range(len(scored)), key=lambda i: scored[i][0])
+
+    if config.VERBOSE and len(candidates) > 1:
+        for i, (candidate, (conf, reasons)) in enumerate(zip(candidates, scored)):
+            marker = "*" if i == best else " "
+            authors = ", ".join(candidate.get("authors") or [])
+            Logger.verbose(f" {marker} Candidate {i + 1}: {candidate.get('title')} / {authors} ({conf}%)")
+            if i != best:
+                Logger.verbose(f"     {'; '.join(r for r in reasons if r)}")
+
+    conf, reasons = scored[best]
+    return candidates[best], conf, reasons
@@ -1,4 +1,4 @@
-from epub_pipeline.utils.text_utils import get_similarity
+from epub_pipeline.utils.similarity import best_name_similarity, score_batch
 
 
 class ConfidenceScorer:
@@ -8,47 +8,58 @@ class ConfidenceScorer:
 
     The score is based on:
     1. Strategy used (ISBN matches start high).
-    2. Text similarity (Levenshtein ratio) for Title and Author.
+    2. Text similarity (Indel ratio, see utils.similarity) for Title and Author.
     3. Result uniqueness (penalizes common terms with thousands of hits).
     """
 
     @staticmethod
     def calculate(search_type, local_meta, remote_meta, total_results):
-        score = 0
-        reasons = []
+        return ConfidenceScorer.calculate_batch(search_type, local_meta, [remote_meta], total_results)[0]
+
+    @staticmethod
+    def calculate_batch(search_type, local_meta, candidates, total_results):
+        """
+        Scores several remote results against the same local metadata, in one pass:
+        the local title and authors are normalized (and compiled) once for all candidates.
+        Returns a (score, reasons) tuple per candidate, in order.
+        """
         is_isbn = search_type == "ISBN"
+        title_sims = score_batch(local_meta.get("title", ""), [c.get("title", "") for c in candidates])
+        local_authors = local_meta.get("authors", [])
+
+        results = []
+        for remote_meta, title_sim in zip(candidates, title_sims):
+            score = 0
+            reasons = []
+
+            # 1. Base Score (Strategy)
+            base_score, base_reason = ConfidenceScorer._get_base_score(search_type)
+            score += base_score
+            reasons.append(base_reason)
+
+            # 2. Title Similarity
+            title_score, title_reason = ConfidenceScorer._score_title(title_sim, is_isbn=is_isbn)
+            score += title_score
+            reasons.append(title_reason)
+
+            # 3. Author Similarity
+            author_score, author_reason = ConfidenceScorer._score_author(
+                local_authors,
+                remote_meta.get("authors", []),
+                is_isbn=is_isbn,
+            )
+            score += author_score
+            reasons.append(author_reason)
+
+            # 4. Uniqueness / Ambiguity
+            if not is_isbn:
+                uniqueness_score, uniqueness_reason = ConfidenceScorer._score_uniqueness(total_results)
+                score += uniqueness_score
+                reasons.append(uniqueness_reason)
 
-        # 1. Base Score (Strategy)
-        base_score, base_reason = ConfidenceScorer._get_base_score(search_type)
-        score += base_score
-        reasons.append(base_reason)
-
-        # 2. Title Similarity
-        title_score, title_reason = ConfidenceScorer._score_title(
-            local_meta.get("title", ""),
-            remote_meta.get("title", ""),
-            is_isbn=is_isbn,
-        )
-        score += title_score
-        reasons.append(title_reason)
-
-        # 3. Author Similarity
-        author_score, author_reason = ConfidenceScorer._score_author(
-            local_meta.get("authors", []),
-            remote_meta.get("authors", []),
-            is_isbn=is_isbn,
-        )
-        score += author_score
-        reasons.append(author_reason)
-
-        # 4. Uniqueness / Ambiguity
-        if not is_isbn:
-            uniqueness_score, uniqueness_reason = ConfidenceScorer._score_uniqueness(total_results)
-            score += uniqueness_score
-            reasons.append(uniqueness_reason)
-
-        # Clamp between 0 and 100
-        return max(0, min(100, score)), reasons
+            # Clamp between 0 and 100
+            results.append((max(0, min(100, score)), reasons))
+        return results
 
     @staticmethod
     def _get_base_score(search_type):
@@ -57,8 +68,7 @@ class ConfidenceScorer:
         return 0, "Matched via Text Search (0)"
 
     @staticmethod
-    def _score_title(local, remote, is_isbn):
-        sim = get_similarity(local, remote)
+    def _score_title(sim, is_isbn):
         if is_isbn:
             # Even with ISBN, if title is completely different, it's suspicious (bad metadata on provider side)
             if sim < 0.2:
@@ -77,13 +87,8 @@ class ConfidenceScorer:
         if not local_list:
             local_list = [""]
 
-        best_sim = 0.0
-        # Compare every local author against every remote author and find the BEST single match
-        for l_auth in local_list:
-            for r_auth in remote_list:
-                s = get_similarity(l_auth, r_auth)
-                if s > best_sim:
-                    best_sim = s
+        # Best single match between any local and any remote author (word order ignored: "Herbert, Frank")
+        best_sim, _, _ = best_name_similarity(local_list, remote_list)
 
         if is_isbn:
             # Even with ISBN, if author is completely different, it's suspicious (bad metadata on provider side)
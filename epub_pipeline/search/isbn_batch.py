@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from epub_pipeline.models import BookMetadata, SearchResult
+from epub_pipeline.search.provider import MetadataProvider
+from epub_pipeline.utils.isbn_utils import convert_isbn10_to_13
+from epub_pipeline.utils.logger import Logger
+
+
+def isbn_variants(isbn: str) -> List[str]:
+    """ISBNs looked up for a book: the ISBN itself, plus its ISBN-13 equivalent for ISBN-10s."""
+    variants = [isbn]
+    # Always try to generate the ISBN-13 equivalent for better hit rates
+    if len(isbn) == 10:
+        v13 = convert_isbn10_to_13(isbn)
+        if v13:
+            variants.append(v13)
+    return variants
+
+
+class PrefetchedProvider(MetadataProvider):
+    """
+    Wraps a provider so that ISBN lookups are answered from a pre-resolved table.
+    ISBNs missing from the table (and text searches) go to the wrapped provider.
+    """
+
+    def __init__(self, provider: MetadataProvider, answers: Dict[str, Tuple[Optional[SearchResult], int]]):
+        super().__init__(cache=provider.cache, session=provider.session)
+        self.provider = provider
+        self.answers = answers
+        self.RATE_KEY = provider.RATE_KEY
+        self.BATCH_ISBNS = provider.BATCH_ISBNS
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    def get_by_isbn(self, isbn):
+        answer = self.answers.get(isbn)
+        if answer is not None:
+            return answer
+        return self.provider.get_by_isbn(isbn)
+
+    def get_by_isbns(self, isbns):
+        return self.provider.get_by_isbns(isbns)
+
+    def search_by_text(self, meta: BookMetadata, context: dict):
+        return self.provider.search_by_text(meta, context)
+
+    def search_candidates(self, meta: BookMetadata, context: dict):
+        return self.provider.search_candidates(meta, context)
+
+    def text_query(self, meta: BookMetadata, context: dict):
+        return self.provider.text_query(meta, context)
+
+
+def resolve_isbns(isbns: Iterable[str], providers: List[MetadataProvider]) -> List[MetadataProvider]:
+    """
+    Batch pre-pass: resolves the ISBNs (and their variants) with every provider that has a
+    multi-key endpoint, and returns providers answering `get_by_isbn` from these results.
+    The other providers are returned as is (their lookups stay lazy, in `find_book`).
+    Providers returned by a previous call are reused: their table is extended.
+    """
+    wanted = sorted({variant for isbn in isbns if isbn for variant in isbn_variants(isbn)})
+    if not wanted or not any(provider.BATCH_ISBNS for provider in providers):
+        return providers
+
+    Logger.info(f"Resolving {len(wanted)} ISBNs in batch...")
+    prefetched: List[MetadataProvider] = []
+    for provider in providers:
+        if not provider.BATCH_ISBNS:
+            prefetched.append(provider)
+            continue
+        if isinstance(provider, PrefetchedProvider):
+            answers = provider.provider.get_by_isbns(wanted)
+            provider.answers.update(answers)
+        else:
+            answers = provider.get_by_isbns(wanted)
+            provider = PrefetchedProvider(provider, answers)
+        found = sum(1 for data, _ in answers.values() if data)
+        Logger.verbose(f"{provider.name}: {found}/{len(wanted)} ISBNs found.")
+        prefetched.append(provider)
+    return prefetched
@@ -0,0 +1,447 @@
+import gzip
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from epub_pipeline import config
+from epub_pipeline.models import ImageLinks, SearchResult
+from epub_pipeline.utils.isbn_utils import clean_isbn_string, convert_isbn10_to_13
+from epub_pipeline.utils.similarity import name_similarity, normalize, score_batch
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (key TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS works (
+    key TEXT PRIMARY KEY,
+    title TEXT,
+    authors TEXT,
+    subjects TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS editions (
+    key TEXT PRIMARY KEY,
+    work TEXT,
+    title TEXT,
+    authors TEXT,
+    publisher TEXT,
+    date TEXT,
+    language TEXT,
+    cover INTEGER,
+    description TEXT,
+    isbns TEXT
+);
+CREATE TABLE IF NOT EXISTS isbns (isbn TEXT PRIMARY KEY, edition TEXT NOT NULL) WITHOUT ROWID;
+
+-- Text search: one document per distinct normalized (title, first author), the editions sharing it,
+-- its trigrams, and the number of documents per trigram (rare trigrams select the candidates)
+CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, title TEXT, author TEXT, UNIQUE (title, author));
+CREATE TABLE IF NOT EXISTS doc_editions (doc INTEGER, edition TEXT, PRIMARY KEY (doc, edition)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS grams (gram TEXT, doc INTEGER, PRIMARY KEY (gram, doc)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS gram_counts (gram TEXT PRIMARY KEY, docs INTEGER) WITHOUT ROWID;
+"""
+
+# Rows written per transaction while importing
+BATCH_SIZE = 5000
+# Candidates of a fuzzy query are selected by its rarest trigrams (at least MIN_QUERY_GRAMS of them),
+# up to MAX_POSTINGS index entries read, and the CANDIDATE_POOL sharing the most trigrams are scored
+MIN_QUERY_GRAMS = 4
+MAX_POSTINGS = 20000
+CANDIDATE_POOL = 200
+# Below this title similarity, a document is not a plausible match (not returned, not counted in the hits)
+MIN_TITLE_SIMILARITY = 0.6
+
+_WORD = re.compile(r"\w+")
+_YEAR = re.compile(r"\b(\d{4})\b")
+_ISBN_10 = re.compile(r"^\d{9}[\dX]$")
+_ISBN_13 = re.compile(r"^\d{13}$")
+
+COVER_URL = "https://covers.openlibrary.org/b/id/{}-M.jpg"
+
+
+def index_text(text: Optional[str]) -> str:
+    """Normalized words of a title or name, without punctuation ("Dune: Messiah!" -> "dune messiah")."""
+    return " ".join(_WORD.findall(normalize(text))) if text else ""
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of normalized text, padded so that word starts weigh more."""
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def read_dump(path: str) -> Iterator[Optional[dict]]:
+    """
+    Streams the records of an OpenLibrary dump, gzipped or not.
+    Accepts the official layout (type, key, revision, last_modified, JSON separated by tabs) and plain JSONL.
+    Yields None for unreadable lines.
+    """
+    opener: Callable = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            # JSON strings never contain raw tabs: the record is always the last field
+            try:
+                record = json.loads(line.rsplit("\t", 1)[-1])
+            except ValueError:
+                yield None
+                continue
+            yield record if isinstance(record, dict) else None
+
+
+def _text(value) -> str:
+    """OpenLibrary text fields are either plain strings or {"type": "/type/text", "value": ...}."""
+    if isinstance(value, dict):
+        value = value.get("value")
+    return value if isinstance(value, str) else ""
+
+
+def _author_keys(refs) -> List[str]:
+    """Author keys of an edition ([{"key": ...}]) or a work ([{"author": {"key": ...}}])."""
+    keys = []
+    for ref in refs or []:
+        if isinstance(ref, dict):
+            ref = ref.get("author", ref)
+            if isinstance(ref, dict) and ref.get("key"):
+                keys.append(ref["key"])
+    return keys
+
+
+def normalize_isbn(isbn: str) -> Optional[str]:
+    """ISBN-13 form of an ISBN-10 or ISBN-13 (the index key), None if it is not shaped like one."""
+    isbn = clean_isbn_string(isbn).replace(" ", "")
+    if _ISBN_13.match(isbn):
+        return isbn
+    if _ISBN_10.match(isbn):
+        return convert_isbn10_to_13(isbn)
+    return None
+
+
+class LocalIndex:
+    """
+    Compact on-disk index of OpenLibrary data dumps (editions, works, authors), for offline lookups.
+
+    - ISBN lookups are primary key reads (ISBN-10s are stored as their ISBN-13).
+    - Text searches go through a trigram index of the normalized title and first author,
+      and the candidates are ranked with the confidence scorer's similarity functions.
+
+    Dumps are streamed into the database in constant memory; `build_text_index` is run once
+    all the dumps are imported (authors may come after the editions naming them).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    # --- Import ---
+
+    def import_dump(self, path: str, progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+        """
+        Imports the editions, works and authors of a dump (other record types are ignored).
+        Records already in the index are replaced. `progress` is called with the number of lines read.
+        Returns counts: {"editions", "works", "authors", "skipped"}.
+        """
+        counts = {"editions": 0, "works": 0, "authors": 0, "skipped": 0}
+        batch: Dict[str, list] = {"editions": [], "works": [], "authors": [], "isbns": []}
+        for lines, record in enumerate(read_dump(path), start=1):
+            kind = self._add(record, batch) if record else None
+            counts[kind or "skipped"] += 1
+            if lines % BATCH_SIZE == 0:
+                self._write(batch)
+                if progress:
+                    progress(lines)
+        self._write(batch)
+        return counts
+
+    @staticmethod
+    def _add(record: dict, batch: Dict[str, list]) -> Optional[str]:
+        """Adds the row(s) of a record to the pending batch. Returns its table, or None if not imported."""
+        kind = record.get("type")
+        kind = kind.get("key") if isinstance(kind, dict) else None
+        key = record.get("key")
+        if not key:
+            return None
+
+        if kind == "/type/author":
+            batch["authors"].append((key, record.get("name") or record.get("personal_name")))
+            return "authors"
+
+        if kind == "/type/work":
+            subjects = [s for s in record.get("subjects", []) if isinstance(s, str)][:5]
+            batch["works"].append(
+                (
+                    key,
+                    record.get("title"),
+                    json.dumps(_author_keys(record.get("authors"))),
+                    json.dumps(subjects, ensure_ascii=False),
+                    _text(record.get("description")) or None,
+                )
+            )
+            return "works"
+
+        if kind == "/type/edition":
+            isbns = [clean_isbn_string(i) for i in record.get("isbn_13", []) + record.get("isbn_10", [])]
+            isbns = [i for i in isbns if normalize_isbn(i)]
+            works = _author_keys(record.get("works"))  # Same shape as edition authors: [{"key": ...}]
+            languages = [lang.get("key", "").rsplit("/", 1)[-1] for lang in record.get("languages", [])]
+            covers = [c for c in record.get("covers", []) if isinstance(c, int) and c > 0]
+            title = record.get("title")
+            if title and record.get("subtitle"):
+                title = f"{title}: {record['subtitle']}"
+            batch["editions"].append(
+                (
+                    key,
+                    works[0] if works else None,
+                    title,
+                    json.dumps(_author_keys(record.get("authors"))),
+                    (record.get("publishers") or [None])[0],
+                    record.get("publish_date"),
+                    languages[0] if languages else None,
+                    covers[0] if covers else None,
+                    _text(record.get("description")) or None,
+                    json.dumps(isbns),
+                )
+            )
+            batch["isbns"].extend((normalize_isbn(isbn), key) for isbn in isbns)
+            return "editions"
+
+        return None
+
+    def _write(self, batch: Dict[str, list]):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO authors VALUES (?, ?)", batch["authors"])
+            self._conn.executemany("INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?, ?)", batch["works"])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO editions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch["editions"]
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO isbns VALUES (?, ?)", batch["isbns"])
+        for rows in batch.values():
+            rows.clear()
+
+    def build_text_index(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        (Re)builds the trigram index from the imported editions, streaming them in constant memory.
+        Editions without authors of their own take the authors of their work.
+        Returns the number of documents (distinct normalized title and first author).
+        """
+        with self._lock, self._conn:
+            self._conn.executescript(
+                "DELETE FROM grams; DELETE FROM gram_counts; DELETE FROM doc_editions; DELETE FROM docs;"
+            )
+
+        # A second connection reads the editions while this one writes the documents
+        reader = connect(self.db_path)
+        try:
+            rows = reader.execute(
+                "SELECT e.key, e.title, e.authors, w.authors FROM editions e LEFT JOIN works w ON w.key = e.work"
+            )
+            pending: List[Tuple[str, str, str]] = []
+            for count, (key, title, authors, work_authors) in enumerate(rows, start=1):
+                title = index_text(title)
+                if not title:
+                    continue
+                author_keys = json.loads(authors or "[]") or json.loads(work_authors or "[]")
+                author = ""
+                if author_keys:
+                    row = reader.execute("SELECT name FROM authors WHERE key = ?", (author_keys[0],)).fetchone()
+                    author = index_text(row[0]) if row else ""
+                pending.append((title, author, key))
+                if len(pending) >= BATCH_SIZE:
+                    self._write_docs(pending)
+                    if progress:
+                        progress(count)
+            self._write_docs(pending)
+        finally:
+            reader.close()
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO gram_counts SELECT gram, COUNT(*) FROM grams GROUP BY gram")
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _write_docs(self, pending: List[Tuple[str, str, str]]):
+        with self._lock, self._conn:
+            for title, author, edition in pending:
+                cursor = self._conn.execute("INSERT OR IGNORE INTO docs (title, author) VALUES (?, ?)", (title, author))
+                if cursor.rowcount:
+                    doc = cursor.lastrowid
+                    self._conn.executemany(
+                        "INSERT INTO grams VALUES (?, ?)", [(gram, doc) for gram in trigrams(title) | trigrams(author)]
+                    )
+                else:
+                    doc = self._conn.execute(
+                        "SELECT id FROM docs WHERE title = ? AND author = ?", (title, author)
+                    ).fetchone()[0]
+                self._conn.execute("INSERT OR IGNORE INTO doc_editions VALUES (?, ?)", (doc, edition))
+        pending.clear()
+
+    # --- Lookups ---
+
+    def get_by_isbn(self, isbn: str) -> Optional[SearchResult]:
+        """Edition with this ISBN (10 or 13), or None."""
+        key = normalize_isbn(isbn or "")
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.* FROM isbns i JOIN editions e ON e.key = i.edition WHERE i.isbn = ?", (key,)
+            ).fetchone()
+            return self._result(row) if row else None
+
+    def search(
+        self,
+        title: str,
+        author: str = "",
+        limit: int = 5,
+        publisher: Optional[str] = None,
+        year: Optional[str] = None,
+    ) -> Tuple[List[SearchResult], int]:
+        """
+        Fuzzy text search: the best `limit` editions for this title and author, best first.
+        `publisher` and `year` filter the editions, like the loose filters of a remote query.
+        Returns (results, number of plausible matches).
+        """
+        q_title, q_author = index_text(title), index_text(author)
+        if not q_title:
+            return [], 0
+
+        with self._lock:
+            docs = self._candidates(q_title, q_author)
+
+        title_sims = score_batch(q_title, [doc[1] for doc in docs])
+        scored = []
+        for (doc, _, doc_author), title_sim in zip(docs, title_sims):
+            if title_sim < MIN_TITLE_SIMILARITY:
+                continue
+            score = title_sim
+            if q_author:
+                score = 0.7 * title_sim + 0.3 * name_similarity(q_author, doc_author)
+            scored.append((score, doc))
+        scored.sort(key=lambda item: -item[0])
+
+        results: List[SearchResult] = []
+        total = 0
+        with self._lock:
+            for _, doc in scored:
+                row = self._edition(doc, publisher, year)
+                if row is None:
+                    continue
+                total += 1
+                if len(results) < limit:
+                    results.append(self._result(row))
+        return results, total
+
+    def _candidates(self, q_title: str, q_author: str) -> List[Tuple[int, str, str]]:
+        """(id, title, author) of the documents worth scoring for a query."""
+        # Exact title (the common case): the trigram index is only needed if none has the right author
+        docs = self._conn.execute("SELECT id, title, author FROM docs WHERE title = ?", (q_title,)).fetchall()
+        if docs and (not q_author or any(name_similarity(q_author, doc[2]) >= 0.8 for doc in docs)):
+            return docs
+
+        grams = list(trigrams(q_title) | trigrams(q_author))
+        placeholders = ",".join("?" * len(grams))
+        counts = self._conn.execute(
+            f"SELECT gram, docs FROM gram_counts WHERE gram IN ({placeholders}) ORDER BY docs", grams
+        ).fetchall()
+        # Only the rarest trigrams select the candidates: common ones ("the") would visit most of the index
+        rare: List[str] = []
+        postings = 0
+        for gram, count in counts:
+            if len(rare) >= MIN_QUERY_GRAMS and postings + count > MAX_POSTINGS:
+                break
+            rare.append(gram)
+            postings += count
+        if not rare:
+            return docs
+
+        placeholders = ",".join("?" * len(rare))
+        fuzzy = self._conn.execute(
+            f"SELECT d.id, d.title, d.author FROM (SELECT doc, COUNT(*) AS hits FROM grams "
+            f"WHERE gram IN ({placeholders}) GROUP BY doc ORDER BY hits DESC LIMIT ?) g JOIN docs d ON d.id = g.doc",
+            [*rare, CANDIDATE_POOL],
+        ).fetchall()
+        return docs + [doc for doc in fuzzy if doc not in docs]
+
+    def _edition(self, doc: int, publisher: Optional[str], year: Optional[str]):
+        """Best edition of a document matching the filters (editions with a cover and an ISBN first)."""
+        rows = self._conn.execute(
+            "SELECT e.* FROM doc_editions de JOIN editions e ON e.key = de.edition WHERE de.doc = ? "
+            "ORDER BY e.cover IS NULL, e.isbns = '[]', e.key",
+            (doc,),
+        ).fetchall()
+        wanted = index_text(publisher)
+        for row in rows:
+            if wanted:
+                found = index_text(row[4])
+                if not found or (wanted not in found and found not in wanted):
+                    continue
+            if year:
+                match = _YEAR.search(row[5] or "")
+                if not match or match.group(1) != year[:4]:
+                    continue
+            return row
+        return None
+
+    def _result(self, row) -> SearchResult:
+        """SearchResult of an edition row, completed with its work (authors, subjects, description)."""
+        key, work_key, title, authors, publisher, date, language, cover, description, isbns = row
+        author_keys = json.loads(authors or "[]")
+        subjects: List[str] = []
+        if work_key:
+            work = self._conn.execute(
+                "SELECT title, authors, subjects, description FROM works WHERE key = ?", (work_key,)
+            ).fetchone()
+            if work:
+                title = title or work[0]
+                author_keys = author_keys or json.loads(work[1] or "[]")
+                subjects = json.loads(work[2] or "[]")
+                description = description or work[3]
+
+        names = []
+        for author_key in author_keys:
+            found = self._conn.execute("SELECT name FROM authors WHERE key = ?", (author_key,)).fetchone()
+            if found and found[0]:
+                names.append(found[0])
+
+        ids = [
+            {"type": "ISBN_13" if len(isbn) == 13 else "ISBN_10", "identifier": isbn}
+            for isbn in json.loads(isbns or "[]")
+        ]
+        return SearchResult(
+            title=title or "Unknown",
+            authors=names or ["Unknown"],
+            publisher=publisher or "Unknown",
+            publishedDate=date or "Unknown",
+            description=description or "",
+            categories=subjects,
+            imageLinks=ImageLinks(thumbnail=COVER_URL.format(cover)) if cover else ImageLinks(),
+            industryIdentifiers=ids,
+            link=f"{config.OPENLIBRARY_URL}{key}",
+            language=language or "",
+            provider_id=key,
+        )
+
+    def close(self):
+        self._conn.close()
+
+
+_shared: Optional[LocalIndex] = None
+_shared_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Returns the process-wide index at config.LOCAL_INDEX_PATH, or None if no dump was imported there."""
+    global _shared
+    if not os.path.exists(config.LOCAL_INDEX_PATH):
+        return None
+
+    with _shared_lock:
+        if _shared is None or _shared.db_path != config.LOCAL_INDEX_PATH:
+            _shared = LocalIndex(config.LOCAL_INDEX_PATH)
+        return _shared
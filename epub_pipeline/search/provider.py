@@ -1,9 +1,35 @@
+import time
+from typing import Optional
+
+import requests
+
+from epub_pipeline import config
+from epub_pipeline.search.racing import COALESCER, RequestCancelled, cancelled, coalescing_enabled
+from epub_pipeline.search.response_cache import CacheMissError
+from epub_pipeline.utils.http import get_session
+from epub_pipeline.utils.rate_limiter import RETRYABLE_STATUSES, get_rate_limiter
+
+
 class MetadataProvider:
     """
     Abstract Base Class (Interface) for all metadata providers (Google, OpenLibrary, etc.).
     Enforces a consistent API for the BookFinder to use.
     """
 
+    # Rate limiter bucket shared by all instances (see config.*_RATE_LIMIT); None = not throttled
+    RATE_KEY: Optional[str] = None
+    # True if `get_by_isbns` resolves many ISBNs per request (only these are used by the batch pre-pass)
+    BATCH_ISBNS = False
+
+    def __init__(self, cache=None, session=None):
+        """
+        Args:
+            cache: Optional ResponseCache shared by providers (None = always hit the network).
+            session: requests Session to reuse warm connections (default: the process-wide session).
+        """
+        self.cache = cache
+        self.session = session or get_session()
+
     @property
     def name(self):
         """Returns the display name of the provider."""
@@ -16,6 +42,15 @@ class MetadataProvider:
         """
         raise NotImplementedError
 
+    def get_by_isbns(self, isbns):
+        """
+        Resolves many ISBNs at once (pre-pass of a directory run).
+        Only implemented by providers with a multi-key endpoint (BATCH_ISBNS): the others
+        are looked up lazily, one ISBN at a time, by `find_book`.
+        Returns: {isbn: (SearchResult | None, total_hits)}; ISBNs that could not be resolved may be absent.
+        """
+        raise NotImplementedError
+
     def search_by_text(self, meta, context):
         """
         Searches using loose text criteria (Title, Author, etc.).
@@ -25,3 +60,95 @@ class MetadataProvider:
         Returns: (SearchResult | None, total_hits: int)
         """
         raise NotImplementedError
+
+    def search_candidates(self, meta, context):
+        """
+        Text search returning the best results of the query (up to config.SEARCH_CANDIDATES),
+        so that they can all be scored and the best one picked.
+        Default: the single result of `search_by_text`.
+        Returns: (list of SearchResult, total_hits: int)
+        """
+        data, total = self.search_by_text(meta, context)
+        return ([data] if data else []), total
+
+    def text_query(self, meta, context):
+        """
+        Identity (hashable) of the request sent by `search_candidates` for this attempt.
+        Attempts with equal identities send the same request: the speculative search sends it once.
+        Default: None (never shared).
+        """
+        return None
+
+    def _get_json(self, url, params=None, is_miss=None):
+        """
+        Performs a GET request and decodes the JSON body, going through the response cache.
+        Concurrent identical requests (e.g. two copies of a book, or books of one series) share
+        a single network call (see racing.SingleFlight).
+        Args:
+            is_miss: Optional predicate flagging empty answers (cached with a shorter TTL).
+        Raises:
+            requests.exceptions.RequestException on network/HTTP errors,
+            CacheMissError in offline mode when the response is not cached.
+        """
+        key = None
+        if self.cache:
+            key = self.cache.make_key(url, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            if self.cache.offline:
+                raise CacheMissError(f"Not in cache (offline mode): {url}")
+
+        def fetch():
+            data = self._request(url, params).json()
+            if self.cache:
+                self.cache.put(key, data, negative=bool(is_miss and is_miss(data)))
+            return data
+
+        if not coalescing_enabled():
+            return fetch()
+        request = (self.RATE_KEY or self.name, url, tuple(sorted((params or {}).items())))
+        try:
+            return COALESCER.do(request, fetch)
+        except RequestCancelled:
+            # The call we joined was cancelled before sending: send our own unless cancelled too
+            if cancelled():
+                raise
+            return fetch()
+
+    def _seed_cache(self, url, params, data, negative=False):
+        """Stores a response obtained another way (e.g. split from a batch) as if `url` had been fetched."""
+        if self.cache:
+            self.cache.put(self.cache.make_key(url, params), data, negative=negative)
+
+    def _request(self, url, params=None):
+        """
+        Sends a throttled GET request.
+        Rate limits and server errors (429/5xx) are retried up to MAX_RETRIES times,
+        waiting for Retry-After when given, exponential backoff with jitter otherwise.
+        Raises RequestCancelled instead of sending if the calling search was cancelled meanwhile.
+        """
+        limiter = get_rate_limiter(self.RATE_KEY or self.name)
+        for attempt in range(config.MAX_RETRIES):
+            if cancelled():
+                raise RequestCancelled(f"Cancelled before sending: {url}")
+            try:
+                with limiter.request():
+                    # Cancelled while waiting for a token: the request is still not sent
+                    if cancelled():
+                        raise RequestCancelled(f"Cancelled before sending: {url}")
+                    response = self.session.get(url, params=params, timeout=config.REQUEST_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                limiter.on_congestion(attempt)
+                raise
+
+            if response.status_code not in RETRYABLE_STATUSES:
+                limiter.on_success()
+                break
+
+            delay = limiter.on_congestion(attempt, response.headers.get("Retry-After"))
+            if attempt < config.MAX_RETRIES - 1:
+                time.sleep(delay)
+
+        response.raise_for_status()
+        return response
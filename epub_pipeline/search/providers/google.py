@@ -1,5 +1,4 @@
-import time
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import requests
 
@@ -12,9 +11,13 @@ from epub_pipeline.utils.logger import Logger
 class GoogleBooksProvider(MetadataProvider):
     """
     Implementation of the MetadataProvider for the Google Books API v1.
-    Includes built-in retry logic (exponential backoff) and query construction.
+    Handles query construction; throttling and retries are shared with other providers.
     """
 
+    RATE_KEY = "google"
+    # Largest page the API accepts (maxResults)
+    MAX_RESULTS = 40
+
     @property
     def name(self):
         return "Google Books"
@@ -24,51 +27,59 @@ class GoogleBooksProvider(MetadataProvider):
         return self._fetch(f"isbn:{isbn}")
 
     def search_by_text(self, meta: BookMetadata, context: dict) -> Tuple[Optional[SearchResult], int]:
-        """Constructs a complex query string and fetches results."""
-        query = self._build_query(meta, context)
+        """Constructs a complex query string and returns the first result."""
+        candidates, total = self.search_candidates(meta, context)
+        return (candidates[0], total) if candidates else (None, 0)
+
+    def search_candidates(self, meta: BookMetadata, context: dict) -> Tuple[List[SearchResult], int]:
+        """Constructs a complex query string and returns the top SEARCH_CANDIDATES results."""
+        query, lang = self.text_query(meta, context)
+        return self._fetch_all(query, lang_restrict=lang, limit=config.SEARCH_CANDIDATES)
+
+    def text_query(self, meta: BookMetadata, context: dict) -> Tuple[str, Optional[str]]:
         # Apply language filtering if enabled in config to reduce false positives
         lang = meta.get("language") if config.FILTER_BY_LANGUAGE else None
-
-        return self._fetch(query, lang_restrict=lang)
+        return self._build_query(meta, context), lang
 
     def _fetch(self, query: str, lang_restrict: Optional[str] = None) -> Tuple[Optional[SearchResult], int]:
+        """Executes the query and returns only the first (best) result."""
+        items, total = self._fetch_all(query, lang_restrict)
+        return (items[0], total) if items else (None, 0)
+
+    def _fetch_all(
+        self, query: str, lang_restrict: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[SearchResult], int]:
         """
         Executes the HTTP request to Google API.
         Handles:
         - Network errors
-        - Rate limiting (429/503) with exponential backoff
         - JSON parsing
+        Rate limiting (429/503) is retried by MetadataProvider._request.
+        Args:
+            limit: Number of results requested (maxResults); None = the API default.
         """
         if not query:
-            return None, 0
+            return [], 0
 
         params = {"q": query}
         if lang_restrict:
             params["langRestrict"] = lang_restrict
-
-        for attempt in range(config.MAX_RETRIES):
-            try:
-                response = requests.get(config.GOOGLE_API_URL, params=params, timeout=config.REQUEST_TIMEOUT)
-                response.raise_for_status()
-                data = response.json()
-
-                if "items" in data and len(data["items"]) > 0:
-                    # We only care about the first (best) result
-                    return self._normalize(data["items"][0]), data.get("totalItems", 0)
-                else:
-                    return None, 0
-
-            except requests.exceptions.HTTPError as e:
-                # Retry on server errors or rate limits
-                if e.response.status_code in [500, 502, 503, 504, 429]:
-                    time.sleep(2**attempt)
-                else:
-                    Logger.verbose(f"[Google] HTTP Error: {e}")
-                    return None, 0
-            except Exception as e:
-                Logger.verbose(f"[Google] Connection error: {e}")
-                return None, 0
-        return None, 0
+        if limit:
+            params["maxResults"] = str(max(1, min(limit, self.MAX_RESULTS)))
+
+        try:
+            data = self._get_json(config.GOOGLE_API_URL, params, is_miss=lambda d: not d.get("items"))
+
+            items = data.get("items") or []
+            if items:
+                return [self._normalize(item) for item in items[:limit]], data.get("totalItems", 0)
+            return [], 0
+
+        except requests.exceptions.HTTPError as e:
+            Logger.verbose(f"[Google] HTTP Error: {e}")
+        except Exception as e:
+            Logger.verbose(f"[Google] Connection error: {e}")
+        return [], 0
 
     def _build_query(self, meta: BookMetadata, context: dict) -> str:
         """
@@ -0,0 +1,63 @@
+from typing import List, Optional, Tuple
+
+from epub_pipeline import config
+from epub_pipeline.models import BookMetadata, SearchResult
+from epub_pipeline.search.local_index import LocalIndex, get_local_index
+from epub_pipeline.search.provider import MetadataProvider
+from epub_pipeline.utils.logger import Logger
+
+
+class LocalIndexProvider(MetadataProvider):
+    """
+    Offline provider answering from the local index of OpenLibrary data dumps (see search.local_index).
+    No network and no rate limit: ISBN lookups are primary key reads, text searches use the trigram index.
+    """
+
+    def __init__(self, index: Optional[LocalIndex] = None, cache=None, session=None):
+        super().__init__(cache=cache, session=session)
+        self.index = index or get_local_index()
+
+    @property
+    def name(self):
+        return "OpenLibrary (local)"
+
+    def get_by_isbn(self, isbn: str) -> Tuple[Optional[SearchResult], int]:
+        try:
+            data = self.index.get_by_isbn(isbn) if self.index else None
+            if data:
+                return data, 1
+        except Exception as e:
+            Logger.verbose(f"[Local] ISBN Error: {e}")
+        return None, 0
+
+    def search_by_text(self, meta: BookMetadata, context: dict) -> Tuple[Optional[SearchResult], int]:
+        candidates, total = self.search_candidates(meta, context)
+        return (candidates[0], total) if candidates else (None, 0)
+
+    def search_candidates(self, meta: BookMetadata, context: dict) -> Tuple[List[SearchResult], int]:
+        """Fuzzy title and author search, filtered on publisher and year like the remote queries."""
+        title, author, publisher, year = self.text_query(meta, context)
+        if not title or not self.index:
+            return [], 0
+        try:
+            return self.index.search(
+                title, author, limit=max(1, config.SEARCH_CANDIDATES), publisher=publisher, year=year
+            )
+        except Exception as e:
+            Logger.verbose(f"[Local] Search Error: {e}")
+        return [], 0
+
+    def text_query(self, meta: BookMetadata, context: dict):
+        title = meta.get("title", "")
+        authors = meta.get("authors", [])
+        author = authors[0] if authors and authors[0] != "Unknown" else ""
+
+        publisher = None
+        if context.get("pub", False) and config.USE_PUBLISHER_IN_SEARCH:
+            publisher = meta.get("publisher") or None
+
+        year = None
+        date = meta.get("date") or ""
+        if context.get("year", False) and config.USE_YEAR_IN_SEARCH and date[:4].isdigit():
+            year = date[:4]
+        return title, author, publisher, year
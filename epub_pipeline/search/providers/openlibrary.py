@@ -1,6 +1,4 @@
-from typing import Optional, Tuple, cast
-
-import requests
+from typing import Dict, List, Optional, Tuple, cast
 
 from epub_pipeline import config
 from epub_pipeline.models import BookMetadata, ImageLinks, SearchResult
@@ -16,29 +14,81 @@ class OpenLibraryProvider(MetadataProvider):
     2. 'Search API' for text queries (search.json).
     """
 
+    RATE_KEY = "openlibrary"
+    BATCH_ISBNS = True
+
     @property
     def name(self):
         return "OpenLibrary"
 
     def get_by_isbn(self, isbn: str) -> Tuple[Optional[SearchResult], int]:
         """Uses the Books API (jscmd=data) to fetch specific book details."""
-        url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
+        url = self._books_url([isbn])
+        key = f"ISBN:{isbn}"
         try:
-            resp = requests.get(url, timeout=config.REQUEST_TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
-            key = f"ISBN:{isbn}"
+            data = self._get_json(url, is_miss=lambda d: key not in d)
             if key in data:
                 return self._normalize_isbn(data[key]), 1
         except Exception as e:
             Logger.verbose(f"[OL] ISBN Error: {e}")
         return None, 0
 
+    def get_by_isbns(self, isbns: List[str]) -> Dict[str, Tuple[Optional[SearchResult], int]]:
+        """
+        The Books API accepts many bibkeys per request: ISBNs are resolved ISBN_BATCH_SIZE at a time.
+        Each answer is also cached under its single-ISBN request, which `get_by_isbn` hits later.
+        ISBNs of a failed batch are left out (they are looked up again individually).
+        """
+        results: Dict[str, Tuple[Optional[SearchResult], int]] = {}
+        size = max(1, config.ISBN_BATCH_SIZE)
+        for start in range(0, len(isbns), size):
+            batch = isbns[start : start + size]
+            try:
+                data = self._get_json(self._books_url(batch))
+            except Exception as e:
+                Logger.verbose(f"[OL] ISBN batch Error: {e}")
+                continue
+
+            for isbn in batch:
+                key = f"ISBN:{isbn}"
+                entry = data.get(key)
+                self._seed_cache(self._books_url([isbn]), None, {key: entry} if entry else {}, negative=not entry)
+                results[isbn] = (self._normalize_isbn(entry), 1) if entry else (None, 0)
+        return results
+
     def search_by_text(self, meta: BookMetadata, context: dict) -> Tuple[Optional[SearchResult], int]:
-        """Uses the General Search API (search.json)."""
+        """Uses the General Search API (search.json) and returns the first result."""
+        candidates, total = self.search_candidates(meta, context)
+        return (candidates[0], total) if candidates else (None, 0)
+
+    def search_candidates(self, meta: BookMetadata, context: dict) -> Tuple[List[SearchResult], int]:
+        """Uses the General Search API (search.json) and returns the top SEARCH_CANDIDATES results."""
+        params = self._search_params(meta, context)
+        if not params:
+            return [], 0
+        limit = int(params["limit"])
+
+        try:
+            data = self._get_json(
+                f"{config.OPENLIBRARY_URL}/search.json",
+                params,
+                is_miss=lambda d: not d.get("docs"),
+            )
+            if data.get("docs"):
+                return [self._normalize_search(doc) for doc in data["docs"][:limit]], data.get("numFound", 0)
+        except Exception as e:
+            Logger.verbose(f"[OL] Search Error: {e}")
+        return [], 0
+
+    def text_query(self, meta: BookMetadata, context: dict):
+        # The year is never sent: "No year" is the same request as "No publisher"
+        return tuple(sorted(self._search_params(meta, context).items()))
+
+    def _search_params(self, meta: BookMetadata, context: dict) -> Dict[str, str]:
+        """Query parameters of a search.json request ({} without a title)."""
         title = meta.get("title", "")
         if not title:
-            return None, 0
+            return {}
 
         # Clean title for better hit rate
         t = title.split("(")[0].split(":")[0].strip()
@@ -52,20 +102,12 @@ class OpenLibraryProvider(MetadataProvider):
         if context.get("pub", False) and config.USE_PUBLISHER_IN_SEARCH and publisher:
             params["publisher"] = publisher.replace("Editions", "").strip()
 
-        try:
-            # Note: No retry logic here (OpenLibrary can be slow, but usually works or fails hard)
-            resp = requests.get(
-                "https://openlibrary.org/search.json",
-                params=params,
-                timeout=config.REQUEST_TIMEOUT,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            if data.get("docs"):
-                return self._normalize_search(data["docs"][0]), data.get("numFound", 0)
-        except Exception as e:
-            Logger.verbose(f"[OL] Search Error: {e}")
-        return None, 0
+        params["limit"] = str(max(1, config.SEARCH_CANDIDATES))
+        return params
+
+    def _books_url(self, isbns: List[str]) -> str:
+        bibkeys = ",".join(f"ISBN:{isbn}" for isbn in isbns)
+        return f"{config.OPENLIBRARY_URL}/api/books?bibkeys={bibkeys}&format=json&jscmd=data"
 
     def _normalize_isbn(self, data: dict) -> SearchResult:
         """Normalizes data from the 'Books API' (ISBN lookup)."""
@@ -111,7 +153,7 @@ class OpenLibraryProvider(MetadataProvider):
             categories=data.get("subject", [])[:5],
             imageLinks=cast(ImageLinks, imgs),
             industryIdentifiers=[],
-            link=f"https://openlibrary.org{data.get('key')}" if data.get("key") else "",
+            link=f"{config.OPENLIBRARY_URL}{data.get('key')}" if data.get("key") else "",
             language=data.get("language", [""])[0],
             provider_id=data.get("key", ""),
         )
@@ -0,0 +1,189 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from epub_pipeline import config
+from epub_pipeline.utils.logger import Logger
+
+# Dedicated pool for blocking provider calls. Unlike the event loop's default executor,
+# it is not joined when a search returns. A thread cannot be interrupted: a cancelled call
+# stops before sending its request (see `cancelled`), one already sent finishes in the background.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="search")
+
+
+class RequestCancelled(Exception):
+    """Raised instead of sending a request that the search which started it no longer needs."""
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed call latencies, per key (e.g. provider name).
+    Used to detect requests that are slower than usual and worth hedging.
+    """
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """Returns the given percentile, or None while there are too few samples to trust."""
+        with self._lock:
+            samples = sorted(self._samples[key])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+# Shared by every search of the process
+LATENCY = LatencyTracker()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call is in flight for a key, callers with the
+    same key wait for it and share its result (or exception) instead of sending their own.
+    Thread-safe: directory workers and the search pool (asyncio path) all end up here.
+    Results are shared, not copied: they must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future: Future = Future()
+                self._in_flight[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if in_flight is not None:
+            return in_flight.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Calls sent, and calls answered by joining an identical one in flight."""
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+# Shared by every provider of the process (see MetadataProvider._get_json)
+COALESCER = SingleFlight()
+# Cleared for hedged duplicates, which must not join the request they duplicate
+_coalescing: contextvars.ContextVar[bool] = contextvars.ContextVar("coalescing", default=True)
+
+
+def coalescing_enabled() -> bool:
+    return config.COALESCE_REQUESTS and _coalescing.get()
+
+
+# Set by run_blocking when the awaiting task is cancelled (checked by the thread running the call)
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("cancel_event", default=None)
+
+
+def cancelled() -> bool:
+    """True if the current blocking call was cancelled by its caller (see run_blocking)."""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def _without_coalescing(fn: Callable, *args) -> Any:
+    # Runs in the copied context of run_blocking: the caller's context is untouched
+    _coalescing.set(False)
+    return fn(*args)
+
+
+async def run_blocking(fn: Callable, *args) -> Any:
+    """
+    Runs a blocking call in the search pool, keeping the caller's context (log capture...).
+    If the awaiting task is cancelled, `cancelled()` turns True in the call's thread.
+    """
+    ctx = contextvars.copy_context()
+    event = threading.Event()
+    ctx.run(_cancel_event.set, event)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args))
+    except asyncio.CancelledError:
+        event.set()
+        raise
+
+
+async def hedged_call(key: str, fn: Callable, *args, tracker: LatencyTracker = LATENCY) -> Any:
+    """
+    Runs a blocking call; if it is still running after the p95 latency observed for `key`,
+    sends an identical duplicate and returns whichever answers first. If one of them fails,
+    the other one is still awaited; the error is raised only when both failed.
+    The loser is cancelled: it is dropped if its request was not sent yet, otherwise it finishes
+    in the background and its answer is ignored.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks: List[asyncio.Future] = [asyncio.ensure_future(run_blocking(fn, *args))]
+
+    try:
+        threshold = tracker.percentile(key, 95) if config.HEDGE_REQUESTS else None
+        if threshold is not None:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done:
+                Logger.verbose(f"{key}: slower than p95 ({threshold:.2f}s), sending hedged request")
+                tasks.append(asyncio.ensure_future(run_blocking(_without_coalescing, fn, *args)))
+
+        pending: Set[asyncio.Future] = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            answered = [task for task in done if task.exception() is None]
+            if answered:
+                tracker.record(key, loop.time() - start)
+                return answered[0].result()
+            if not pending:
+                # Both failed: the original request's error
+                return tasks[0].result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def first_accepted(calls: Sequence[Awaitable], accept: Callable[[int, Any], bool]) -> Tuple[Optional[int], Any]:
+    """
+    Starts all calls at once and returns (index, result) of the first one, in sequence order,
+    whose result is accepted. Order decides ties: a later call only wins once every earlier
+    one has been rejected, so the outcome is the same as running them one after another.
+    Calls still running once a winner is known are cancelled: requests not sent yet are dropped,
+    requests already sent finish in the background and their answers are ignored.
+    """
+    tasks = [asyncio.ensure_future(c) for c in calls]
+    try:
+        for index, task in enumerate(tasks):
+            result = await task
+            if accept(index, result):
+                return index, result
+        return None, None
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+from epub_pipeline import config
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    negative INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access);
+"""
+
+CACHE_MODES = ("off", "read-write", "read-only", "refresh", "offline")
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a response is not available in the cache."""
+
+
+class ResponseCache:
+    """
+    Persistent cache of provider JSON responses, stored in SQLite (safe across processes).
+
+    Modes:
+    - read-write: serve fresh entries, store new responses (default).
+    - read-only: serve fresh entries, never store anything.
+    - refresh: always hit the network, store the new responses.
+    - offline: never hit the network; missing entries raise CacheMissError.
+
+    'Misses' (valid answers with no result) are cached too, with a shorter TTL.
+    The total payload size is bounded: least recently used entries are evicted first.
+    """
+
+    # Eviction is checked every N writes (computing the total size is a table scan)
+    EVICTION_INTERVAL = 100
+
+    def __init__(
+        self,
+        db_path: str,
+        mode: str = "read-write",
+        ttl: float = 30 * 86400,
+        negative_ttl: float = 86400,
+        max_bytes: int = 200 * 1024 * 1024,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}' (expected one of: {', '.join(CACHE_MODES)})")
+        self.db_path = db_path
+        self.mode = mode
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict] = None) -> str:
+        """Normalized request key: parameter order and whitespace do not matter."""
+        normalized = {k: " ".join(str(v).split()) for k, v in (params or {}).items()}
+        raw = url + "?" + urlencode(sorted(normalized.items()))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def readable(self) -> bool:
+        return self.mode in ("read-write", "read-only", "offline")
+
+    @property
+    def writable(self) -> bool:
+        return self.mode in ("read-write", "refresh")
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == "offline"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached payload, or None if absent or expired."""
+        if not self.readable:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row and self.mode != "read-only":
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, payload: Any, negative: bool = False):
+        """Stores a response. `negative` marks an empty answer (shorter TTL)."""
+        if not self.writable:
+            return
+
+        text = json.dumps(payload, ensure_ascii=False)
+        now = time.time()
+        ttl = self.negative_ttl if negative else self.ttl
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, negative, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, len(text), int(negative), now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        """Drops expired entries, then the least recently used ones until under `max_bytes`."""
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(size) OVER (ORDER BY last_access, key) - size AS freed FROM responses"
+                "  ) WHERE freed < ?"
+                ")",
+                (excess,),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._conn.close()
+
+
+_shared: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[ResponseCache]:
+    """Returns the process-wide cache configured in `config`, or None if caching is off."""
+    global _shared
+    if config.CACHE_MODE == "off":
+        return None
+
+    with _shared_lock:
+        if _shared is None or _shared.db_path != config.HTTP_CACHE_PATH or _shared.mode != config.CACHE_MODE:
+            _shared = ResponseCache(
+                config.HTTP_CACHE_PATH,
+                mode=config.CACHE_MODE,
+                ttl=config.CACHE_TTL_DAYS * 86400,
+                negative_ttl=config.CACHE_NEGATIVE_TTL_DAYS * 86400,
+                max_bytes=config.CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _shared
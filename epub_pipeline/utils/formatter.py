@@ -15,33 +15,37 @@ class Formatter:
         """
         Prints local file metadata.
         Args:
-            manager (EpubManager): The file manager instance.
+            manager (EpubManager | OpfReader): The file reader instance.
             full (bool): If True, dumps raw XML metadata (debug mode).
         """
         if not manager.book:
             return
 
-        Logger.info(f"File: {manager.filename}")
+        if not full:
+            Formatter.print_curated(manager.filename, manager.get_curated_metadata())
+            return
 
-        if full:
-            # Debug view: Raw XML tags
-            raw = manager.get_raw_metadata()
-            if not raw:
-                Logger.warning("No metadata found.")
-            for key, items in raw.items():
-                for item in items:
-                    attr_str = f" {item['attrs']}" if item["attrs"] else ""
-                    print(f"  {key:25}: {item['value']}{attr_str}")
-        else:
-            # User view: Cleaned metadata
-            curated = manager.get_curated_metadata()
-            print(f"  Title:     {curated['title']}")
-            print(f"  Author:    {', '.join(curated['authors'])}")
-            print(f"  ISBN:      {curated['isbn'] if curated['isbn'] else '❌ Not Found'}")
-            print(f"  Publisher: {curated['publisher'] if curated['publisher'] else 'Unknown'}")
-            print(f"  Language:  {curated['language'] if curated['language'] else 'Unknown'}")
-            print(f"  Date:      {curated['date'] if curated['date'] else 'Unknown'}")
+        # Debug view: Raw XML tags
+        Logger.info(f"File: {manager.filename}")
+        raw = manager.get_raw_metadata()
+        if not raw:
+            Logger.warning("No metadata found.")
+        for key, items in raw.items():
+            for item in items:
+                attr_str = f" {item['attrs']}" if item["attrs"] else ""
+                print(f"  {key:25}: {item['value']}{attr_str}")
+        print("-" * 60)
 
+    @staticmethod
+    def print_curated(filename, curated):
+        """Prints curated metadata (as read from the file, or from the library catalog)."""
+        Logger.info(f"File: {filename}")
+        print(f"  Title:     {curated['title']}")
+        print(f"  Author:    {', '.join(curated['authors'])}")
+        print(f"  ISBN:      {curated['isbn'] if curated['isbn'] else '❌ Not Found'}")
+        print(f"  Publisher: {curated['publisher'] if curated['publisher'] else 'Unknown'}")
+        print(f"  Language:  {curated['language'] if curated['language'] else 'Unknown'}")
+        print(f"  Date:      {curated['date'] if curated['date'] else 'Unknown'}")
         print("-" * 60)
 
     @staticmethod
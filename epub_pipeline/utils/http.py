@@ -0,0 +1,46 @@
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from epub_pipeline import config
+
+# Some CDNs (covers) answer 403 Forbidden to the default python-requests agent
+USER_AGENT = "Mozilla/5.0 (compatible; epub-pipeline)"
+
+
+def create_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    Builds a requests Session with keep-alive connection pools.
+    - One pool per host, each keeping up to `pool_size` warm connections (default: config.HTTP_POOL_SIZE).
+    - Non-blocking pools: extra concurrent requests open a temporary connection instead of waiting.
+    - gzip/deflate responses (decoded transparently by requests).
+    """
+    size = pool_size or config.HTTP_POOL_SIZE
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+_shared: Optional[requests.Session] = None
+_shared_pid: Optional[int] = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide session shared by providers and the cover downloader.
+    Created lazily; a new one is built in child processes (sockets must not be shared across a fork).
+    """
+    global _shared, _shared_pid
+    with _shared_lock:
+        if _shared is None or _shared_pid != os.getpid():
+            _shared = create_session()
+            _shared_pid = os.getpid()
+        return _shared
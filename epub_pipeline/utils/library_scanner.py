@@ -0,0 +1,105 @@
+import fnmatch
+import os
+from typing import Iterator, Optional, Sequence
+
+
+class LibraryScanner:
+    """
+    Streaming, recursive discovery of EPUB files.
+    Built on `os.scandir` and implemented as a generator: each file is yielded as soon
+    as it is found, so processing starts before the whole tree has been walked.
+    """
+
+    def __init__(
+        self,
+        include: Sequence[str] = ("*.epub",),
+        exclude: Sequence[str] = (),
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        newer_than: Optional[float] = None,
+        follow_symlinks: bool = True,
+    ):
+        """
+        Args:
+            include: Glob patterns a file name (or relative path) must match.
+            exclude: Glob patterns pruning files and whole directories.
+            min_size / max_size: Optional bounds on the file size, in bytes.
+            newer_than: Optional timestamp; older files (by mtime) are skipped.
+            follow_symlinks: Descend into symlinked directories (loops are detected).
+        """
+        self.include = [p.lower() for p in include]
+        self.exclude = [p.lower() for p in exclude]
+        self.min_size = min_size
+        self.max_size = max_size
+        self.newer_than = newer_than
+        self.follow_symlinks = follow_symlinks
+
+    def scan(self, root: str, skip: Sequence[str] = ()) -> Iterator[str]:
+        """
+        Yields matching file paths under `root`, depth-first, sorted within each directory.
+        Directories in `skip` (and everything under them) are never entered, even if they
+        are created while the scan is running.
+        """
+        skipped = {os.path.realpath(path) for path in skip}
+        visited = set()
+        stack = [root]
+
+        while stack:
+            directory = stack.pop()
+
+            # Symlink loop protection: never enter the same physical directory twice
+            try:
+                st = os.stat(directory)
+            except OSError:
+                continue
+            dir_id = (st.st_dev, st.st_ino)
+            if dir_id in visited:
+                continue
+            visited.add(dir_id)
+
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = os.path.relpath(entry.path, root)
+                if self._matches(entry.name, rel_path, self.exclude):
+                    continue
+
+                try:
+                    if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                        if not skipped or os.path.realpath(entry.path) not in skipped:
+                            subdirs.append(entry.path)
+                    elif entry.is_file() and self._accepts(entry, rel_path):
+                        yield entry.path
+                except OSError:
+                    continue
+
+            # Reversed so that directories are visited in alphabetical order
+            stack.extend(reversed(subdirs))
+
+    def _accepts(self, entry: os.DirEntry, rel_path: str) -> bool:
+        if not self._matches(entry.name, rel_path, self.include):
+            return False
+
+        if self.min_size is None and self.max_size is None and self.newer_than is None:
+            return True
+
+        st = entry.stat()
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        if self.newer_than is not None and st.st_mtime < self.newer_than:
+            return False
+        return True
+
+    @staticmethod
+    def _matches(name: str, rel_path: str, patterns: Sequence[str]) -> bool:
+        """Case-insensitive glob match against either the bare name or the relative path."""
+        name = name.lower()
+        rel_path = rel_path.replace(os.sep, "/").lower()
+        return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(rel_path, p) for p in patterns)
@@ -1,9 +1,16 @@
 import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
 
 import termcolor
 
 from epub_pipeline import config
 
+# Active capture buffer for the current context (None = print directly).
+# A ContextVar (rather than a global) keeps concurrent stages from mixing their output.
+_capture_buffer: ContextVar[Optional[List[str]]] = ContextVar("log_capture_buffer", default=None)
+
 
 class Logger:
     """
@@ -11,31 +18,60 @@ class Logger:
     Handles indentation and conditional verbosity.
     """
 
+    @staticmethod
+    def _emit(msg):
+        """Prints a message, or buffers it if a capture is active in this context."""
+        buffer = _capture_buffer.get()
+        if buffer is None:
+            print(msg)
+        else:
+            buffer.append(msg)
+
+    @staticmethod
+    @contextmanager
+    def capture():
+        """
+        Collects every message logged in the current context instead of printing it.
+        Used by concurrent pipeline stages so each file's output can be replayed as one block.
+        """
+        buffer: List[str] = []
+        token = _capture_buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _capture_buffer.reset(token)
+
+    @staticmethod
+    def replay(lines):
+        """Prints messages previously collected with `capture()`."""
+        for line in lines:
+            Logger._emit(line)
+
     @staticmethod
     def info(msg):
         """Standard info message."""
-        print(msg)
+        Logger._emit(msg)
 
     @staticmethod
     def verbose(msg):
         """Debug message, only shown if VERBOSE config is True."""
         if config.VERBOSE:
-            print(termcolor.colored("VERBOSE", "cyan") + f": {msg}")
+            Logger._emit(termcolor.colored("VERBOSE", "cyan") + f": {msg}")
 
     @staticmethod
     def success(msg):
         """Success message with checkmark icon."""
-        print(termcolor.colored("SUCCESS", "green") + f": {msg}")
+        Logger._emit(termcolor.colored("SUCCESS", "green") + f": {msg}")
 
     @staticmethod
     def warning(msg):
         """Warning message with alert icon."""
-        print(termcolor.colored("WARNING", "yellow") + f": {msg}")
+        Logger._emit(termcolor.colored("WARNING", "yellow") + f": {msg}")
 
     @staticmethod
     def error(msg):
         """Error message with cross icon."""
-        print(termcolor.colored("ERROR", "red") + f": {msg}")
+        Logger._emit(termcolor.colored("ERROR", "red") + f": {msg}")
 
     @staticmethod
     def full_json(data):
@@ -46,5 +82,5 @@ class Logger:
         """
         if config.FULL_OUTPUT:
             json_str = json.dumps(data, ensure_ascii=False)
-            print("[FULL OUTPUT]")
-            print(json_str)
+            Logger._emit("[FULL OUTPUT]")
+            Logger._emit(json_str)
@@ -0,0 +1,155 @@
+import os
+import sys
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+MB = 1024 * 1024
+
+# Resident memory of an idle worker (interpreter, ebooklib, lxml, Pillow), until one is measured
+DEFAULT_WORKER_MB = 120
+# Extra memory per byte of uncompressed book content, until files are measured.
+# 1.0 assumes the whole book is held in memory (EbookLib fallback).
+DEFAULT_CONTENT_RATIO = 1.0
+# Streamed saves still buffer a few members (OPF, cover, copy buffers)
+MIN_CONTENT_RATIO = 0.05
+
+
+def _proc_status(field: str) -> Optional[int]:
+    """Reads a memory field of /proc/self/status (Linux), in bytes."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def current_rss() -> int:
+    """Current resident set size of this process, in bytes (0 if unknown)."""
+    return _proc_status("VmRSS") or 0
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process (since the last `reset_peak`), in bytes."""
+    peak = _proc_status("VmHWM")
+    if peak is not None:
+        return peak
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def reset_peak() -> bool:
+    """
+    Resets the peak RSS counter, so that the next `peak_rss` only covers what follows.
+    Only possible on Linux: elsewhere the peak is the process-wide one.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class PeakMemory:
+    """
+    Measures the peak RSS of a block of code:
+
+        with PeakMemory() as usage:
+            ...
+        usage.peak  # bytes
+    """
+
+    def __init__(self):
+        self.peak = 0
+
+    def __enter__(self):
+        reset_peak()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak = peak_rss()
+        return False
+
+
+def content_size(file_path: str) -> int:
+    """Uncompressed size of an EPUB's members (central directory only), or its file size."""
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            return sum(info.file_size for info in archive.infolist())
+    except (OSError, zipfile.BadZipFile):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+
+class MemoryBudget:
+    """
+    Keeps the write stage of concurrent runs under a memory ceiling (--memory-budget).
+
+    Each file reserves its estimated peak (worker baseline + content size x ratio) before
+    being written, and waits while the reservations in flight would exceed the budget:
+    concurrency drops automatically on large books. One file is always allowed through,
+    so a book larger than the budget is still processed (alone).
+    Estimates start conservative and are refined with the peaks measured by the workers.
+    """
+
+    def __init__(self, budget_mb: float):
+        self.budget = int(budget_mb * MB)
+        self.baseline = DEFAULT_WORKER_MB * MB
+        self.ratio = DEFAULT_CONTENT_RATIO
+        self._measured = False
+        self._max_ratio = 0.0
+        self._in_use = 0
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def max_workers(self, jobs: int) -> int:
+        """Number of worker processes that fit in the budget (at least 1)."""
+        return max(1, min(jobs, self.budget // self.baseline))
+
+    def estimate(self, file_path: str) -> int:
+        """Expected peak RSS of a worker writing this file, in bytes."""
+        return int(self.baseline + content_size(file_path) * self.ratio)
+
+    @contextmanager
+    def reserve(self, amount: int):
+        """Blocks until `amount` bytes fit in the budget (or nothing else is running)."""
+        with self._cond:
+            while self._active and self._in_use + amount > self.budget:
+                self._cond.wait()
+            self._in_use += amount
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= amount
+                self._active -= 1
+                self._cond.notify_all()
+
+    def record(self, file_path: str, peak: int):
+        """Refines the estimates with the peak RSS measured while writing `file_path`."""
+        if peak <= 0:
+            return
+        size = content_size(file_path)
+        with self._cond:
+            # The smallest peak seen is the closest to an idle worker
+            self.baseline = min(self.baseline, peak) if self._measured else peak
+            if size:
+                self._max_ratio = max(self._max_ratio, (peak - self.baseline) / size)
+            self.ratio = max(self._max_ratio, MIN_CONTENT_RATIO)
+            self._measured = True
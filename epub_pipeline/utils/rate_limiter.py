@@ -0,0 +1,235 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from epub_pipeline import config
+from epub_pipeline.utils.sqlite_utils import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Statuses meaning "slow down": retried with backoff and reported as congestion
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Base delay of the exponential backoff when the server gives no Retry-After (seconds)
+BACKOFF_BASE = 1.0
+# Upper bound for any single wait, whatever the server asks for (seconds)
+MAX_BACKOFF = 60.0
+# How often an unthrottled bucket re-reads pauses set by other processes (seconds)
+BLOCK_REFRESH = 1.0
+
+
+class TokenBucket:
+    """
+    Token bucket persisted in SQLite: every thread and worker process draws from the same budget.
+    `rate` tokens are added per second, up to `burst`. A rate <= 0 disables throttling: no token
+    is written per request, only server-imposed pauses from `block()` apply.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, db_path: str):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._blocked_until = 0.0
+        self._checked = 0.0
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return waited
+            # Short naps: another process may refill or unblock the bucket meanwhile
+            nap = min(wait, 1.0)
+            time.sleep(nap)
+            waited += nap
+
+    def block(self, seconds: float):
+        """Pauses all consumers for `seconds` (e.g. on a Retry-After header)."""
+        until = time.time() + seconds
+        with self._lock, self._conn:
+            self._blocked_until = max(self._blocked_until, until)
+            self._conn.execute(
+                "INSERT INTO buckets (name, tokens, updated, blocked_until) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until)",
+                (self.name, time.time(), until),
+            )
+
+    def _try_take(self) -> float:
+        """Takes a token if possible. Returns 0 on success, else the time to wait before retrying."""
+        if self.rate <= 0:
+            return self._blocked_wait()
+        with self._lock:
+            # IMMEDIATE: the read-modify-write is atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated, blocked_until FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated, blocked_until = row if row else (float(self.burst), now, 0.0)
+
+                if blocked_until > now:
+                    return blocked_until - now
+
+                tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)",
+                    (self.name, tokens, now, blocked_until),
+                )
+                return wait
+            finally:
+                self._conn.commit()
+
+    def _blocked_wait(self) -> float:
+        """Unthrottled bucket: time left on the shared pause, re-read at most every BLOCK_REFRESH."""
+        with self._lock:
+            now = time.time()
+            if now - self._checked >= BLOCK_REFRESH:
+                row = self._conn.execute("SELECT blocked_until FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                self._blocked_until = max(self._blocked_until, row[0] if row else 0.0)
+                self._checked = now
+            return max(0.0, self._blocked_until - now)
+
+    def close(self):
+        self._conn.close()
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight requests (per process).
+    - Additive increase: every success raises the limit by 1/limit (about +1 per "round").
+    - Multiplicative decrease: congestion (429/5xx/timeouts) halves it, at most once per `cooldown`
+      so that a burst of failures from the same round only counts once.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, cooldown: float = 1.0):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.cooldown = cooldown
+        self.limit = float(self.maximum)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Holds one in-flight slot for the duration of the block."""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_congestion(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self._last_decrease = now
+
+
+class RateLimiter:
+    """
+    Per-provider throttling: shared token bucket (rate + burst), AIMD concurrency,
+    and Retry-After aware backoff with jitter.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, db_path: str, max_concurrency: int):
+        self.name = name
+        self.bucket = TokenBucket(name, rate, burst, db_path)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+
+    @contextmanager
+    def request(self):
+        """Waits for a concurrency slot and a token, then lets one request through."""
+        with self.concurrency.slot():
+            self.bucket.acquire()
+            yield
+
+    def on_success(self):
+        self.concurrency.on_success()
+
+    def on_congestion(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Records a throttled/failed request and returns how long to wait before retrying.
+        A Retry-After header pauses every consumer of the bucket, not only the caller.
+        """
+        self.concurrency.on_congestion()
+
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            # Small jitter so that all the waiting workers do not wake up at once
+            delay = min(delay, MAX_BACKOFF) + random.uniform(0, BACKOFF_BASE)
+            self.bucket.block(delay)
+            return delay
+
+        # "Equal jitter" exponential backoff
+        ceiling = min(BACKOFF_BASE * 2**attempt, MAX_BACKOFF)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delay in seconds or HTTP date). Returns None if absent/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _limits(name: str) -> Tuple[float, int]:
+    """(requests per second, burst) configured for a provider. Unknown providers are not throttled."""
+    limits = {
+        "google": (config.GOOGLE_RATE_LIMIT, config.GOOGLE_RATE_BURST),
+        "openlibrary": (config.OPENLIBRARY_RATE_LIMIT, config.OPENLIBRARY_RATE_BURST),
+    }
+    return limits.get(name, (0.0, 1))
+
+
+_registry: Dict[Tuple[str, str, int], RateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Returns the limiter shared by every provider instance of this process for the given API."""
+    key = (name, config.RATE_LIMIT_PATH, os.getpid())
+    with _registry_lock:
+        if key not in _registry:
+            rate, burst = _limits(name)
+            _registry[key] = RateLimiter(name, rate, burst, config.RATE_LIMIT_PATH, config.MAX_CONCURRENT_REQUESTS)
+        return _registry[key]
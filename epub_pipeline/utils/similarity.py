@@ -0,0 +1,166 @@
+import difflib
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from epub_pipeline import config
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8192)
+def normalize(text: str) -> str:
+    """Case-folded, NFKC-normalized text with collapsed whitespace (memoized: titles and names repeat a lot)."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+@lru_cache(maxsize=8192)
+def _sorted_tokens(text: str) -> str:
+    """Words of the normalized text without punctuation, sorted ("Herbert, Frank" -> "frank herbert")."""
+    return " ".join(sorted(_WORD.findall(text)))
+
+
+# --- Backends: ratio of two normalized strings ---
+
+
+class _Pattern:
+    """
+    A string compiled for bit-parallel LCS (Allison-Dix / Hyyrö): one bit mask per character.
+    Comparing it against a string of length n costs n big-integer operations.
+    """
+
+    __slots__ = ("length", "masks", "full")
+
+    def __init__(self, text: str):
+        self.length = len(text)
+        self.full = (1 << self.length) - 1
+        self.masks: Dict[str, int] = {}
+        for i, char in enumerate(text):
+            self.masks[char] = self.masks.get(char, 0) | (1 << i)
+
+    def lcs(self, other: str) -> int:
+        """Length of the longest common subsequence with `other`."""
+        v = self.full
+        masks = self.masks
+        for char in other:
+            u = v & masks.get(char, 0)
+            v = ((v + u) | (v - u)) & self.full
+        return self.length - v.bit_count()
+
+
+_compile = lru_cache(maxsize=4096)(_Pattern)
+
+
+def indel_ratio(a: str, b: str) -> float:
+    """Normalized Indel similarity: 2 * LCS / (len(a) + len(b)), i.e. 1 - insertions and deletions needed."""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    return 2 * _compile(a).lcs(b) / total
+
+
+def difflib_ratio(a: str, b: str) -> float:
+    """difflib.SequenceMatcher ratio (the default; slower, slightly lower on long strings)."""
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+# Selected with config.SIMILARITY_BACKEND
+BACKENDS: Dict[str, Callable[[str, str], float]] = {"indel": indel_ratio, "difflib": difflib_ratio}
+
+
+def _ratio() -> Callable[[str, str], float]:
+    return BACKENDS.get(config.SIMILARITY_BACKEND, difflib_ratio)
+
+
+# --- Scorers: raw strings in, 0.0-1.0 out ---
+
+
+def similarity(a: str, b: str) -> float:
+    """Case-insensitive similarity ratio. 0.0 when either string is empty."""
+    if not a or not b:
+        return 0.0
+    a, b = normalize(a), normalize(b)
+    if a == b:
+        return 1.0
+    return _ratio()(a, b)
+
+
+def token_sort_ratio(a: str, b: str) -> float:
+    """Similarity of the words in alphabetical order: insensitive to word order and punctuation."""
+    if not a or not b:
+        return 0.0
+    a, b = _sorted_tokens(normalize(a)), _sorted_tokens(normalize(b))
+    if not a or not b:
+        return 0.0
+    return 1.0 if a == b else _ratio()(a, b)
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Person names: the best of the plain ratio and the word-order insensitive one ("Herbert, Frank")."""
+    return max(similarity(a, b), token_sort_ratio(a, b))
+
+
+# --- Batch scoring ---
+
+
+def _upper_bound(a: str, b: str) -> float:
+    """No ratio of the backends can exceed this (all characters of the shorter string matched)."""
+    return 2 * min(len(a), len(b)) / (len(a) + len(b))
+
+
+def score_batch(query: str, choices: Iterable[str]) -> List[float]:
+    """`similarity(query, choice)` for every choice, with the query normalized (and compiled) once."""
+    if not query:
+        return [0.0 for _ in choices]
+    query = normalize(query)
+    ratio = _ratio()
+    scores = []
+    for choice in choices:
+        choice = normalize(choice) if choice else ""
+        if not choice:
+            scores.append(0.0)
+        else:
+            scores.append(1.0 if choice == query else ratio(query, choice))
+    return scores
+
+
+def best_name_similarity(local: Iterable[str], remote: Iterable[str]) -> Tuple[float, int, int]:
+    """
+    Best `name_similarity` between any local and any remote name (e.g. two author lists).
+    Names are deduplicated after normalization, pairs that cannot beat the current best are skipped,
+    and an exact match ends the search.
+    Returns (score, local index, remote index); indexes are -1 when nothing matched.
+    """
+    local_keys: Dict[str, int] = {}
+    for i, name in enumerate(local):
+        if name:
+            local_keys.setdefault(normalize(name), i)
+    remote_keys: Dict[str, int] = {}
+    for j, name in enumerate(remote):
+        if name:
+            remote_keys.setdefault(normalize(name), j)
+
+    best, best_pair = 0.0, (-1, -1)
+    # Exact matches first: common case, and no ratio is computed at all
+    for key, i in local_keys.items():
+        if key in remote_keys:
+            return 1.0, i, remote_keys[key]
+
+    ratio = _ratio()
+    local_sorted = [(key, _sorted_tokens(key), i) for key, i in local_keys.items()]
+    remote_sorted = [(key, _sorted_tokens(key), j) for key, j in remote_keys.items()]
+    for l_key, l_tokens, i in local_sorted:
+        for r_key, r_tokens, j in remote_sorted:
+            if l_tokens and l_tokens == r_tokens:
+                return 1.0, i, j
+            if _upper_bound(l_key, r_key) <= best and (
+                not l_tokens or not r_tokens or _upper_bound(l_tokens, r_tokens) <= best
+            ):
+                continue
+            score = ratio(l_key, r_key)
+            if l_tokens and r_tokens:
+                score = max(score, ratio(l_tokens, r_tokens))
+            if score > best:
+                best, best_pair = score, (i, j)
+    return best, best_pair[0], best_pair[1]
@@ -0,0 +1,19 @@
+import os
+import sqlite3
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database configured for the pipeline's local stores.
+    - WAL journal: readers never block the writer, safe across processes.
+    - Busy timeout: concurrent writers wait for the lock instead of failing.
+    - Not bound to the creating thread: callers serialize access with their own lock.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -1,17 +1,16 @@
-import difflib
 import re
 import unicodedata
 
+from epub_pipeline.utils.similarity import similarity
+
 
 def get_similarity(s1, s2):
     """
-    Calculates the Levenshtein similarity ratio between two strings.
+    Calculates the similarity ratio between two strings (backend: config.SIMILARITY_BACKEND).
     Returns a float between 0.0 (no match) and 1.0 (perfect match).
     Case-insensitive.
     """
-    if not s1 or not s2:
-        return 0.0
-    return difflib.SequenceMatcher(None, s1.lower(), s2.lower()).ratio()
+    return similarity(s1, s2)
 
 
 def sanitize_filename(value):
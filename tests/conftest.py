@@ -0,0 +1,108 @@
+import zipfile
+
+import pytest
+
+from epub_pipeline import config
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+OPF_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="bookid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:identifier id="bookid">{uid}</dc:identifier>
+    <dc:title>{title}</dc:title>
+{creators}
+    <dc:language>en</dc:language>
+{extra}
+  </metadata>
+  <manifest>
+    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+{items}
+  </manifest>
+  <spine toc="ncx">
+{itemrefs}
+  </spine>
+</package>
+"""
+
+NCX_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <head><meta name="dtb:uid" content="{uid}"/></head>
+  <docTitle><text>{title}</text></docTitle>
+  <navMap>
+{points}
+  </navMap>
+</ncx>
+"""
+
+CHAPTER_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Chapter {n}</title></head>
+<body><h1>Chapter {n}</h1><p>{title}. Some text here. And another sentence!</p></body>
+</html>
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    """Tests never read or write the user's caches and state databases."""
+    data_dir = tmp_path / "data_dir"
+    monkeypatch.setattr(config, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(config, "STATE_DB_PATH", str(data_dir / "state.sqlite"))
+    monkeypatch.setattr(config, "HTTP_CACHE_PATH", str(data_dir / "http_cache.sqlite"))
+    monkeypatch.setattr(config, "RATE_LIMIT_PATH", str(data_dir / "rate_limits.sqlite"))
+    monkeypatch.setattr(config, "CATALOG_DB_PATH", str(data_dir / "catalog.sqlite"))
+    monkeypatch.setattr(config, "FINGERPRINT_DB_PATH", str(data_dir / "fingerprints.sqlite"))
+    monkeypatch.setattr(config, "LOCAL_INDEX_PATH", str(data_dir / "openlibrary_index.sqlite"))
+    monkeypatch.setattr(config, "CACHE_MODE", "off")
+
+
+@pytest.fixture
+def make_epub(tmp_path):
+    """Factory writing a small but valid EPUB 2 file on disk."""
+
+    def _make(name="book.epub", title="Dune", authors=("Frank Herbert",), isbn=None, directory=None, chapters=1):
+        uid = f"id-{name}"
+        creators = "\n".join(f'    <dc:creator opf:role="aut">{a}</dc:creator>' for a in authors)
+        extra = f'    <dc:identifier opf:scheme="ISBN">{isbn}</dc:identifier>' if isbn else ""
+        ids = [f"chap_{i + 1}" for i in range(chapters)]
+        items = "\n".join(f'    <item id="{i}" href="{i}.xhtml" media-type="application/xhtml+xml"/>' for i in ids)
+        itemrefs = "\n".join(f'    <itemref idref="{i}"/>' for i in ids)
+        points = "\n".join(
+            f'    <navPoint id="np_{n}" playOrder="{n}"><navLabel><text>Chapter {n}</text></navLabel>'
+            f'<content src="{i}.xhtml"/></navPoint>'
+            for n, i in enumerate(ids, start=1)
+        )
+
+        path = (directory or tmp_path) / name
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            zf.writestr("META-INF/container.xml", CONTAINER_XML, compress_type=zipfile.ZIP_DEFLATED)
+            zf.writestr(
+                "OEBPS/content.opf",
+                OPF_TEMPLATE.format(
+                    uid=uid, title=title, creators=creators, extra=extra, items=items, itemrefs=itemrefs
+                ),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+            zf.writestr(
+                "OEBPS/toc.ncx",
+                NCX_TEMPLATE.format(uid=uid, title=title, points=points),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+            for n, i in enumerate(ids, start=1):
+                zf.writestr(
+                    f"OEBPS/{i}.xhtml",
+                    CHAPTER_TEMPLATE.format(n=n, title=title),
+                    compress_type=zipfile.ZIP_DEFLATED,
+                )
+        return str(path)
+
+    return _make
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from benchmarks.library import generate_library
+from benchmarks.run import run_suite
+from benchmarks.standin import ApiProfile, Latency, StandInServer, fixture_records
+from benchmarks.throughput import run
+from epub_pipeline import config
+from epub_pipeline.pipeline.metadata_reader import OpfReader
+from epub_pipeline.search.providers.google import GoogleBooksProvider
+from epub_pipeline.search.providers.openlibrary import OpenLibraryProvider
+
+
+def test_library_is_reproducible(tmp_path):
+    first = generate_library(str(tmp_path / "a"), 6, "messy", seed=3, chapters=2)
+    second = generate_library(str(tmp_path / "b"), 6, "messy", seed=3, chapters=2)
+
+    strip = [{k: v for k, v in spec.items() if k != "path"} for spec in first]
+    assert strip == [{k: v for k, v in spec.items() if k != "path"} for spec in second]
+
+
+def test_library_quirks_are_readable(tmp_path):
+    specs = generate_library(str(tmp_path), 30, "messy", seed=0, chapters=1, image_kb=1, cover_kb=1)
+
+    for spec in specs:
+        meta = OpfReader(spec["path"]).get_curated_metadata()
+        assert meta["title"] == spec["title"]
+        if "isbn-in-filename" in spec["quirks"] or "missing-isbn" not in spec["quirks"]:
+            assert meta["isbn"] == spec["true_isbn"]
+        else:
+            assert meta["isbn"] is None
+
+
+def test_unknown_shape_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        generate_library(str(tmp_path), 1, "huge")
+
+
+def test_report_is_machine_readable():
+    report = run_suite(["confidence.calculate", "text.sanitize_filename"], books=2, shape="tiny", seed=0, repeat=2)
+
+    assert report["params"] == {"books": 2, "shape": "tiny", "seed": 0, "repeat": 2, "jobs": 1}
+    assert set(report["results"]) == {"confidence.calculate", "text.sanitize_filename"}
+    result = report["results"]["confidence.calculate"]
+    assert result["runs"] == 2 and 0 < result["min"] <= result["median"]
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """Stand-in APIs serving a small fixture catalog; the providers point at it."""
+    records = fixture_records(5, seed=1)
+    with StandInServer(records) as server:
+        monkeypatch.setattr(config, "GOOGLE_API_URL", server.google_url)
+        monkeypatch.setattr(config, "OPENLIBRARY_URL", server.openlibrary_url)
+        monkeypatch.setattr(config, "GOOGLE_RATE_LIMIT", 0.0)
+        monkeypatch.setattr(config, "OPENLIBRARY_RATE_LIMIT", 0.0)
+        yield server, records
+
+
+def test_standin_serves_fixtures_to_the_providers(standin):
+    server, records = standin
+    book = records[0]
+    meta = {"title": book["title"], "authors": book["authors"], "publisher": "Other", "date": book["date"]}
+
+    google, openlibrary = GoogleBooksProvider(), OpenLibraryProvider()
+
+    assert google.get_by_isbn(book["isbn"])[0]["title"] == book["title"]
+    assert openlibrary.get_by_isbn(book["isbn"])[0]["title"] == book["title"]
+    # Strict queries filter on publisher and year, like the waterfall expects
+    assert google.search_by_text(meta, {"pub": True, "year": True}) == (None, 0)
+    assert google.search_by_text(meta, {"pub": False, "year": True})[0]["title"] == book["title"]
+    assert openlibrary.search_by_text(meta, {})[0]["authors"] == book["authors"]
+    assert server.stats()["google"] == {"requests": 3, "200": 3}
+
+
+def test_standin_injects_faults(standin, mocker):
+    server, records = standin
+    server.profiles["google"] = ApiProfile(rate_429=1.0, retry_after=0)
+    mocker.patch("epub_pipeline.search.provider.time.sleep")
+
+    assert GoogleBooksProvider().get_by_isbn(records[0]["isbn"]) == (None, 0)
+    assert server.stats()["google"] == {"requests": config.MAX_RETRIES, "429": config.MAX_RETRIES}
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+
+    assert Latency("fixed:20").sample(rng) == 0.02
+    assert 0.01 <= Latency("uniform:10:30").sample(rng) <= 0.03
+    assert Latency("none").sample(rng) == 0
+    with pytest.raises(ValueError):
+        Latency("gamma:1")
+
+
+def test_throughput_report_by_strategy():
+    result = run(books=12, concurrency=4, seed=0, profiles={}, request_timeout=1.0)["results"]
+
+    assert result["overall"]["books"] == 12
+    assert sum(row["books"] for row in result["strategies"].values()) == 12
+    assert "ISBN (Google Books)" in result["strategies"]
+    assert result["strategies"]["None"]["calls_per_book"] >= 8  # Every text attempt of both providers
@@ -1,6 +1,11 @@
+import time
 from unittest.mock import MagicMock
 
-from epub_pipeline.search.book_finder import find_book
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.search.book_finder import find_book, pick_best
+from epub_pipeline.search.provider import MetadataProvider
 from epub_pipeline.search.providers.google import GoogleBooksProvider
 
 
@@ -17,12 +22,12 @@ def test_find_book_waterfall_fallback(mocker):
     # Scenario: ISBN fails, Text search succeeds on second attempt
     mock_provider.get_by_isbn.return_value = (None, 0)
 
-    # search_by_text side effects:
+    # search_candidates side effects:
     # 1. Full context -> None
     # 2. No publisher -> Match!
-    mock_provider.search_by_text.side_effect = [
-        (None, 0),
-        ({"title": "Found", "authors": ["Me"]}, 1),
+    mock_provider.search_candidates.side_effect = [
+        ([], 0),
+        ([{"title": "Found", "authors": ["Me"]}], 1),
     ]
 
     mocker.patch("epub_pipeline.search.book_finder.get_providers", return_value=[mock_provider])
@@ -36,4 +41,95 @@ def test_find_book_waterfall_fallback(mocker):
     # Ensure ISBN was called
     mock_provider.get_by_isbn.assert_called()
     # Ensure text search was called multiple times
-    assert mock_provider.search_by_text.call_count == 2
+    assert mock_provider.search_candidates.call_count == 2
+
+
+def test_find_book_scores_every_candidate(mocker):
+    mock_provider = MagicMock(spec=GoogleBooksProvider)
+    mock_provider.name = "MockProvider"
+    # A poor first hit: the real book comes second
+    mock_provider.search_candidates.return_value = (
+        [
+            {"title": "Summary and Analysis of Dune", "authors": ["Editorial Staff"]},
+            {"title": "Dune", "authors": ["Frank Herbert"]},
+        ],
+        2,
+    )
+
+    result, conf, strategy = find_book({"title": "Dune", "authors": ["Frank Herbert"]}, [mock_provider])
+
+    assert result["authors"] == ["Frank Herbert"]
+    assert strategy == "Text MockProvider (Full context)"
+    # Found by the first query: no relaxed query needed
+    assert mock_provider.search_candidates.call_count == 1
+
+
+def test_pick_best_keeps_provider_order_on_ties():
+    candidates = [{"title": "Dune", "authors": ["Frank Herbert"], "provider_id": str(i)} for i in range(3)]
+
+    data, conf, _ = pick_best({"title": "Dune", "authors": ["Frank Herbert"]}, candidates, 3)
+
+    assert data["provider_id"] == "0" and conf == 90
+
+
+class ScriptedProvider(MetadataProvider):
+    """Answers text queries from a script keyed by (publisher, year) filters; records the queries sent."""
+
+    def __init__(self, name, script):
+        super().__init__()
+        self._name = name
+        self.script = script
+        self.queries = []
+
+    @property
+    def name(self):
+        return self._name
+
+    def get_by_isbn(self, isbn):
+        return None, 0
+
+    def text_query(self, meta, context):
+        # Like the real providers: the filters only change the request when the book has the field
+        return (context.get("pub", False) and bool(meta.get("publisher")), context.get("year", False))
+
+    def search_candidates(self, meta, context):
+        query = self.text_query(meta, context)
+        self.queries.append(query)
+        time.sleep(0.01 * len(self.queries))  # Later answers come first when sent at once
+        return self.script.get(query, ([], 0))
+
+
+HIT = ([{"title": "Dune", "authors": ["Frank Herbert"]}], 1)
+WEAK = ([{"title": "Dune Messiah: A Study Guide", "authors": ["Editorial Staff"]}], 1)
+
+
+@pytest.mark.parametrize(
+    "google, openlibrary",
+    [
+        ({(True, True): HIT}, {}),
+        ({(False, True): HIT, (True, True): WEAK}, {(True, True): HIT}),
+        ({(False, False): HIT}, {(True, True): HIT}),
+        ({}, {(False, True): HIT}),
+        ({(True, True): WEAK}, {}),
+    ],
+)
+def test_speculative_waterfall_matches_sequential(monkeypatch, google, openlibrary):
+    meta = {"title": "Dune", "authors": ["Frank Herbert"], "publisher": "Chilton", "date": "1965"}
+
+    def search(speculative):
+        monkeypatch.setattr(config, "SPECULATIVE_SEARCH", speculative)
+        providers = [ScriptedProvider("Google Books", google), ScriptedProvider("OpenLibrary", openlibrary)]
+        return find_book(meta, providers)
+
+    assert search(True) == search(False)
+
+
+def test_speculative_waterfall_sends_identical_queries_once(monkeypatch):
+    monkeypatch.setattr(config, "SPECULATIVE_SEARCH", True)
+    provider = ScriptedProvider("Google Books", {(False, False): HIT})
+
+    # No publisher: "No publisher" is the same request as "Full context", "Basic" the same as "No year"
+    result, conf, strategy = find_book({"title": "Dune", "authors": ["Frank Herbert"], "date": "1965"}, [provider])
+
+    assert strategy == "Text Google Books (No year)"
+    assert sorted(provider.queries) == [(False, False), (False, True)]
@@ -0,0 +1,94 @@
+import os
+
+from epub_pipeline import config
+from epub_pipeline.pipeline import catalog as catalog_module
+from epub_pipeline.pipeline.catalog import NO_METADATA, LibraryCatalog
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+
+
+def test_catalog_records_metadata_and_errors(make_epub, tmp_path):
+    book = make_epub(isbn="9780441172719")
+    broken = tmp_path / "broken.epub"
+    broken.write_bytes(b"not a zip")
+
+    catalog = LibraryCatalog(config.CATALOG_DB_PATH)
+    counts = catalog.update([book, str(broken)])
+
+    assert counts == {"parsed": 2, "unchanged": 0, "removed": 0, "errors": 1}
+    meta, error = catalog.lookup(book)
+    assert error is None
+    assert (meta["title"], meta["authors"], meta["isbn"], meta["language"]) == (
+        "Dune",
+        ["Frank Herbert"],
+        "9780441172719",
+        "en",
+    )
+    meta, error = catalog.lookup(str(broken))
+    assert meta is None and error.startswith("BadZipFile")
+
+
+def test_catalog_builds_are_incremental(make_epub, tmp_path, mocker):
+    library = tmp_path / "library"
+    library.mkdir()
+    paths = [make_epub("a.epub", directory=library), make_epub("b.epub", title="Emma", directory=library)]
+    catalog = LibraryCatalog(config.CATALOG_DB_PATH)
+    catalog.update(paths, root=str(library))
+
+    worker = mocker.spy(catalog_module, "catalog_worker")
+    assert catalog.update(paths, root=str(library))["parsed"] == 0
+    worker.assert_not_called()
+
+    # One book re-tagged, the other deleted
+    make_epub("a.epub", title="Dune Messiah", directory=library)
+    os.utime(paths[0], (1, 1))
+    os.remove(paths[1])
+    counts = catalog.update(paths[:1], root=str(library))
+
+    assert (counts["parsed"], counts["removed"]) == (1, 1)
+    assert catalog.lookup(paths[0])[0]["title"] == "Dune Messiah"
+    assert [path for path, _, _ in catalog.entries(str(library))] == [os.path.abspath(paths[0])]
+
+
+def test_catalog_keeps_files_left_out_of_a_run(make_epub, tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    paths = [make_epub("a.epub", directory=library), make_epub("b.epub", title="Emma", directory=library)]
+    catalog = LibraryCatalog(config.CATALOG_DB_PATH)
+    catalog.update(paths, root=str(library))
+
+    # b.epub still exists, it is only filtered out of this run
+    assert catalog.update(paths[:1], root=str(library))["removed"] == 0
+    assert catalog.lookup(paths[1])[0]["title"] == "Emma"
+
+
+def test_catalog_parses_in_worker_processes(make_epub, monkeypatch):
+    monkeypatch.setattr(catalog_module, "MIN_FILES_PER_WORKER", 1)
+    paths = [make_epub(f"{n}.epub", title=f"Book {n}") for n in range(4)]
+
+    catalog = LibraryCatalog(config.CATALOG_DB_PATH)
+    assert catalog.update(paths, jobs=2)["parsed"] == 4
+    assert [catalog.lookup(path)[0]["title"] for path in paths] == [f"Book {n}" for n in range(4)]
+
+
+def test_pipeline_reads_metadata_from_catalog(make_epub, tmp_path, monkeypatch, mocker):
+    library = tmp_path / "library"
+    library.mkdir()
+    make_epub("a.epub", directory=library)
+    make_epub("b.epub", title="Emma", directory=library)
+    (library / "c.epub").write_bytes(b"not a zip")
+    monkeypatch.chdir(tmp_path)
+    searched = []
+
+    def fake_find_book(meta, providers=None):
+        searched.append(meta["title"])
+        return None, 0, "None"
+
+    monkeypatch.setattr("epub_pipeline.pipeline.orchestrator.find_book", fake_find_book)
+    read_opf = mocker.patch("epub_pipeline.pipeline.engine.OpfReader")
+
+    orch = PipelineOrchestrator(enable_kepub=False, enable_upload=False, catalog=True)
+    orch.process_directory(str(library))
+
+    assert sorted(searched) == ["Dune", "Emma"]
+    read_opf.assert_not_called()
+    assert orch.catalog.lookup(str(library / "c.epub"))[1] != NO_METADATA
@@ -1,5 +1,7 @@
 from unittest.mock import patch
 
+import pytest
+
 from epub_pipeline import config
 from epub_pipeline.cli import main
 
@@ -7,7 +9,7 @@ from epub_pipeline.cli import main
 def test_cli_file(mocker):
     test_args = ["epubpipe", "book.epub", "-v", "--no-upload"]
     with patch("sys.argv", test_args):
-        with patch("epub_pipeline.cli.PipelineOrchestrator") as mock_cls:
+        with patch("epub_pipeline.pipeline.orchestrator.PipelineOrchestrator") as mock_cls:
             with patch("os.path.isfile", return_value=True):
                 main()
 
@@ -26,13 +28,26 @@ def test_cli_file(mocker):
 def test_cli_directory(mocker):
     test_args = ["epubpipe", "data/", "--auto"]
     with patch("sys.argv", test_args):
-        with patch("epub_pipeline.cli.PipelineOrchestrator") as mock_cls:
+        with patch("epub_pipeline.pipeline.orchestrator.PipelineOrchestrator") as mock_cls:
             with patch("os.path.isfile", return_value=False):
                 with patch("os.path.isdir", return_value=True):
                     main()
                     mock_cls.return_value.process_directory.assert_called_with("data/")
 
 
+def test_cli_scan_filters(mocker):
+    test_args = ["epubpipe", "data/", "--exclude", "*.tmp", "--min-size", "10", "--newer-than", "2024-01-31"]
+    with patch("sys.argv", test_args):
+        with patch("epub_pipeline.pipeline.orchestrator.PipelineOrchestrator") as mock_cls:
+            with patch("os.path.isfile", return_value=False):
+                with patch("os.path.isdir", return_value=True):
+                    main()
+                    scanner = mock_cls.call_args.kwargs["scanner"]
+                    assert scanner.exclude == ["*.tmp"]
+                    assert scanner.min_size == 10
+                    assert scanner.newer_than is not None
+
+
 def test_cli_error(mocker):
     # Test file not found
     with patch("sys.argv", ["epubpipe", "ghost.epub"]):
@@ -41,3 +56,13 @@ def test_cli_error(mocker):
                 with patch("epub_pipeline.cli.Logger.error") as mock_err:
                     main()
                     mock_err.assert_called()
+
+
+@pytest.mark.parametrize("jobs", ["0", "-2", "two"])
+def test_cli_rejects_invalid_jobs(jobs, capsys):
+    with patch("sys.argv", ["epubpipe", "data/", "--jobs", jobs]):
+        with patch("epub_pipeline.pipeline.orchestrator.PipelineOrchestrator") as mock_cls:
+            with pytest.raises(SystemExit):
+                main()
+            mock_cls.assert_not_called()
+    assert "--jobs" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+import threading
+
+import httplib2
+import pytest
+from google.oauth2.credentials import Credentials
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.drive_uploader import DriveUploader
+
+
+@pytest.fixture
+def drive(monkeypatch, mocker):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", "folder-id")
+    # Building the client must never reach the network
+    mocker.patch.object(httplib2.Http, "request", side_effect=AssertionError("network access"))
+    return mocker.patch.object(DriveUploader, "_authenticate", return_value=Credentials(token="token"))
+
+
+def test_construction_does_not_authenticate(drive):
+    uploader = DriveUploader()
+
+    assert uploader.enable_upload
+    drive.assert_not_called()
+
+
+def test_client_built_once_from_static_discovery(drive):
+    uploader = DriveUploader()
+    services = []
+
+    threads = [threading.Thread(target=lambda: services.append(uploader.service)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    drive.assert_called_once()
+    assert len(services) == 8 and all(service is services[0] for service in services)
+    assert services[0] is not None
+
+
+def test_each_request_gets_its_own_connection(drive):
+    files = DriveUploader().service.files()
+
+    first, second = files.create(body={"name": "a.epub"}), files.create(body={"name": "b.epub"})
+
+    assert first.http is not second.http
+
+
+def test_failed_authentication_is_not_retried(drive):
+    drive.return_value = None
+    uploader = DriveUploader()
+
+    assert uploader.service is None
+    assert uploader.upload_to_drive(__file__) is False
+    drive.assert_called_once()
+
+
+def test_disabled_uploads_never_authenticate(drive, monkeypatch):
+    monkeypatch.setattr(config, "DRIVE_FOLDER_ID", None)
+    uploader = DriveUploader()
+
+    assert uploader.service is None
+    drive.assert_not_called()
+
+
+def test_run_without_upload_never_authenticates(drive, tmp_path):
+    from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+
+    broken = tmp_path / "broken.epub"
+    broken.write_bytes(b"not a zip")
+    # Unreadable: the file is skipped long before the upload stage
+    PipelineOrchestrator(enable_kepub=False).process_file(str(broken))
+
+    drive.assert_not_called()
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import pytest
+
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+from epub_pipeline.utils.logger import Logger
+
+
+def fake_find_book(meta, providers=None):
+    return {"title": f"{meta['title']} Remastered", "authors": ["New Author"], "publishedDate": "2001"}, 95, "ISBN"
+
+
+@pytest.fixture
+def library(tmp_path, make_epub):
+    src = tmp_path / "library"
+    src.mkdir()
+    for i, title in enumerate(["Dune", "Emma", "Ulysses"]):
+        make_epub(f"book_{i}.epub", title=title, directory=src)
+    return src
+
+
+def run_pipeline(tmp_path, monkeypatch, library, jobs):
+    out = tmp_path / f"run_{jobs}"
+    out.mkdir()
+    monkeypatch.chdir(out)
+    monkeypatch.setattr("epub_pipeline.pipeline.orchestrator.find_book", fake_find_book)
+
+    orch = PipelineOrchestrator(auto_save=True, enable_kepub=False, enable_upload=False, jobs=jobs)
+    orch.process_directory(str(library))
+    return sorted(os.listdir(out / "output"))
+
+
+def test_concurrent_run_matches_serial(tmp_path, monkeypatch, library):
+    serial = run_pipeline(tmp_path, monkeypatch, library, jobs=1)
+    concurrent = run_pipeline(tmp_path, monkeypatch, library, jobs=2)
+
+    assert serial == [
+        "dune-remastered_new-author_2001.epub",
+        "emma-remastered_new-author_2001.epub",
+        "ulysses-remastered_new-author_2001.epub",
+    ]
+    assert concurrent == serial
+    # Sources are never modified
+    assert sorted(os.listdir(library)) == ["book_0.epub", "book_1.epub", "book_2.epub"]
+
+
+def test_logger_capture(capsys):
+    with Logger.capture() as lines:
+        Logger.info("buffered")
+    assert capsys.readouterr().out == ""
+
+    Logger.replay(lines)
+    assert "buffered" in capsys.readouterr().out
+
+
+def test_prefetch_searches_ahead_of_prompts(tmp_path, monkeypatch, library):
+    monkeypatch.chdir(tmp_path)
+    searched = []
+    all_searched = threading.Event()
+    prompts_waited = []
+
+    def tracking_find_book(meta, providers=None):
+        searched.append(meta["title"])
+        if len(searched) == 3:
+            all_searched.set()
+        return fake_find_book(meta)
+
+    def answer(prompt):
+        # The next books are looked up while this prompt is shown
+        prompts_waited.append(all_searched.wait(timeout=5))
+        return "y"
+
+    monkeypatch.setattr("epub_pipeline.pipeline.orchestrator.find_book", tracking_find_book)
+    monkeypatch.setattr("builtins.input", answer)
+    # Low confidence: every file requires a confirmation
+    monkeypatch.setattr("epub_pipeline.config.CONFIDENCE_THRESHOLD_HIGH", 100)
+
+    orch = PipelineOrchestrator(enable_kepub=False, enable_upload=False, prefetch=2)
+    orch.process_directory(str(library))
+
+    assert prompts_waited == [True, True, True]
+    # Writes still happened after each approval
+    assert len(os.listdir(tmp_path / "output")) == 3
@@ -1,9 +1,11 @@
 from unittest.mock import MagicMock
 
+from epub_pipeline import config
 from epub_pipeline.pipeline.epub_manager import EpubManager
 
 
-def test_save_metadata_cleanup(mocker):
+def test_save_metadata_cleanup(mocker, monkeypatch):
+    monkeypatch.setattr(config, "SURGICAL_SAVE", False)
     mocker.patch("ebooklib.epub.read_epub")
     mock_write = mocker.patch("ebooklib.epub.write_epub")
 
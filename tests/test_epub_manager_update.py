@@ -1,10 +1,12 @@
 from unittest.mock import MagicMock
 
+from epub_pipeline import config
 from epub_pipeline.pipeline.epub_manager import EpubManager
 
 
-def test_update_metadata_logic(mocker):
+def test_update_metadata_logic(mocker, monkeypatch):
     # Mock ebooklib
+    monkeypatch.setattr(config, "SURGICAL_SAVE", False)
     mocker.patch("ebooklib.epub.read_epub")
 
     manager = EpubManager("test.epub")
@@ -0,0 +1,177 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.epub_manager import EpubManager, load_ebooklib
+from epub_pipeline.pipeline.epub_writer import SurgicalSaveError, SurgicalWriter
+from epub_pipeline.pipeline.metadata_reader import OpfReader
+
+NEW_DATA = {
+    "title": "Dune (Deluxe Edition)",
+    "authors": ["Frank Herbert"],
+    "publisher": "Ace & Sons",
+    "publishedDate": "1990",
+    "description": "Spice <must> flow",
+    "categories": ["SF", "Classic"],
+    "industryIdentifiers": [{"type": "ISBN_13", "identifier": "9780441172719"}],
+}
+
+
+def _jpeg(color):
+    output = io.BytesIO()
+    Image.new("RGB", (10, 10), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def _raw_members(path):
+    """(name, compression, crc, compressed bytes) of every member, in archive order."""
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        members = []
+        for info in archive.infolist():
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = int.from_bytes(f.read(2), "little"), int.from_bytes(f.read(2), "little")
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            members.append((info.filename, info.compress_type, info.CRC, f.read(info.compress_size)))
+        return members
+
+
+def _save(path, output, data=NEW_DATA, cover=None):
+    manager = EpubManager(path)
+    manager.update_metadata(data)
+    if cover:
+        manager.set_cover(cover)
+    manager.save(output)
+
+
+def test_surgical_save_keeps_members_byte_identical(make_epub, tmp_path):
+    source = make_epub(chapters=3)
+    output = str(tmp_path / "out.epub")
+
+    _save(source, output)
+
+    before, after = _raw_members(source), _raw_members(output)
+    assert [m[0] for m in after] == [m[0] for m in before]
+    assert after[0][:2] == ("mimetype", zipfile.ZIP_STORED)
+    for old, new in zip(before, after):
+        if old[0] != "OEBPS/content.opf":
+            assert new == old
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+
+
+def test_surgical_save_writes_metadata(make_epub, tmp_path):
+    source = make_epub(isbn="0441172717")
+    output = str(tmp_path / "out.epub")
+
+    _save(source, output)
+
+    meta = OpfReader(output).get_curated_metadata()
+    assert meta["title"] == "Dune (Deluxe Edition)"
+    assert meta["publisher"] == "Ace & Sons"
+    assert meta["date"] == "1990"
+    assert meta["tags"] == ["SF", "Classic"]
+
+    # EbookLib reads the same metadata back, and the manifest/spine are untouched
+    book = load_ebooklib().read_epub(output)
+    assert book.get_metadata("DC", "description")[0][0] == "Spice <must> flow"
+    assert [item.get_name() for item in book.get_items()] == [
+        item.get_name() for item in load_ebooklib().read_epub(source).get_items()
+    ]
+
+
+def test_surgical_save_never_loads_the_book(make_epub, tmp_path, mocker):
+    read_epub = mocker.spy(load_ebooklib(), "read_epub")
+    _save(make_epub(), str(tmp_path / "out.epub"))
+    read_epub.assert_not_called()
+
+
+def test_matches_full_rewrite(make_epub, tmp_path, monkeypatch):
+    source = make_epub(isbn="0441172717")
+    surgical, full = str(tmp_path / "surgical.epub"), str(tmp_path / "full.epub")
+
+    _save(source, surgical)
+    monkeypatch.setattr(config, "SURGICAL_SAVE", False)
+    _save(source, full)
+
+    surgical_meta, full_meta = OpfReader(surgical).get_curated_metadata(), OpfReader(full).get_curated_metadata()
+    assert {**surgical_meta, "filename": None} == {**full_meta, "filename": None}
+
+
+def test_in_place_save(make_epub):
+    source = make_epub()
+    _save(source, source)
+    assert OpfReader(source).get_curated_metadata()["title"] == "Dune (Deluxe Edition)"
+
+
+def test_mimetype_moved_first_and_stored(make_epub, tmp_path):
+    source = make_epub()
+    shuffled = str(tmp_path / "shuffled.epub")
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(shuffled, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in reversed(src.infolist()):
+            dst.writestr(info.filename, src.read(info))
+
+    output = str(tmp_path / "out.epub")
+    _save(shuffled, output)
+
+    with zipfile.ZipFile(output) as archive:
+        first = archive.infolist()[0]
+        assert (first.filename, first.compress_type) == ("mimetype", zipfile.ZIP_STORED)
+        assert archive.read("mimetype") == b"application/epub+zip"
+
+
+def test_cover_replaced_in_place(make_epub, tmp_path):
+    source = make_epub()
+    with_cover = str(tmp_path / "cover.epub")
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(with_cover, "w") as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == "OEBPS/content.opf":
+                data = data.replace(b"</metadata>", b'<meta name="cover" content="cover-img"/></metadata>')
+                data = data.replace(
+                    b"</manifest>", b'<item id="cover-img" href="images/cover.jpg" media-type="image/jpeg"/></manifest>'
+                )
+            dst.writestr(info, data)
+        dst.writestr("OEBPS/images/cover.jpg", _jpeg("red"))
+
+    output = str(tmp_path / "out.epub")
+    new_cover = _jpeg("blue")
+    _save(with_cover, output, cover=new_cover)
+
+    with zipfile.ZipFile(output) as archive:
+        assert archive.read("OEBPS/images/cover.jpg") == new_cover
+        assert archive.namelist() == zipfile.ZipFile(with_cover).namelist()
+
+
+def test_missing_cover_falls_back_to_full_rewrite(make_epub, tmp_path):
+    source = make_epub()
+    with pytest.raises(SurgicalSaveError):
+        SurgicalWriter.write(source, str(tmp_path / "x.epub"), {}, cover=_jpeg("blue"))
+
+    output = str(tmp_path / "out.epub")
+    _save(source, output, cover=_jpeg("blue"))
+    assert load_ebooklib().read_epub(output).get_item_with_id("cover-img") is not None
+
+
+def test_render_opf_declares_missing_namespaces():
+    opf = b"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata>
+    <meta name="old"/>
+  </metadata>
+  <manifest/>
+</package>"""
+    metadata = {
+        "http://purl.org/dc/elements/1.1/": {"title": [("A & B", {"{http://www.idpf.org/2007/opf}file-as": "B"})]},
+        "http://www.idpf.org/2007/opf": {"meta": [(None, {"name": "cover", "content": "img"})]},
+    }
+
+    rendered = SurgicalWriter.render_opf(opf, metadata, "2.0").decode()
+
+    assert 'xmlns:dc="http://purl.org/dc/elements/1.1/"' in rendered
+    assert '<dc:title opf:file-as="B">A &amp; B</dc:title>' in rendered
+    assert '<meta name="cover" content="img"/>' in rendered
+    assert 'name="old"' not in rendered
+    assert rendered.endswith("  </metadata>\n  <manifest/>\n</package>")
@@ -0,0 +1,133 @@
+import itertools
+import zipfile
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.pipeline import fingerprint as fingerprint_module
+from epub_pipeline.pipeline.fingerprint import FingerprintIndex, content_fingerprint
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+from epub_pipeline.pipeline.state_store import StateStore
+
+
+def _repack(source, target, title):
+    """Re-tagged, re-ordered and uncompressed copy of `source` (same content documents)."""
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(target, "w") as dst:
+        for info in reversed(src.infolist()):
+            data = src.read(info)
+            if info.filename.endswith(".opf"):
+                data = data.replace(b"<dc:title>Dune</dc:title>", f"<dc:title>{title}</dc:title>".encode())
+            dst.writestr(info.filename, data, compress_type=zipfile.ZIP_STORED)
+    return str(target)
+
+
+def _fake_search(monkeypatch):
+    searched = []
+
+    def fake_find_book(meta, providers=None):
+        searched.append(meta["filename"])
+        return None, 0, "None"
+
+    monkeypatch.setattr("epub_pipeline.pipeline.orchestrator.find_book", fake_find_book)
+    return searched
+
+
+def test_fingerprint_ignores_metadata_and_packing(make_epub, tmp_path):
+    original = make_epub(chapters=3)
+    copy = _repack(original, tmp_path / "copy.epub", "Dune (Retagged)")
+    other = make_epub("other.epub", title="Emma", chapters=3)
+
+    assert content_fingerprint(original) == content_fingerprint(copy)
+    assert content_fingerprint(original) != content_fingerprint(other)
+    assert content_fingerprint(str(tmp_path / "missing.epub")) is None
+
+
+def test_index_hashes_unchanged_files_once(make_epub, mocker):
+    paths = [make_epub("a.epub"), make_epub("b.epub", title="Emma")]
+    index = FingerprintIndex(config.FINGERPRINT_DB_PATH)
+    first = [index.fingerprint(path) for path in paths]
+
+    spy = mocker.spy(fingerprint_module, "content_fingerprint")
+    index = FingerprintIndex(config.FINGERPRINT_DB_PATH)
+    assert [index.fingerprint(path) for path in paths] == first
+    spy.assert_not_called()
+
+
+def test_deduplication_streams(make_epub, tmp_path):
+    # An endless scan: the first book comes out after a bounded look-ahead
+    first = make_epub("a.epub")
+    scan = itertools.chain([first], itertools.repeat(str(tmp_path / "missing.epub")))
+    assert next(PipelineOrchestrator(enable_upload=False)._deduplicate(scan)) == first
+
+
+def test_duplicates_are_searched_once(make_epub, tmp_path, monkeypatch):
+    library = tmp_path / "library"
+    library.mkdir()
+    original = make_epub("a.epub", directory=library)
+    _repack(original, library / "b.epub", "Dune (Retagged)")
+    make_epub("c.epub", title="Emma", directory=library)
+    monkeypatch.chdir(tmp_path)
+    searched = _fake_search(monkeypatch)
+
+    # Off by default: every copy is processed
+    PipelineOrchestrator(enable_kepub=False, enable_upload=False).process_directory(str(library))
+    assert sorted(searched) == ["a.epub", "b.epub", "c.epub"]
+
+    monkeypatch.setattr(config, "DEDUPLICATE", True)
+    searched.clear()
+    PipelineOrchestrator(enable_kepub=False, enable_upload=False).process_directory(str(library))
+    assert sorted(searched) == ["a.epub", "c.epub"]
+
+
+def test_duplicates_linked_to_processed_book(make_epub, tmp_path, monkeypatch):
+    library = tmp_path / "library"
+    library.mkdir()
+    original = make_epub("a.epub", directory=library)
+    copy = _repack(original, library / "b.epub", "Dune (Retagged)")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "DEDUPLICATE", True)
+    monkeypatch.setattr(
+        "epub_pipeline.pipeline.orchestrator.find_book",
+        lambda meta, providers=None: ({"title": "Dune", "authors": ["Frank Herbert"]}, 95, "ISBN"),
+    )
+
+    orch = PipelineOrchestrator(auto_save=True, enable_kepub=False, enable_upload=False, incremental=True)
+    orch.process_directory(str(library))
+
+    state = StateStore(config.STATE_DB_PATH)
+    assert state.get(copy)["output_name"] == state.get(original)["output_name"]
+    assert state.is_done(copy)
+
+    # A copy added later, elsewhere, is recognized without any lookup
+    later = tmp_path / "later"
+    later.mkdir()
+    _repack(original, later / "c.epub", "Dune")
+    searched = _fake_search(monkeypatch)
+    orch.process_directory(str(later))
+    assert searched == []
+    assert state.is_done(str(later / "c.epub"))
+
+
+@pytest.mark.parametrize("prefetch", [0, 1])  # Sequential loop, staged pipeline
+def test_copies_released_when_first_copy_fails(make_epub, tmp_path, monkeypatch, mocker, prefetch):
+    library = tmp_path / "library"
+    library.mkdir()
+    original = make_epub("a.epub", directory=library)
+    copy = _repack(original, library / "b.epub", "Dune (Retagged)")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "DEDUPLICATE", True)
+    monkeypatch.setattr(
+        "epub_pipeline.pipeline.orchestrator.find_book",
+        lambda meta, providers=None: ({"title": "Dune", "authors": ["Frank Herbert"]}, 95, "ISBN"),
+    )
+    mocker.patch.object(PipelineOrchestrator, "_finalize", return_value=None)
+
+    orch = PipelineOrchestrator(
+        auto_save=True, enable_kepub=False, enable_upload=False, incremental=True, prefetch=prefetch
+    )
+    orch.process_directory(str(library))
+
+    assert orch.duplicates == {}
+    assert orch.skipped_duplicates == {copy: "could not be written"}
+    # Not linked to anything: the next run processes it
+    assert not StateStore(config.STATE_DB_PATH).is_done(copy)
@@ -0,0 +1,28 @@
+from epub_pipeline import config
+from epub_pipeline.search.book_finder import get_providers
+from epub_pipeline.utils.http import create_session, get_session
+
+
+def test_create_session_pools(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_POOL_SIZE", 7)
+    session = create_session()
+    adapter = session.get_adapter("https://openlibrary.org")
+
+    assert adapter._pool_maxsize == 7
+    assert session.get_adapter("https://www.googleapis.com") is adapter
+    assert "gzip" in session.headers["Accept-Encoding"]
+
+
+def test_shared_session_is_reused():
+    assert get_session() is get_session()
+
+
+def test_providers_share_injected_session(requests_mock):
+    session = create_session(pool_size=2)
+    providers = get_providers(session=session)
+
+    assert providers and all(p.session is session for p in providers)
+
+    requests_mock.get("https://openlibrary.org/search.json", json={"docs": []})
+    providers[-1].search_by_text({"title": "Dune"}, {})
+    assert requests_mock.call_count == 1
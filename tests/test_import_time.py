@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+import pytest
+
+import epub_pipeline
+
+# Slow third-party imports that must stay out of the startup path
+HEAVY_DEPENDENCIES = ("googleapiclient", "google_auth_oauthlib", "PIL", "ebooklib", "requests")
+
+
+def _heavy_imports(statement):
+    """Runs `statement` in a fresh interpreter. Returns the heavy dependencies it left in sys.modules."""
+    script = f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return sorted({name.split(".")[0] for name in result.stdout.split()} & set(HEAVY_DEPENDENCIES))
+
+
+def test_cli_import_is_light():
+    assert _heavy_imports("import epub_pipeline.cli") == []
+
+
+def test_local_run_does_not_load_drive_or_image_libraries():
+    # Search needs requests, but a run without upload never touches Drive, and Pillow/EbookLib wait for a write
+    assert _heavy_imports("import epub_pipeline.pipeline.orchestrator") == ["requests"]
+
+
+def test_public_api_is_resolved_lazily():
+    for name in epub_pipeline.__all__:
+        assert getattr(epub_pipeline, name) is not None
+    assert "EpubManager" in dir(epub_pipeline)
+
+    with pytest.raises(AttributeError):
+        epub_pipeline.NotAThing  # noqa: B018
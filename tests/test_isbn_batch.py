@@ -0,0 +1,95 @@
+from urllib.parse import parse_qs, urlparse
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+from epub_pipeline.search.isbn_batch import isbn_variants, resolve_isbns
+from epub_pipeline.search.providers.openlibrary import OpenLibraryProvider
+from epub_pipeline.search.response_cache import ResponseCache
+
+BOOKS_API = "https://openlibrary.org/api/books"
+
+
+def _book(title):
+    return {"title": title, "authors": [{"name": "Author"}], "publishers": [{"name": "Pub"}]}
+
+
+def _batch_answer(request, context):
+    """Answers every requested bibkey except the ones ending with 0."""
+    bibkeys = parse_qs(urlparse(request.url).query)["bibkeys"][0].split(",")
+    return {key: _book(key) for key in bibkeys if not key.endswith("0")}
+
+
+def test_isbn_variants():
+    assert isbn_variants("0316769487") == ["0316769487", "9780316769488"]
+    assert isbn_variants("9780316769488") == ["9780316769488"]
+
+
+def test_openlibrary_batches_bibkeys(monkeypatch, requests_mock):
+    monkeypatch.setattr(config, "ISBN_BATCH_SIZE", 2)
+    adapter = requests_mock.get(BOOKS_API, json=_batch_answer)
+    isbns = ["9780000000001", "9780000000002", "9780000000010"]
+
+    results = OpenLibraryProvider().get_by_isbns(isbns)
+
+    assert adapter.call_count == 2
+    assert results["9780000000001"][0]["title"] == "ISBN:9780000000001"
+    assert results["9780000000010"] == (None, 0)
+
+
+def test_batch_seeds_single_isbn_cache(tmp_path, requests_mock):
+    requests_mock.get(BOOKS_API, json=_batch_answer)
+    provider = OpenLibraryProvider(cache=ResponseCache(str(tmp_path / "cache.sqlite")))
+    provider.get_by_isbns(["9780000000001", "9780000000010"])
+    calls = requests_mock.call_count
+
+    assert provider.get_by_isbn("9780000000001")[0]["title"] == "ISBN:9780000000001"
+    assert provider.get_by_isbn("9780000000010") == (None, 0)
+    assert requests_mock.call_count == calls
+
+
+def test_prefetched_providers_answer_without_requests(mocker):
+    openlibrary = mocker.Mock(BATCH_ISBNS=True, RATE_KEY="openlibrary")
+    openlibrary.name = "OpenLibrary"
+    openlibrary.get_by_isbns.return_value = {"9780000000001": ({"title": "Dune"}, 1), "9780000000002": (None, 0)}
+    # No multi-key endpoint: left alone, its lookups stay lazy
+    google = mocker.Mock(BATCH_ISBNS=False)
+
+    prefetched, lazy = resolve_isbns(["9780000000001", None, "9780000000002"], [openlibrary, google])
+
+    openlibrary.get_by_isbns.assert_called_once_with(["9780000000001", "9780000000002"])
+    assert prefetched.name == "OpenLibrary"
+    assert prefetched.get_by_isbn("9780000000001") == ({"title": "Dune"}, 1)
+    assert prefetched.get_by_isbn("9780000000002") == (None, 0)
+    openlibrary.get_by_isbn.assert_not_called()
+
+    prefetched.get_by_isbn("9789999999999")
+    openlibrary.get_by_isbn.assert_called_once_with("9789999999999")
+
+    assert lazy is google
+    google.get_by_isbns.assert_not_called()
+
+
+def test_directory_run_uses_prefetched_answers(tmp_path, make_epub, monkeypatch, mocker):
+    monkeypatch.setattr(config, "BATCH_ISBN_LOOKUP", True)
+    monkeypatch.setattr(config, "ISBN_BATCH_SIZE", 2)
+    monkeypatch.setattr(config, "API_SOURCE", "openlibrary")
+    for i in range(3):
+        make_epub(f"book{i}.epub", title=f"Book {i}", isbn=f"978000000000{i + 1}")
+
+    batch = mocker.patch.object(
+        OpenLibraryProvider,
+        "get_by_isbns",
+        side_effect=lambda isbns: {isbn: ({"title": isbn}, 1) for isbn in isbns},
+    )
+    single = mocker.patch.object(OpenLibraryProvider, "get_by_isbn")
+    mocker.patch.object(PipelineOrchestrator, "_review", return_value=None)
+
+    orchestrator = PipelineOrchestrator(enable_kepub=False, enable_rename=False, enable_upload=False)
+    orchestrator.process_directory(str(tmp_path))
+
+    # Two chunks of files, each resolved in a single request
+    assert batch.call_args_list == [
+        mocker.call(["9780000000001", "9780000000002"]),
+        mocker.call(["9780000000003"]),
+    ]
+    single.assert_not_called()
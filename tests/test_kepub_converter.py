@@ -0,0 +1,227 @@
+import os
+import subprocess
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.kepub_converter import KepubConverter, split_sentences
+from epub_pipeline.pipeline.kepub_handler import KepubHandler
+from epub_pipeline.pipeline.metadata_reader import OpfReader
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+
+CHAPTER = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Chapter</title></head>
+<body>
+  <h1>Chapter 1</h1>
+  <p>First sentence. Second&#160;one! <em>Third</em> part <img src="a.jpg" alt=""/> after.</p>
+  <pre>Code. Not split.</pre>
+</body>
+</html>"""
+
+XHTML = "{http://www.w3.org/1999/xhtml}"
+OPF = "{http://www.idpf.org/2007/opf}"
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "kepubify")
+CONTAINER = b"""<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+
+def _spans(document):
+    """(id, text) of every koboSpan of a document."""
+    root = ET.fromstring(document)
+    return [
+        (span.get("id"), "".join(span.itertext()))
+        for span in root.iter(f"{XHTML}span")
+        if span.get("class") == "koboSpan"
+    ]
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _reference_epub(path):
+    """The EPUB the kepubify reference fixture was converted from."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", CONTAINER)
+        archive.writestr("OEBPS/content.opf", _fixture("content.opf"))
+        archive.writestr("OEBPS/text/chapter.xhtml", _fixture("chapter.xhtml"))
+        archive.writestr("OEBPS/images/cover.jpg", b"\xff\xd8\xff\xd9")
+        archive.writestr("OEBPS/images/map.jpg", b"\xff\xd8\xff\xd9")
+    return str(path)
+
+
+def _kobo_markup(document):
+    """What a KEPUB conversion must agree on: spans, wrapped images, Kobo divs and style hacks (text included)."""
+    root = ET.fromstring(document)
+    images = [span.get("id") for span in root.iter(f"{XHTML}span") if span.find(f"{XHTML}img") is not None]
+    wrapped = root.find(f"{XHTML}body/{XHTML}div[@id='book-columns']/{XHTML}div[@id='book-inner']") is not None
+    style = root.find(f"{XHTML}head/{XHTML}style[@class='kobostylehacks']")
+    return _spans(document), images, wrapped, style.text if style is not None else None
+
+
+def _manifest(opf):
+    return [
+        (item.get("id"), item.get("href"), item.get("media-type"), item.get("properties"))
+        for item in ET.fromstring(opf).iter(f"{OPF}item")
+    ]
+
+
+def _assert_matches_reference(kepub_path):
+    with zipfile.ZipFile(kepub_path) as archive:
+        assert _kobo_markup(archive.read("OEBPS/text/chapter.xhtml")) == _kobo_markup(_fixture("chapter.kepub.xhtml"))
+        assert _manifest(archive.read("OEBPS/content.opf")) == _manifest(_fixture("content.kepub.opf"))
+
+
+@pytest.fixture
+def kepubify():
+    """Path of the kepubify binary. CI installs a pinned release: there, a missing binary is an error."""
+    binary = KepubHandler.get_binary_path()
+    if not binary:
+        if os.getenv("CI"):
+            pytest.fail("kepubify is not installed (the CI workflow installs KEPUBIFY_VERSION)")
+        pytest.skip("kepubify is not installed")
+    return binary
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two! Three? Four") == ["One. ", "Two! ", "Three? ", "Four"]
+    assert split_sentences('He said "stop." Then left.') == ['He said "stop." ', "Then left."]
+    assert split_sentences("No end") == ["No end"]
+
+
+def test_content_gets_kobo_spans():
+    converted = KepubConverter.transform_content(CHAPTER)
+
+    assert _spans(converted) == [
+        ("kobo.1.1", "Chapter 1"),
+        ("kobo.2.1", "First sentence. "),
+        ("kobo.2.2", "Second\xa0one! "),
+        ("kobo.2.3", "Third"),
+        ("kobo.2.4", " part "),
+        ("kobo.3.1", ""),
+        ("kobo.3.2", " after."),
+    ]
+    root = ET.fromstring(converted)
+    # The image is wrapped, <pre> is left alone, the body content moved into the Kobo divs
+    assert root.find(f".//{XHTML}span[@id='kobo.3.1']/{XHTML}img") is not None
+    assert root.find(f".//{XHTML}pre").text == "Code. Not split."
+    inner = root.find(f"{XHTML}body/{XHTML}div[@id='book-columns']/{XHTML}div[@id='book-inner']")
+    assert inner is not None and len(inner) == 3
+    style = root.find(f"{XHTML}head/{XHTML}style[@class='kobostylehacks']")
+    assert style.text == "div#book-inner { margin-top: 0; margin-bottom: 0;}"
+
+
+def test_content_bytes_kept_around_inserted_markup():
+    document = b"<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><p class='x'>A&nbsp;&amp;  B</p></body></html>"
+    assert KepubConverter.transform_content(document) == (
+        b'<html xmlns="http://www.w3.org/1999/xhtml"><body><div id="book-columns"><div id="book-inner">'
+        b'<p class=\'x\'><span class="koboSpan" id="kobo.1.1">A&nbsp;&amp;  B</span></p></div></div></body></html>'
+    )
+
+
+def test_content_left_alone_when_unparsable_or_converted():
+    for broken in (b"<html><body><p>Unclosed</body></html>", b"<html><body><p class=x>Text</p></body></html>"):
+        assert KepubConverter.transform_content(broken) == broken
+
+    converted = KepubConverter.transform_content(CHAPTER)
+    assert KepubConverter.transform_content(converted) == converted
+
+
+def test_opf_cover_gets_cover_image_property():
+    opf = b"""<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata><meta name="cover" content="cover-img"/></metadata>
+  <manifest>
+    <item id="cover-img" href="cover.jpg" media-type="image/jpeg"/>
+    <item id="chap" href="chap.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+</package>"""
+
+    transformed = KepubConverter.transform_opf(opf)
+
+    assert b'<item id="cover-img" href="cover.jpg" media-type="image/jpeg" properties="cover-image"/>' in transformed
+    assert b'<item id="chap" href="chap.xhtml" media-type="application/xhtml+xml"/>' in transformed
+    assert KepubConverter.transform_opf(transformed) == transformed
+
+
+def test_convert_streams_members(make_epub, tmp_path):
+    source = make_epub(chapters=2)
+    output = str(tmp_path / "book.kepub.epub")
+
+    KepubConverter.convert(source, output)
+
+    with zipfile.ZipFile(source) as before, zipfile.ZipFile(output) as after:
+        assert after.namelist() == before.namelist()
+        assert after.infolist()[0].compress_type == zipfile.ZIP_STORED
+        assert after.read("OEBPS/toc.ncx") == before.read("OEBPS/toc.ncx")
+        assert _spans(after.read("OEBPS/chap_2.xhtml"))[0] == ("kobo.1.1", "Chapter 2")
+        assert after.testzip() is None
+
+
+def test_metadata_update_and_conversion_in_one_pass(make_epub, tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "KEPUB_CONVERTER", "native")
+    monkeypatch.setattr(
+        "epub_pipeline.pipeline.orchestrator.find_book",
+        lambda meta, providers=None: ({"title": "Dune Messiah", "authors": ["Frank Herbert"]}, 95, "ISBN"),
+    )
+    source = make_epub()
+    kepubify = mocker.patch("epub_pipeline.pipeline.kepub_handler.subprocess.run")
+
+    PipelineOrchestrator(auto_save=True, enable_upload=False).process_file(source)
+
+    kepubify.assert_not_called()
+    [output] = os.listdir(tmp_path / "output")
+    assert output == "dune-messiah_frank-herbert.kepub.epub"
+    path = str(tmp_path / "output" / output)
+    assert OpfReader(path).get_curated_metadata()["title"] == "Dune Messiah"
+    with zipfile.ZipFile(path) as archive:
+        assert _spans(archive.read("OEBPS/chap_1.xhtml"))
+    assert OpfReader(source).get_curated_metadata()["title"] == "Dune"
+
+
+def test_matches_kepubify_reference(tmp_path):
+    output = str(tmp_path / "native.kepub.epub")
+    KepubConverter.convert(_reference_epub(tmp_path / "reference.epub"), output)
+    _assert_matches_reference(output)
+
+
+def test_reference_fixture_matches_kepubify(tmp_path, kepubify):
+    output = str(tmp_path / "kepubify.kepub.epub")
+    source = _reference_epub(tmp_path / "reference.epub")
+    subprocess.run([kepubify, source, "-o", output], check=True, capture_output=True)
+    _assert_matches_reference(output)
+
+
+def test_parity_with_kepubify(make_epub, tmp_path, kepubify):
+    source = make_epub(chapters=3)
+    native, reference = str(tmp_path / "native.kepub.epub"), str(tmp_path / "kepubify.kepub.epub")
+
+    KepubConverter.convert(source, native)
+    subprocess.run([kepubify, source, "-o", reference], check=True, capture_output=True)
+
+    with zipfile.ZipFile(native) as ours, zipfile.ZipFile(reference) as theirs:
+        for name in ours.namelist():
+            if name.endswith(".xhtml"):
+                # Same segmentation (span ids over the same text), same Kobo markup
+                assert _kobo_markup(ours.read(name)) == _kobo_markup(theirs.read(name)), name
+    native_meta, reference_meta = OpfReader(native).get_curated_metadata(), OpfReader(reference).get_curated_metadata()
+    assert {**native_meta, "filename": None} == {**reference_meta, "filename": None}
+
+
+def test_handler_uses_native_converter(make_epub, monkeypatch, mocker):
+    monkeypatch.setattr(config, "KEPUB_CONVERTER", "native")
+    kepubify = mocker.patch("epub_pipeline.pipeline.kepub_handler.subprocess.run")
+    source = make_epub()
+
+    assert KepubHandler.convert_to_kepub(source)
+
+    kepubify.assert_not_called()
+    assert os.path.exists(source[:-5] + ".kepub.epub")
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from epub_pipeline.utils.library_scanner import LibraryScanner
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    root/
+      a.epub
+      notes.txt
+      Herbert/Dune/dune.epub
+      Herbert/Dune/messiah.epub (large)
+      .trash/old.epub
+    """
+    (tmp_path / "a.epub").write_bytes(b"x")
+    (tmp_path / "notes.txt").write_bytes(b"x")
+    series = tmp_path / "Herbert" / "Dune"
+    series.mkdir(parents=True)
+    (series / "dune.epub").write_bytes(b"x")
+    (series / "messiah.epub").write_bytes(b"x" * 1000)
+    (tmp_path / ".trash").mkdir()
+    (tmp_path / ".trash" / "old.epub").write_bytes(b"x")
+    return tmp_path
+
+
+def rel(root, paths):
+    return [os.path.relpath(p, root).replace(os.sep, "/") for p in paths]
+
+
+class TestLibraryScanner:
+    def test_recursive_scan(self, tree):
+        assert rel(tree, LibraryScanner().scan(str(tree))) == [
+            "a.epub",
+            ".trash/old.epub",
+            "Herbert/Dune/dune.epub",
+            "Herbert/Dune/messiah.epub",
+        ]
+
+    def test_is_a_generator(self, tree):
+        files = LibraryScanner().scan(str(tree))
+        assert next(files).endswith("a.epub")
+
+    def test_include_exclude(self, tree):
+        scanner = LibraryScanner(include=["*.epub", "*.txt"], exclude=[".*", "herbert/dune/messiah*"])
+        assert rel(tree, scanner.scan(str(tree))) == ["a.epub", "notes.txt", "Herbert/Dune/dune.epub"]
+
+    def test_size_and_mtime_filters(self, tree):
+        assert rel(tree, LibraryScanner(min_size=100).scan(str(tree))) == ["Herbert/Dune/messiah.epub"]
+        assert len(list(LibraryScanner(max_size=100).scan(str(tree)))) == 3
+
+        old = time.time() - 86400
+        os.utime(tree / "a.epub", (old, old))
+        scanner = LibraryScanner(newer_than=time.time() - 3600)
+        assert "a.epub" not in rel(tree, scanner.scan(str(tree)))
+
+    def test_skipped_directories(self, tree):
+        files = LibraryScanner().scan(str(tree), skip=[str(tree / "Herbert" / "Dune")])
+        assert next(files).endswith("a.epub")
+        # Created after the scan started
+        (tree / "Herbert" / "Dune" / "copy").mkdir()
+        (tree / "Herbert" / "Dune" / "copy" / "dune.epub").write_bytes(b"x")
+        assert rel(tree, files) == [".trash/old.epub"]
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+    def test_symlink_loop(self, tree):
+        os.symlink(tree, tree / "Herbert" / "loop")
+        paths = rel(tree, LibraryScanner().scan(str(tree)))
+        assert len(paths) == 4
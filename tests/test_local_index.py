@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pytest
+
+from benchmarks.standin import fixture_records, write_openlibrary_dump
+from epub_pipeline import config
+from epub_pipeline.search.book_finder import find_book, get_providers
+from epub_pipeline.search.local_index import LocalIndex
+from epub_pipeline.search.providers.local import LocalIndexProvider
+
+RECORDS = [
+    {"type": {"key": "/type/author"}, "key": "/authors/OL1A", "name": "Frank Herbert"},
+    {
+        "type": {"key": "/type/work"},
+        "key": "/works/OL1W",
+        "title": "Dune",
+        "authors": [{"author": {"key": "/authors/OL1A"}, "type": {"key": "/type/author_role"}}],
+        "subjects": ["Science fiction", "Arrakis"],
+        "description": {"type": "/type/text", "value": "A desert planet."},
+    },
+    # Authors only on the work, ISBN-10 only
+    {
+        "type": {"key": "/type/edition"},
+        "key": "/books/OL1M",
+        "title": "Dune",
+        "works": [{"key": "/works/OL1W"}],
+        "isbn_10": ["0441172717"],
+        "publishers": ["Ace Books"],
+        "publish_date": "1990",
+        "languages": [{"key": "/languages/eng"}],
+        "covers": [42],
+    },
+    {
+        "type": {"key": "/type/edition"},
+        "key": "/books/OL2M",
+        "title": "Dune",
+        "authors": [{"key": "/authors/OL1A"}],
+        "works": [{"key": "/works/OL1W"}],
+        "isbn_13": ["978-0-8019-5077-7"],
+        "publishers": ["Chilton Books"],
+        "publish_date": "1965",
+    },
+    {"type": {"key": "/type/redirect"}, "key": "/books/OL3M", "location": "/books/OL1M"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Index of a small JSONL dump (the editions come before the author they name)."""
+    dump = tmp_path / "dump.jsonl.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        for record in reversed(RECORDS):
+            f.write(json.dumps(record) + "\n")
+        f.write("not json\n")
+
+    index = LocalIndex(config.LOCAL_INDEX_PATH)
+    assert index.import_dump(str(dump)) == {"editions": 2, "works": 1, "authors": 1, "skipped": 2}
+    assert index.build_text_index() == 1
+    yield index
+    index.close()
+
+
+def test_isbn_lookup(index):
+    by_10 = index.get_by_isbn("0441172717")
+
+    assert by_10 == index.get_by_isbn("9780441172719")
+    assert by_10["authors"] == ["Frank Herbert"]
+    assert by_10["publisher"] == "Ace Books" and by_10["language"] == "eng"
+    assert by_10["description"] == "A desert planet."
+    assert by_10["categories"] == ["Science fiction", "Arrakis"]
+    assert by_10["imageLinks"]["thumbnail"].endswith("/42-M.jpg")
+    assert index.get_by_isbn("9780801950777")["publishedDate"] == "1965"
+    assert index.get_by_isbn("9780000000002") is None
+
+
+def test_fuzzy_search_and_filters(index):
+    results, total = index.search("Dnue", "Herbert, Frank")
+    assert total == 1 and results[0]["title"] == "Dune"
+
+    assert index.search("Dune", "Frank Herbert", publisher="Chilton")[0][0]["provider_id"] == "/books/OL2M"
+    assert index.search("Dune", "Frank Herbert", year="1990")[0][0]["provider_id"] == "/books/OL1M"
+    assert index.search("Dune", "Frank Herbert", publisher="Gallimard") == ([], 0)
+    assert index.search("The Left Hand of Darkness", "Ursula K. Le Guin") == ([], 0)
+
+
+def test_offline_provider_answers_first(tmp_path, monkeypatch):
+    records = fixture_records(30, seed=2)
+    dump = str(tmp_path / "ol_dump.txt.gz")
+    write_openlibrary_dump(records, dump)
+    index = LocalIndex(config.LOCAL_INDEX_PATH)
+    index.import_dump(dump)
+    index.build_text_index()
+
+    assert [p.name for p in get_providers()] == ["OpenLibrary (local)", "Google Books", "OpenLibrary"]
+    monkeypatch.setattr(config, "API_SOURCE", "local")
+    providers = get_providers()
+    assert len(providers) == 1 and isinstance(providers[0], LocalIndexProvider)
+
+    book = records[7]
+    meta = {"title": book["title"], "authors": book["authors"], "isbn": book["isbn"]}
+    assert find_book(meta, providers)[2] == "ISBN (OpenLibrary (local))"
+    data, conf, strategy = find_book({**meta, "isbn": None, "publisher": book["publisher"]}, providers)
+    assert data["industryIdentifiers"] == [{"type": "ISBN_13", "identifier": book["isbn"]}]
+    assert strategy == "Text OpenLibrary (local) (Full context)"
+
+
+def test_no_local_index(monkeypatch):
+    assert [p.name for p in get_providers()] == ["Google Books", "OpenLibrary"]
+    monkeypatch.setattr(config, "API_SOURCE", "local")
+    assert get_providers() == []
@@ -0,0 +1,146 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from epub_pipeline import config
+from epub_pipeline.pipeline import epub_manager
+from epub_pipeline.pipeline.cover_manager import CoverManager
+from epub_pipeline.pipeline.engine import StagedPipeline
+from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.metadata_reader import OpfPackage, OpfReader
+from epub_pipeline.utils.memory import MB, MIN_CONTENT_RATIO, MemoryBudget, PeakMemory, content_size, reset_peak
+
+NEW_DATA = {
+    "title": "Dune (Deluxe Edition)",
+    "authors": ["Frank Herbert"],
+    "publishedDate": "1990",
+    "language": "fr",
+    "categories": ["SF"],
+    "industryIdentifiers": [{"type": "ISBN_13", "identifier": "9780441172719"}],
+}
+
+
+def _jpeg(size):
+    output = io.BytesIO()
+    Image.new("RGB", size, "red").save(output, format="JPEG")
+    return output.getvalue()
+
+
+@pytest.mark.skipif(not reset_peak(), reason="Peak RSS cannot be reset on this platform")
+def test_peak_memory_is_per_block():
+    with PeakMemory() as large:
+        buffer = bytearray(100 * MB)
+        buffer[::4096] = b"x" * len(buffer[::4096])
+    del buffer
+
+    with PeakMemory() as small:
+        pass
+
+    assert large.peak - small.peak > 80 * MB
+
+
+def test_budget_lowers_workers():
+    budget = MemoryBudget(300)
+    assert budget.max_workers(8) == 2
+    assert MemoryBudget(50).max_workers(8) == 1
+
+
+def test_budget_waits_for_room():
+    budget = MemoryBudget(100)
+    entered = threading.Event()
+
+    def second():
+        with budget.reserve(60 * MB):
+            entered.set()
+
+    with budget.reserve(60 * MB):
+        thread = threading.Thread(target=second)
+        thread.start()
+        # 60 + 60 MB does not fit: the second write waits for the first one
+        assert not entered.wait(timeout=0.2)
+    assert entered.wait(timeout=5)
+    thread.join()
+
+
+def test_budget_lets_an_oversized_file_run_alone():
+    budget = MemoryBudget(10)
+    with budget.reserve(500 * MB):
+        pass
+
+
+def test_budget_learns_from_measured_peaks(make_epub):
+    path = make_epub(chapters=20)
+    budget = MemoryBudget(1000)
+    conservative = budget.estimate(path)
+
+    budget.record(path, 60 * MB)
+    assert budget.baseline == 60 * MB
+    assert budget.estimate(path) < conservative
+    # A single measurement: nothing above the baseline yet, the minimal content ratio is kept
+    assert budget.ratio == MIN_CONTENT_RATIO
+
+    budget.record(path, 60 * MB + content_size(path) * 2)
+    assert budget.ratio == 2
+
+
+def test_staged_pipeline_fits_jobs_to_budget(monkeypatch, mocker):
+    monkeypatch.setattr(config, "MEMORY_BUDGET_MB", 250)
+    assert StagedPipeline(mocker.Mock(), jobs=8).jobs == 2
+
+
+def test_streaming_save_never_loads_the_book(make_epub, tmp_path, mocker, monkeypatch):
+    source = make_epub(isbn="0441172717", chapters=3)
+    streamed, full = str(tmp_path / "streamed.epub"), str(tmp_path / "full.epub")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(config, "SURGICAL_SAVE", False)
+        reference = EpubManager(source, streaming=False)
+        reference.update_metadata(NEW_DATA)
+        reference.save(full)
+
+    read_epub = mocker.spy(epub_manager.load_ebooklib(), "read_epub")
+    manager = EpubManager(source, streaming=True)
+    assert isinstance(manager.book, OpfPackage)
+    manager.update_metadata(NEW_DATA)
+    manager.save(streamed)
+
+    read_epub.assert_not_called()
+    streamed_meta, full_meta = OpfReader(streamed).get_curated_metadata(), OpfReader(full).get_curated_metadata()
+    assert {**streamed_meta, "filename": None} == {**full_meta, "filename": None}
+    assert streamed_meta["language"] == "fr"
+
+
+def test_streaming_falls_back_to_full_rewrite(make_epub, tmp_path):
+    # No cover image to replace: the book has to be loaded by EbookLib
+    source = make_epub()
+    output = str(tmp_path / "out.epub")
+
+    manager = EpubManager(source, streaming=True)
+    manager.update_metadata(NEW_DATA)
+    manager.set_cover(_jpeg((10, 10)))
+    manager.save(output)
+
+    book = epub_manager.load_ebooklib().read_epub(output)
+    assert book.get_item_with_id("cover-img") is not None
+    assert book.get_metadata("DC", "title")[0][0] == "Dune (Deluxe Edition)"
+
+
+def test_streaming_is_enabled_by_memory_budget(make_epub, monkeypatch):
+    monkeypatch.setattr(config, "MEMORY_BUDGET_MB", 512)
+    assert isinstance(EpubManager(make_epub()).book, OpfPackage)
+
+
+def test_oversized_cover_is_not_downloaded(monkeypatch, requests_mock):
+    monkeypatch.setattr(config, "MAX_COVER_MB", 1)
+    requests_mock.get("http://covers/big.jpg", content=b"\xff" * (2 * MB))
+    requests_mock.get("http://covers/small.jpg", content=b"\xff" * 1024)
+
+    assert CoverManager.download_cover("http://covers/big.jpg") is None
+    assert CoverManager.download_cover("http://covers/small.jpg") == b"\xff" * 1024
+
+
+def test_large_jpeg_cover_is_downscaled():
+    processed = CoverManager.process_image(_jpeg((4000, 6000)))
+    assert Image.open(io.BytesIO(processed)).size[1] <= CoverManager.MAX_SIZE[1]
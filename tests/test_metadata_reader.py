@@ -0,0 +1,99 @@
+import zipfile
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.metadata_reader import OpfPackage, OpfReader
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+EPUB3_OPF = """<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:identifier id="uid">urn:uuid:1234</dc:identifier>
+    <dc:identifier opf:scheme="ISBN">978-0-441-17271-9</dc:identifier>
+    <dc:title>Dune</dc:title>
+    <!-- comments are ignored -->
+    <dc:creator opf:file-as="Herbert, Frank">Frank Herbert</dc:creator>
+    <dc:language>en</dc:language>
+    <dc:subject>SF</dc:subject>
+    <dc:subject>Classic</dc:subject>
+    <meta name="cover" content="cover-img"/>
+    <meta name="calibre:series" content="Dune"/>
+    <meta property="dcterms:modified">2020-01-01T00:00:00Z</meta>
+  </metadata>
+  <manifest>
+    <item id="c1" href="c1.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="c1"/></spine>
+</package>"""
+
+
+def _write_epub(path, opf, extra=None):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+        archive.writestr("META-INF/container.xml", CONTAINER)
+        archive.writestr("content.opf", opf)
+        archive.writestr("c1.xhtml", '<html xmlns="http://www.w3.org/1999/xhtml"><body><p>x</p></body></html>')
+        for name, data in (extra or {}).items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def test_matches_ebooklib(make_epub, monkeypatch):
+    monkeypatch.setattr(config, "SURGICAL_SAVE", False)  # EpubManager loads the book with EbookLib
+    path = make_epub(isbn="9780441172719", authors=("Frank Herbert", "Brian Herbert"))
+
+    reader, manager = OpfReader(path), EpubManager(path)
+
+    assert reader.book.metadata == manager.book.metadata
+    assert reader.get_curated_metadata() == manager.get_curated_metadata()
+    assert reader.get_raw_metadata() == manager.get_raw_metadata()
+
+
+def test_matches_ebooklib_epub3(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SURGICAL_SAVE", False)
+    path = _write_epub(tmp_path / "dune.epub", EPUB3_OPF)
+
+    reader, manager = OpfReader(path), EpubManager(path)
+
+    assert reader.book.metadata == manager.book.metadata
+    assert reader.book.version == "3.0"
+    meta = reader.get_curated_metadata()
+    assert meta == manager.get_curated_metadata()
+    assert meta["isbn"] == "9780441172719"
+    assert meta["tags"] == ["SF", "Classic"]
+
+
+def test_reads_only_container_and_opf(tmp_path, mocker):
+    path = _write_epub(tmp_path / "dune.epub", EPUB3_OPF, {"images/cover.jpg": b"\xff" * 1024})
+    opened = mocker.spy(zipfile.ZipFile, "open")
+
+    OpfReader(path)
+
+    assert [call.args[1] for call in opened.call_args_list] == ["META-INF/container.xml", "content.opf"]
+
+
+def test_stops_parsing_after_metadata(tmp_path):
+    # Anything after </metadata> is never parsed (a broken manifest is not even noticed)
+    broken = EPUB3_OPF.replace("<spine>", "<spine><broken")
+    path = _write_epub(tmp_path / "dune.epub", broken)
+
+    assert OpfReader(path).get_curated_metadata()["title"] == "Dune"
+
+
+def test_invalid_files_raise(tmp_path):
+    not_a_zip = tmp_path / "fake.epub"
+    not_a_zip.write_text("not a zip")
+    with pytest.raises(Exception):
+        OpfPackage(str(not_a_zip))
+
+    no_container = tmp_path / "empty.epub"
+    with zipfile.ZipFile(no_container, "w") as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+    with pytest.raises(KeyError):
+        OpfPackage(str(no_container))
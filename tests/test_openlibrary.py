@@ -63,3 +63,13 @@ class TestOpenLibrary:
         requests_mock.get("https://openlibrary.org/search.json", status_code=500)
         res, _ = provider.search_by_text({"title": "A"}, {})
         assert res is None
+
+    def test_search_candidates(self, provider, requests_mock):
+        docs = [{"title": "Dune Messiah", "key": "/works/OL1"}, {"title": "Dune", "key": "/works/OL2"}]
+        adapter = requests_mock.get("https://openlibrary.org/search.json", json={"numFound": 2, "docs": docs})
+
+        candidates, hits = provider.search_candidates({"title": "Dune"}, {})
+
+        assert [c["title"] for c in candidates] == ["Dune Messiah", "Dune"]
+        assert hits == 2
+        assert adapter.last_request.qs["limit"] == ["5"]
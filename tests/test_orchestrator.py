@@ -1,3 +1,4 @@
+import os
 from unittest.mock import patch
 
 import pytest
@@ -11,12 +12,16 @@ def orch():
     return PipelineOrchestrator(auto_save=True, enable_upload=False)
 
 
+@patch("epub_pipeline.pipeline.orchestrator.Workspace")
+@patch("epub_pipeline.pipeline.engine.OpfReader")
 @patch("epub_pipeline.pipeline.orchestrator.EpubManager")
 @patch("epub_pipeline.pipeline.orchestrator.find_book")
 @patch("epub_pipeline.pipeline.orchestrator.shutil")
 @patch("epub_pipeline.pipeline.orchestrator.tempfile")
 @patch("epub_pipeline.pipeline.orchestrator.os")
-def test_process_file_flow(mock_os, mock_temp, mock_shutil, mock_find, mock_epub_cls, orch):
+def test_process_file_flow(
+    mock_os, mock_temp, mock_shutil, mock_find, mock_epub_cls, mock_reader_cls, mock_workspace_cls, orch
+):
     # Setup mocks
     mock_os.path.exists.return_value = True
     mock_os.path.basename.return_value = "book.epub"
@@ -31,9 +36,13 @@ def test_process_file_flow(mock_os, mock_temp, mock_shutil, mock_find, mock_epub
     # Context manager for tempfile
     mock_temp.TemporaryDirectory.return_value.__enter__.return_value = "/tmp/tmpdir"
 
-    # EpubManager setup
+    # Workspace setup (no copy until a write is needed)
+    workspace = mock_workspace_cls.return_value
+    workspace.path = workspace.local.return_value = workspace.materialize.return_value = "/tmp/tmpdir/book.epub"
+
+    # Extraction reads the OPF only; EpubManager is loaded for the write
     manager = mock_epub_cls.return_value
-    manager.get_curated_metadata.return_value = {
+    mock_reader_cls.return_value.get_curated_metadata.return_value = {
         "title": "Title",
         "authors": ["Author"],
         "isbn": "123",
@@ -58,8 +67,10 @@ def test_process_file_flow(mock_os, mock_temp, mock_shutil, mock_find, mock_epub
 
     # Assertions
     # 1. Metadata updated
+    mock_epub_cls.assert_called_once_with("/tmp/tmpdir/book.epub")
     manager.update_metadata.assert_called()
-    manager.save.assert_called()
+    workspace.materialize.assert_called_once()
+    manager.save.assert_called_with("/tmp/tmpdir/book.epub")
 
     # 2. Renaming
     # Should be called. The filename changes from book.epub to title_author_2023.kepub.epub
@@ -88,12 +99,26 @@ def test_interactive_review(orch):
         assert approved is None
 
 
-def test_process_directory(orch):
-    with patch(
-        "epub_pipeline.pipeline.orchestrator.os.listdir",
-        return_value=["a.epub", "b.txt"],
-    ):
-        with patch("epub_pipeline.pipeline.orchestrator.os.path.exists", return_value=True):
-            with patch.object(orch, "process_file") as mock_process:
-                orch.process_directory("/data")
-                mock_process.assert_called_once()
+def test_process_directory(orch, tmp_path):
+    (tmp_path / "a.epub").write_bytes(b"")
+    (tmp_path / "b.txt").write_bytes(b"")
+    (tmp_path / "series").mkdir()
+    (tmp_path / "series" / "c.EPUB").write_bytes(b"")
+
+    with patch.object(orch, "process_file") as mock_process:
+        orch.process_directory(str(tmp_path))
+        assert [c.args[0] for c in mock_process.call_args_list] == [
+            str(tmp_path / "a.epub"),
+            str(tmp_path / "series" / "c.EPUB"),
+        ]
+
+
+def test_process_directory_skips_local_output(orch, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.epub").write_bytes(b"")
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "a.epub").write_bytes(b"")
+
+    with patch.object(orch, "process_file") as mock_process:
+        orch.process_directory(".")
+        assert [c.args[0] for c in mock_process.call_args_list] == [os.path.join(".", "a.epub")]
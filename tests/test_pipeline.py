@@ -2,6 +2,7 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from epub_pipeline import config
 from epub_pipeline.pipeline.epub_manager import EpubManager
 
 
@@ -48,15 +49,16 @@ class TestPipelineOrchestrator:
 
 
 class TestEpubManager:
-    def test_get_curated_metadata(self, mocker):
+    def test_get_curated_metadata(self, mocker, monkeypatch):
         # Mock ebooklib.epub.read_epub
+        monkeypatch.setattr(config, "SURGICAL_SAVE", False)
         mock_read = mocker.patch("ebooklib.epub.read_epub")
         mock_book = MagicMock()
         mock_read.return_value = mock_book
 
         # Setup metadata in the mock book
-        mock_book.get_metadata.side_effect = (
-            lambda ns, name: [("Dune", {})] if name == "title" else [("Frank Herbert", {})] if name == "creator" else []
+        mock_book.get_metadata.side_effect = lambda ns, name: (
+            [("Dune", {})] if name == "title" else [("Frank Herbert", {})] if name == "creator" else []
         )
 
         manager = EpubManager("dummy.epub")
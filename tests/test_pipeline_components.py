@@ -5,21 +5,20 @@ from epub_pipeline.pipeline.kepub_handler import KepubHandler
 
 
 class TestCoverManager:
-    @patch("epub_pipeline.pipeline.cover_manager.requests.get")
-    def test_download_cover_success(self, mock_get):
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.content = b"fake_image_data"
+    def test_download_cover_success(self, requests_mock):
+        requests_mock.get("http://test.com/img.jpg", content=b"fake_image_data")
 
         data = CoverManager.download_cover("http://test.com/img.jpg")
         assert data == b"fake_image_data"
+        assert "epub-pipeline" in requests_mock.last_request.headers["User-Agent"]
 
-    @patch("epub_pipeline.pipeline.cover_manager.requests.get")
-    def test_download_cover_failure(self, mock_get):
-        mock_get.side_effect = Exception("Boom")
-        assert CoverManager.download_cover("http://fail") is None
+    def test_download_cover_failure(self):
+        session = MagicMock()
+        session.get.side_effect = Exception("Boom")
+        assert CoverManager.download_cover("http://fail", session=session) is None
         assert CoverManager.download_cover(None) is None
 
-    @patch("epub_pipeline.pipeline.cover_manager.Image.open")
+    @patch("PIL.Image.open")
     def test_process_image(self, mock_open):
         # Mock PIL Image object
         mock_img = MagicMock()
@@ -53,3 +53,16 @@ class TestGoogleBooksProvider:
         result, total = provider.search_by_text(meta, context)
         assert result["title"] == "Dune"
         assert total == 10
+
+    def test_search_candidates(self, provider, requests_mock, monkeypatch):
+        monkeypatch.setattr("epub_pipeline.config.SEARCH_CANDIDATES", 2)
+        items = [{"id": str(i), "volumeInfo": {"title": f"Dune {i}"}} for i in range(3)]
+        adapter = requests_mock.get(
+            "https://www.googleapis.com/books/v1/volumes", json={"totalItems": 3, "items": items}
+        )
+
+        candidates, total = provider.search_candidates({"title": "Dune"}, {})
+
+        assert [c["title"] for c in candidates] == ["Dune 0", "Dune 1"]
+        assert total == 3
+        assert adapter.last_request.qs["maxresults"] == ["2"]
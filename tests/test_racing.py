@@ -0,0 +1,291 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.search.book_finder import find_book
+from epub_pipeline.search.providers.google import GoogleBooksProvider
+from epub_pipeline.search.racing import (
+    COALESCER,
+    LatencyTracker,
+    RequestCancelled,
+    SingleFlight,
+    coalescing_enabled,
+    first_accepted,
+    hedged_call,
+    run_blocking,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestFirstAccepted:
+    def test_priority_decides_ties(self):
+        async def answer(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        # The low priority call answers first, but the high priority one still wins
+        index, result = run(first_accepted([answer("slow", 0.05), answer("fast", 0)], lambda i, r: True))
+        assert (index, result) == (0, "slow")
+
+    def test_rejected_calls_fall_through_and_rest_is_cancelled(self):
+        cancelled = []
+
+        async def answer(value, delay):
+            try:
+                await asyncio.sleep(delay)
+                return value
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+
+        calls = [answer(None, 0), answer("hit", 0.01), answer("late", 1)]
+        index, result = run(first_accepted(calls, lambda i, r: r is not None))
+        assert (index, result) == (1, "hit")
+        assert cancelled == ["late"]
+
+    def test_nothing_accepted(self):
+        async def answer():
+            return None
+
+        assert run(first_accepted([answer(), answer()], lambda i, r: False)) == (None, None)
+
+
+class TestHedgedCall:
+    def test_hedges_slow_requests(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("provider", 0.01)
+        calls = []
+        first_call = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                first_call.wait(1)  # The original request hangs
+                return "original"
+            return "hedge"
+
+        try:
+            assert run(hedged_call("provider", fetch, tracker=tracker)) == "hedge"
+        finally:
+            first_call.set()
+        assert len(calls) == 2
+
+    def test_failed_original_waits_for_hedge(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("provider", 0.01)
+        calls = []
+        hedge_sent, original_failed = threading.Event(), threading.Event()
+
+        def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                hedge_sent.wait(1)
+                original_failed.set()
+                raise ConnectionError("reset")
+            hedge_sent.set()
+            original_failed.wait(1)
+            return "hedge"
+
+        assert run(hedged_call("provider", fetch, tracker=tracker)) == "hedge"
+
+    def test_error_raised_when_every_call_fails(self):
+        def fetch():
+            raise ConnectionError("reset")
+
+        with pytest.raises(ConnectionError):
+            run(hedged_call("fresh", fetch, tracker=LatencyTracker()))
+
+    def test_hedges_are_never_coalesced(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("provider", 0.01)
+        coalesced = []
+        release = threading.Event()
+
+        def fetch():
+            coalesced.append(coalescing_enabled())
+            if len(coalesced) == 1:
+                release.wait(1)
+            return "ok"
+
+        try:
+            run(hedged_call("provider", fetch, tracker=tracker))
+        finally:
+            release.set()
+        assert coalesced == [True, False]
+
+    def test_no_hedge_without_history(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.02)
+            return "ok"
+
+        assert run(hedged_call("fresh", fetch, tracker=LatencyTracker())) == "ok"
+        assert len(calls) == 1
+
+
+def test_isbn_lookup_queries_providers_concurrently(mocker):
+    both_started = threading.Barrier(2, timeout=2)
+
+    def make_provider(name, data):
+        provider = MagicMock()
+        provider.name = name
+
+        def get_by_isbn(isbn):
+            both_started.wait()  # Deadlocks if providers are queried one after another
+            return data, 1 if data else 0
+
+        provider.get_by_isbn.side_effect = get_by_isbn
+        return provider
+
+    google = make_provider("Google", {"title": "Dune", "authors": ["Frank Herbert"]})
+    openlibrary = make_provider("OL", {"title": "Dune (OL)", "authors": ["Frank Herbert"]})
+    mocker.patch("epub_pipeline.search.book_finder.get_providers", return_value=[google, openlibrary])
+
+    data, conf, strategy = find_book({"title": "Dune", "authors": ["Frank Herbert"], "isbn": "9780441172719"})
+    assert strategy == "ISBN (Google)"
+    assert data["title"] == "Dune"
+
+
+def test_isbn13_variant_only_sent_after_a_miss(mocker):
+    provider = MagicMock()
+    provider.name = "Google"
+    provider.get_by_isbn.return_value = ({"title": "Dune", "authors": ["Frank Herbert"]}, 1)
+    mocker.patch("epub_pipeline.search.book_finder.get_providers", return_value=[provider])
+    meta = {"title": "Dune", "authors": ["Frank Herbert"], "isbn": "0441172717"}
+
+    assert find_book(meta)[2] == "ISBN (Google)"
+    provider.get_by_isbn.assert_called_once_with("0441172717")
+
+    provider.get_by_isbn.reset_mock()
+    provider.get_by_isbn.side_effect = [(None, 0), ({"title": "Dune", "authors": ["Frank Herbert"]}, 1)]
+    assert find_book(meta)[2] == "ISBN (Google)"
+    assert [c.args for c in provider.get_by_isbn.call_args_list] == [("0441172717",), ("9780441172719",)]
+
+
+def _wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch(value):
+            calls.append(value)
+            release.wait(1)
+            return {"value": value}
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, "key", fetch, n) for n in range(4)]
+            _wait_for(lambda: flight.stats()["coalesced"] == 3)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats() == {"calls": 1, "coalesced": 3}
+        # Nothing in flight anymore: the next call runs again
+        assert flight.do("key", lambda: "fresh") == "fresh"
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(1)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, "key", fail) for _ in range(2)]
+            _wait_for(lambda: flight.stats()["coalesced"] == 1)
+            release.set()
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+
+def _blocking_isbn_api(requests_mock, release):
+    def answer(request, context):
+        release.wait(1)
+        return {"totalItems": 1, "items": [{"id": "x", "volumeInfo": {"title": "Dune", "authors": ["Frank Herbert"]}}]}
+
+    return requests_mock.get(config.GOOGLE_API_URL, json=answer)
+
+
+def test_identical_provider_requests_are_coalesced(requests_mock, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_RATE_LIMIT", 0.0)
+    release = threading.Event()
+    api = _blocking_isbn_api(requests_mock, release)
+    before = COALESCER.stats()["coalesced"]
+
+    # Thread pool path: directory workers looking up two copies of a book
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(GoogleBooksProvider().get_by_isbn, "9780441172719") for _ in range(2)]
+        _wait_for(lambda: COALESCER.stats()["coalesced"] == before + 1)
+        release.set()
+        assert [f.result()[0]["title"] for f in futures] == ["Dune", "Dune"]
+    assert api.call_count == 1
+
+    # Asyncio path: concurrent searches through the search pool
+    release.clear()
+
+    async def search_twice():
+        provider = GoogleBooksProvider()
+        tracker = LatencyTracker()  # No history: never hedged
+        calls = [hedged_call("Google ISBN", provider.get_by_isbn, "9780441172719", tracker=tracker) for _ in range(2)]
+        tasks = [asyncio.ensure_future(c) for c in calls]
+        await asyncio.to_thread(_wait_for, lambda: COALESCER.stats()["coalesced"] == before + 2)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert [data["title"] for data, _ in run(search_twice())] == ["Dune", "Dune"]
+    assert api.call_count == 2
+
+    # Disabled: every request goes out
+    monkeypatch.setattr(config, "COALESCE_REQUESTS", False)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(GoogleBooksProvider().get_by_isbn, ["9780441172719"] * 2))
+    assert api.call_count == 4
+
+
+def test_cancelled_calls_are_not_sent(requests_mock, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_RATE_LIMIT", 0.0)
+    api = requests_mock.get(config.GOOGLE_API_URL, json={"totalItems": 0})
+    started, release = threading.Event(), threading.Event()
+    outcome = []
+
+    def lookup():
+        started.set()
+        release.wait(1)
+        try:
+            GoogleBooksProvider()._get_json(config.GOOGLE_API_URL)
+            outcome.append("sent")
+        except RequestCancelled:
+            outcome.append("cancelled")
+
+    async def cancel_before_sending():
+        task = asyncio.ensure_future(run_blocking(lookup))
+        await asyncio.to_thread(started.wait, 1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        release.set()
+
+    run(cancel_before_sending())
+    _wait_for(lambda: outcome)
+    assert outcome == ["cancelled"]
+    assert api.call_count == 0
@@ -0,0 +1,112 @@
+import multiprocessing
+import time
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.search.providers.openlibrary import OpenLibraryProvider
+from epub_pipeline.utils import rate_limiter
+from epub_pipeline.utils.rate_limiter import AdaptiveConcurrency, TokenBucket, get_rate_limiter, parse_retry_after
+
+SEARCH_URL = "https://openlibrary.org/search.json"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "limits.sqlite")
+
+
+def _drain(db_path, count):
+    bucket = TokenBucket("shared", rate=1000, burst=5, db_path=db_path)
+    for _ in range(count):
+        bucket._try_take()
+
+
+def test_bucket_burst_then_rate(db_path):
+    bucket = TokenBucket("api", rate=20, burst=3, db_path=db_path)
+    assert [bucket._try_take() for _ in range(3)] == [0, 0, 0]
+    assert bucket._try_take() > 0
+
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.03
+
+
+def test_bucket_is_shared_across_processes(db_path):
+    bucket = TokenBucket("shared", rate=0.001, burst=5, db_path=db_path)
+    ctx = multiprocessing.get_context("spawn")
+    proc = ctx.Process(target=_drain, args=(db_path, 5))
+    proc.start()
+    proc.join(30)
+
+    assert bucket._try_take() > 0
+
+
+def test_block_pauses_even_unlimited_buckets(db_path):
+    bucket = TokenBucket("api", rate=0, burst=1, db_path=db_path)
+    assert bucket._try_take() == 0
+    bucket.block(0.05)
+    assert bucket._try_take() > 0
+    time.sleep(0.06)
+    assert bucket._try_take() == 0
+
+
+def test_unlimited_bucket_only_reads_shared_pauses(db_path, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BLOCK_REFRESH", 0.0)
+    bucket = TokenBucket("api", rate=0, burst=1, db_path=db_path)
+    for _ in range(5):
+        assert bucket._try_take() == 0
+    assert bucket._conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == 0
+
+    TokenBucket("api", rate=0, burst=1, db_path=db_path).block(0.05)
+    assert bucket._try_take() > 0
+
+
+def test_aimd_concurrency():
+    aimd = AdaptiveConcurrency(maximum=8, cooldown=0)
+    aimd.on_congestion()
+    aimd.on_congestion()
+    assert aimd.limit == 2
+
+    for _ in range(10):
+        aimd.on_success()
+    assert 2 < aimd.limit <= 8
+
+    for _ in range(10):
+        aimd.on_congestion()
+    assert aimd.limit == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0  # dates in the past mean "now"
+
+
+def test_provider_retries_after_429(requests_mock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.001)
+    adapter = requests_mock.get(
+        SEARCH_URL,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "0"}},
+            {"status_code": 503},
+            {"json": {"docs": [{"title": "Dune"}], "numFound": 1}},
+        ],
+    )
+
+    result, hits = OpenLibraryProvider().search_by_text({"title": "Dune"}, {})
+
+    assert result is not None and hits == 1
+    assert adapter.call_count == 3
+    assert get_rate_limiter("openlibrary").concurrency.limit < config.MAX_CONCURRENT_REQUESTS
+
+
+def test_provider_gives_up_after_max_retries(requests_mock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.001)
+    adapter = requests_mock.get(SEARCH_URL, status_code=503)
+
+    result, hits = OpenLibraryProvider().search_by_text({"title": "Dune"}, {})
+
+    assert result is None and hits == 0
+    assert adapter.call_count == config.MAX_RETRIES
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.search.providers.openlibrary import OpenLibraryProvider
+from epub_pipeline.search.response_cache import ResponseCache, get_shared_cache
+
+SEARCH_URL = "https://openlibrary.org/search.json"
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_make_key_normalizes_params():
+    a = ResponseCache.make_key("http://x", {"q": "Dune  Herbert", "limit": 1})
+    b = ResponseCache.make_key("http://x", {"limit": "1", "q": "Dune Herbert"})
+    assert a == b
+    assert a != ResponseCache.make_key("http://y", {"q": "Dune Herbert", "limit": 1})
+
+
+def test_read_write_roundtrip(cache_path):
+    cache = ResponseCache(cache_path)
+    cache.put("k", {"docs": [1]})
+    assert cache.get("k") == {"docs": [1]}
+    assert cache.get("missing") is None
+
+
+def test_shared_across_instances(cache_path):
+    ResponseCache(cache_path).put("k", {"a": 1})
+    assert ResponseCache(cache_path).get("k") == {"a": 1}
+
+
+def test_expired_entries_are_ignored(cache_path):
+    cache = ResponseCache(cache_path, ttl=60, negative_ttl=0)
+    cache.put("hit", {"docs": [1]})
+    cache.put("miss", {"docs": []}, negative=True)
+    assert cache.get("hit") == {"docs": [1]}
+    assert cache.get("miss") is None
+
+
+def test_modes(cache_path):
+    ResponseCache(cache_path).put("k", {"a": 1})
+
+    read_only = ResponseCache(cache_path, mode="read-only")
+    read_only.put("other", {"b": 2})
+    assert read_only.get("k") == {"a": 1}
+    assert read_only.get("other") is None
+
+    refresh = ResponseCache(cache_path, mode="refresh")
+    assert refresh.get("k") is None
+    refresh.put("k", {"a": 2})
+    assert ResponseCache(cache_path).get("k") == {"a": 2}
+
+    with pytest.raises(ValueError):
+        ResponseCache(cache_path, mode="bogus")
+
+
+def test_lru_eviction(cache_path):
+    cache = ResponseCache(cache_path, max_bytes=40)
+    cache.EVICTION_INTERVAL = 1
+    cache.put("old", {"v": "x" * 10})
+    time.sleep(0.01)
+    cache.put("recent", {"v": "y" * 10})
+    time.sleep(0.01)
+    cache.get("old")  # touching it makes 'recent' the least recently used
+    time.sleep(0.01)
+    cache.put("new", {"v": "z" * 10})
+
+    assert cache.get("recent") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
+
+
+def test_provider_uses_cache(cache_path, requests_mock):
+    adapter = requests_mock.get(SEARCH_URL, json={"docs": [{"title": "Dune"}], "numFound": 1})
+    provider = OpenLibraryProvider(cache=ResponseCache(cache_path))
+    meta = {"title": "Dune", "author": "Frank Herbert"}
+
+    first, _ = provider.search_by_text(meta, {})
+    second, _ = provider.search_by_text(meta, {})
+
+    assert first == second
+    assert first is not None and first["title"] == "Dune"
+    assert adapter.call_count == 1
+
+
+def test_offline_mode_never_hits_network(cache_path, requests_mock):
+    adapter = requests_mock.get(SEARCH_URL, json={"docs": [{"title": "Dune"}], "numFound": 1})
+    provider = OpenLibraryProvider(cache=ResponseCache(cache_path, mode="offline"))
+
+    result, hits = provider.search_by_text({"title": "Dune"}, {})
+
+    assert result is None and hits == 0
+    assert adapter.call_count == 0
+
+
+def test_shared_cache_follows_config(monkeypatch, cache_path):
+    assert get_shared_cache() is None  # tests run with CACHE_MODE = "off"
+
+    monkeypatch.setattr(config, "CACHE_MODE", "read-only")
+    monkeypatch.setattr(config, "HTTP_CACHE_PATH", cache_path)
+    cache = get_shared_cache()
+    assert cache is not None and cache.mode == "read-only"
+    assert get_shared_cache() is cache
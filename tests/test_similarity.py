@@ -0,0 +1,89 @@
+import difflib
+import random
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.search.confidence import ConfidenceScorer
+from epub_pipeline.utils.similarity import (
+    best_name_similarity,
+    indel_ratio,
+    name_similarity,
+    score_batch,
+    similarity,
+    token_sort_ratio,
+)
+
+
+def _lcs(a, b):
+    """Textbook dynamic programming LCS, as a reference."""
+    row = [0] * (len(b) + 1)
+    for char in a:
+        previous = 0
+        for j, other in enumerate(b):
+            previous, row[j + 1] = row[j + 1], previous + 1 if char == other else max(row[j + 1], row[j])
+    return row[-1]
+
+
+def test_indel_ratio_matches_reference_lcs():
+    rng = random.Random(0)
+    for _ in range(500):
+        a = "".join(rng.choices("abcde ", k=rng.randint(1, 40)))
+        b = "".join(rng.choices("abcde ", k=rng.randint(1, 40)))
+
+        assert indel_ratio(a, b) == pytest.approx(2 * _lcs(a, b) / (len(a) + len(b)))
+        # SequenceMatcher finds a common subsequence, not always the longest one
+        assert indel_ratio(a, b) >= difflib.SequenceMatcher(None, a, b).ratio() - 1e-9
+
+
+def test_similarity_contract():
+    assert similarity("Dune", "DUNE ") == 1.0
+    assert similarity("Dune", "") == 0.0
+    assert similarity(None, "Dune") == 0.0
+    assert 0.0 < similarity("Harry Potter", "Barry Trotter") < 1.0
+
+
+def test_token_matching():
+    assert token_sort_ratio("Herbert, Frank", "Frank Herbert") == 1.0
+    assert name_similarity("Herbert, Frank", "Frank Herbert") == 1.0
+
+
+def test_batch_scores_match_pairwise():
+    choices = ["The Hobbit", "the hobbit", "", "Hobbit, The", "The Silmarillion"]
+
+    assert score_batch("The Hobbit", choices) == [similarity("The Hobbit", choice) for choice in choices]
+
+
+def test_best_name_similarity_scans_every_pair():
+    local = ["Isaac Asimov", "Ursula K. Le Guin", "Frank Herbert"]
+    remote = ["Le Guin, Ursula K.", "Robert Silverberg"]
+
+    assert best_name_similarity(local, remote) == (1.0, 1, 0)
+
+    score, i, j = best_name_similarity(["Frank Herbrt"], ["Isaac Asimov", "Frank Herbert"])
+    assert (i, j) == (0, 1) and score == name_similarity("Frank Herbrt", "Frank Herbert")
+    assert best_name_similarity([], ["Frank Herbert"]) == (0.0, -1, -1)
+
+
+def test_backends(monkeypatch):
+    assert (
+        similarity("Harry Potter", "Barry Trotter")
+        == difflib.SequenceMatcher(None, "harry potter", "barry trotter").ratio()
+    )
+
+    monkeypatch.setattr(config, "SIMILARITY_BACKEND", "indel")
+    assert similarity("Harry Potter", "Barry Trotter") == indel_ratio("harry potter", "barry trotter")
+
+
+def test_calculate_batch_matches_calculate():
+    local = {"title": "Dune", "authors": ["Frank Herbert"]}
+    candidates = [
+        {"title": "Dune", "authors": ["Herbert, Frank"]},
+        {"title": "Dune Messiah", "authors": ["Frank Herbert"]},
+        {"title": "Children of Dune", "authors": ["Brian Herbert", "Kevin J. Anderson"]},
+    ]
+
+    batch = ConfidenceScorer.calculate_batch("Text", local, candidates, 3)
+
+    assert batch == [ConfidenceScorer.calculate("Text", local, candidate, 3) for candidate in candidates]
+    assert batch[0][0] > batch[1][0] > batch[2][0]
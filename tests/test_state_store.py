@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import pytest
+
+from epub_pipeline import config
+from epub_pipeline.pipeline.orchestrator import PipelineOrchestrator
+from epub_pipeline.pipeline.state_store import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / "state.sqlite"))
+
+
+class TestStateStore:
+    def test_record_and_done(self, store, tmp_path):
+        book = tmp_path / "book.epub"
+        book.write_bytes(b"content")
+
+        assert store.is_done(str(book)) is False
+        store.record(str(book), search_result={"data": None, "confidence": 0, "strategy": "None"})
+        store.record(str(book), output_name="book.kepub.epub", upload_id="drive-id")
+        assert store.is_done(str(book)) is False
+
+        store.mark_done(str(book))
+        assert store.is_done(str(book)) is True
+
+        state = store.get(str(book))
+        assert state["search_result"]["strategy"] == "None"
+        assert state["upload_id"] == "drive-id"
+
+    def test_unchanged_file_is_not_rehashed(self, store, tmp_path, mocker):
+        book = tmp_path / "book.epub"
+        book.write_bytes(b"content")
+        store.mark_done(str(book))
+
+        spy = mocker.spy(StateStore, "hash_file")
+        assert store.is_done(str(book)) is True
+        spy.assert_not_called()
+
+    def test_moved_and_modified_files(self, store, tmp_path):
+        book = tmp_path / "book.epub"
+        book.write_bytes(b"content")
+        store.mark_done(str(book))
+
+        # Same content elsewhere: recognized through the content hash
+        moved = tmp_path / "moved.epub"
+        shutil.copy2(book, moved)
+        assert store.is_done(str(moved)) is True
+
+        # Changed content: processed again
+        book.write_bytes(b"new content")
+        os.utime(book, (1, 1))
+        assert store.is_done(str(book)) is False
+
+    def test_unknown_stage(self, store, tmp_path):
+        book = tmp_path / "book.epub"
+        book.write_bytes(b"content")
+        with pytest.raises(ValueError):
+            store.record(str(book), nonsense=1)
+
+
+def test_incremental_directory_run(tmp_path, monkeypatch, make_epub):
+    library = tmp_path / "library"
+    library.mkdir()
+    make_epub("a.epub", title="Dune", directory=library)
+    make_epub("b.epub", title="Emma", directory=library)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "STATE_DB_PATH", str(tmp_path / "state.sqlite"))
+    searched = []
+
+    def fake_find_book(meta, providers=None):
+        searched.append(meta["title"])
+        return None, 0, "None"
+
+    monkeypatch.setattr("epub_pipeline.pipeline.orchestrator.find_book", fake_find_book)
+
+    orch = PipelineOrchestrator(enable_kepub=False, enable_upload=False, incremental=True)
+    orch.process_directory(str(library))
+    assert sorted(searched) == ["Dune", "Emma"]
+
+    # Second run: nothing left to do
+    orch.process_directory(str(library))
+    assert len(searched) == 2
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from epub_pipeline.pipeline.workspace import Workspace
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "library" / "book.epub"
+    path.parent.mkdir()
+    path.write_bytes(b"original")
+    return path
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    path = tmp_path / "work"
+    path.mkdir()
+    return path
+
+
+class TestWorkspace:
+    def test_hardlink_is_materialized_before_write(self, source, workdir, mocker):
+        mocker.patch.object(Workspace, "_reflink", return_value=False)
+        ws = Workspace(str(source), str(workdir))
+        assert ws.mode == "hardlink"
+        assert os.path.samefile(ws.path, source)
+
+        path = ws.materialize()
+        assert not os.path.samefile(path, source)
+        with open(path, "wb") as f:
+            f.write(b"modified")
+        assert source.read_bytes() == b"original"
+
+    def test_reference_mode_copies_lazily(self, source, workdir, mocker):
+        mocker.patch.object(Workspace, "_reflink", return_value=False)
+        mocker.patch.object(Workspace, "_hardlink", return_value=False)
+        ws = Workspace(str(source), str(workdir))
+
+        # Nothing copied until needed
+        assert ws.mode == "reference"
+        assert ws.path == str(source)
+        assert os.listdir(workdir) == []
+
+        assert ws.local() == str(workdir / "book.epub")
+        assert ws.mode == "copy"
+        assert (workdir / "book.epub").read_bytes() == b"original"
+
+    def test_reflink_when_supported(self, source, workdir, mocker):
+        mocker.patch.object(Workspace, "_reflink", return_value=True)
+        ws = Workspace(str(source), str(workdir))
+        assert ws.mode == "reflink"
+        # A reflink is already private: nothing more to do
+        assert ws.materialize() == str(workdir / "book.epub")
+        assert ws.mode == "reflink"
+
+    def test_real_fallback_chain(self, source, workdir):
+        # Whatever the filesystem supports, the source must stay intact
+        ws = Workspace(str(source), str(workdir))
+        with open(ws.materialize(), "wb") as f:
+            f.write(b"modified")
+        assert source.read_bytes() == b"original"
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ensure project root is in path
+if __name__ == "__main__" and __package__ is None:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.kepub_converter import KepubConverter
+from epub_pipeline.pipeline.kepub_handler import KepubHandler
+from epub_pipeline.utils.library_scanner import LibraryScanner
+from epub_pipeline.utils.logger import Logger
+
+SAMPLE_UPDATE = {"title": "Benchmark Title", "authors": ["Benchmark Author"], "publishedDate": "2000"}
+
+
+def kepubify_pipeline(path, work_dir, binary):
+    """Two passes: the book is saved, then converted by the kepubify subprocess."""
+    saved = os.path.join(work_dir, "saved.epub")
+    manager = EpubManager(path, streaming=False)
+    manager.update_metadata(SAMPLE_UPDATE)
+    manager.save(saved)
+    subprocess.run(
+        [binary, saved, "-o", os.path.join(work_dir, "kepubify.kepub.epub")], check=True, capture_output=True
+    )
+
+
+def native_pipeline(path, work_dir):
+    """Single pass: metadata update and KEPUB conversion written together."""
+    manager = EpubManager(path, streaming=True)
+    manager.update_metadata(SAMPLE_UPDATE)
+    manager.save(os.path.join(work_dir, "native.kepub.epub"), kepub=True)
+
+
+def native_conversion(path, work_dir):
+    KepubConverter.convert(path, os.path.join(work_dir, "convert.kepub.epub"))
+
+
+def measure(fn, *args, repeat=3):
+    """Best-of-`repeat` wall time, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-book time of the native KEPUB converter vs kepubify.")
+    parser.add_argument("path", help="EPUB file or directory.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per book (best time is kept).")
+    args = parser.parse_args()
+
+    paths = list(LibraryScanner().scan(args.path)) if os.path.isdir(args.path) else [args.path]
+    if not paths:
+        Logger.warning(f"No EPUB files found in {args.path}")
+        return
+
+    binary = KepubHandler.get_binary_path()
+    if not binary:
+        Logger.warning("kepubify not found: only the native converter is measured.")
+
+    results = {"native convert": [], "native update+convert": [], "save + kepubify": []}
+    print(f"{'Book':40} {'Size':>8}" + "".join(f"{key:>24}" for key in results))
+    for path in paths:
+        with tempfile.TemporaryDirectory() as work_dir:
+            row = [
+                measure(native_conversion, path, work_dir, repeat=args.repeat),
+                measure(native_pipeline, path, work_dir, repeat=args.repeat),
+                measure(kepubify_pipeline, path, work_dir, binary, repeat=args.repeat) if binary else None,
+            ]
+        for key, value in zip(results, row):
+            if value is not None:
+                results[key].append(value)
+        size = os.path.getsize(path) / 1024
+        cells = "".join(f"{v:>22.1f}ms" if v is not None else f"{'-':>24}" for v in row)
+        print(f"{os.path.basename(path)[:40]:40} {size:>6.0f}KB {cells}")
+
+    print("-" * 120)
+    for key, values in results.items():
+        if values:
+            print(f"{key:24} median {statistics.median(values):8.1f} ms/book   total {sum(values):9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import itertools
 import os
 import sys
 
@@ -7,9 +8,10 @@ import sys
 if __name__ == "__main__" and __package__ is None:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.metadata_reader import OpfReader
 from epub_pipeline.search.book_finder import find_book
 from epub_pipeline.utils.formatter import Formatter
+from epub_pipeline.utils.library_scanner import LibraryScanner
 from epub_pipeline.utils.logger import Logger
 from epub_pipeline.utils.text_utils import sanitize_filename
 
@@ -19,8 +21,8 @@ def process_file(file_path):
     Logger.info(f"DRY RUN Pipeline for: {file_path}")
 
     # 1. Extraction
-    manager = EpubManager(file_path)
-    meta = manager.get_curated_metadata()
+    reader = OpfReader(file_path)
+    meta = reader.get_curated_metadata()
     if not meta:
         Logger.error("Failed to extract metadata.")
         return
@@ -85,14 +87,15 @@ def main():
         sys.exit(1)
 
     if os.path.isdir(args.path):
-        files = [f for f in os.listdir(args.path) if f.lower().endswith(".epub")]
-        if not files:
+        files = LibraryScanner().scan(args.path)
+        first = next(files, None)
+        if first is None:
             Logger.warning(f"No EPUB files found in {args.path}")
             return
 
-        Logger.info(f"Simulating pipeline for {len(files)} files in {args.path}...")
-        for f in files:
-            process_file(os.path.join(args.path, f))
+        Logger.info(f"Simulating pipeline for files in {args.path}...")
+        for path in itertools.chain([first], files):
+            process_file(path)
     else:
         process_file(args.path)
 
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+
+# Ensure project root is in path
+if __name__ == "__main__" and __package__ is None:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from epub_pipeline import config
+from epub_pipeline.search.local_index import LocalIndex
+from epub_pipeline.utils.logger import Logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import OpenLibrary data dumps (editions, works, authors) into the offline metadata index."
+    )
+    parser.add_argument(
+        "dumps", nargs="*", help="Dump files (.txt.gz as published by OpenLibrary, or gzipped/plain JSONL)."
+    )
+    parser.add_argument("--index", default=None, help=f"Index path (default: {config.LOCAL_INDEX_PATH}).")
+    parser.add_argument(
+        "--no-text-index",
+        action="store_true",
+        help="Skip the trigram index rebuild (when more dumps are imported next).",
+    )
+    args = parser.parse_args()
+
+    missing = [path for path in args.dumps if not os.path.exists(path)]
+    if missing:
+        Logger.error(f"File not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    path = args.index or config.LOCAL_INDEX_PATH
+    index = LocalIndex(path)
+    try:
+        for dump in args.dumps:
+            Logger.info(f"Importing {dump}...")
+            start = time.perf_counter()
+            counts = index.import_dump(dump, progress=lambda n: Logger.verbose(f"{n} records read"))
+            Logger.success(
+                f"{counts['editions']} editions, {counts['works']} works, {counts['authors']} authors "
+                f"({counts['skipped']} skipped) in {time.perf_counter() - start:.1f}s"
+            )
+
+        if not args.no_text_index:
+            Logger.info("Building the text search index...")
+            start = time.perf_counter()
+            docs = index.build_text_index(progress=lambda n: Logger.verbose(f"{n} editions indexed"))
+            Logger.success(f"{docs} titles indexed in {time.perf_counter() - start:.1f}s")
+    finally:
+        index.close()
+
+    Logger.info(f"Index: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    if os.path.abspath(path) != os.path.abspath(config.LOCAL_INDEX_PATH):
+        Logger.info(f"Set LOCAL_INDEX_PATH={path} to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import itertools
 import os
 import sys
 
@@ -7,26 +8,42 @@ import sys
 if __name__ == "__main__" and __package__ is None:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.catalog import open_catalog
+from epub_pipeline.pipeline.metadata_reader import OpfReader
 from epub_pipeline.utils.formatter import Formatter
+from epub_pipeline.utils.library_scanner import LibraryScanner
 from epub_pipeline.utils.logger import Logger
 
 
-def process_file(path, args):
+def process_file(path, args, catalog=None):
     Logger.info(f"Inspecting: {path}")
-    manager = EpubManager(path)
+    entry = catalog.lookup(path) if catalog and not args.full else None
+    if entry:
+        meta, error = entry
+        if error:
+            Logger.error(f"Failed to read EPUB file: {error}")
+        else:
+            Formatter.print_curated(os.path.basename(path), meta)
+        return
+
+    reader = OpfReader(path)
 
-    if not manager.book:
+    if not reader.book:
         Logger.error("Failed to read EPUB file.")
         return
 
-    Formatter.print_metadata(manager, full=args.full)
+    Formatter.print_metadata(reader, full=args.full)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Inspect EPUB metadata without modifying anything.")
     parser.add_argument("path", nargs="?", default="data", help="Path to EPUB file or directory.")
     parser.add_argument("--full", action="store_true", help="Show raw XML metadata tags.")
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Read the metadata from the library catalog (new or changed files are parsed first, in parallel).",
+    )
     args = parser.parse_args()
 
     if not os.path.exists(args.path):
@@ -34,16 +51,22 @@ def main():
         sys.exit(1)
 
     if os.path.isdir(args.path):
-        files = [f for f in os.listdir(args.path) if f.lower().endswith(".epub")]
-        if not files:
+        files = LibraryScanner().scan(args.path)
+        first = next(files, None)
+        if first is None:
             Logger.warning(f"No EPUB files found in {args.path}")
             return
 
-        Logger.info(f"Processing {len(files)} files in {args.path}...")
-        for f in files:
-            process_file(os.path.join(args.path, f), args)
+        Logger.info(f"Processing files in {args.path}...")
+        paths = itertools.chain([first], files)
+        catalog = None
+        if args.catalog:
+            paths = list(paths)
+            catalog = open_catalog(paths, root=args.path)
+        for path in paths:
+            process_file(path, args, catalog)
     else:
-        process_file(args.path, args)
+        process_file(args.path, args, open_catalog([args.path]) if args.catalog else None)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import itertools
 import os
 import sys
 
@@ -7,17 +8,17 @@ if __name__ == "__main__" and __package__ is None:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from epub_pipeline import config
-from epub_pipeline.pipeline.epub_manager import EpubManager
+from epub_pipeline.pipeline.catalog import open_catalog
+from epub_pipeline.pipeline.engine import read_metadata
 from epub_pipeline.search.book_finder import find_book
 from epub_pipeline.utils.formatter import Formatter
+from epub_pipeline.utils.library_scanner import LibraryScanner
 from epub_pipeline.utils.logger import Logger
 
 
-def process_file(path):
+def process_file(path, catalog=None):
     Logger.info(f"\nSearching metadata for: {path}")
-    manager = EpubManager(path)
-
-    meta = manager.get_curated_metadata()
+    meta = read_metadata(path, catalog)
     if not meta:
         Logger.error("Could not extract basic metadata from file.")
         return
@@ -36,6 +37,11 @@ def main():
     parser = argparse.ArgumentParser(description="Test metadata search for an EPUB file.")
     parser.add_argument("path", nargs="?", default="data", help="Path to EPUB file or directory.")
     parser.add_argument("-v", "--verbose", action="store_true", help="Show detailed search steps.")
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Read the local metadata from the library catalog instead of opening every EPUB.",
+    )
     args = parser.parse_args()
 
     config.VERBOSE = args.verbose
@@ -45,16 +51,22 @@ def main():
         sys.exit(1)
 
     if os.path.isdir(args.path):
-        files = [f for f in os.listdir(args.path) if f.lower().endswith(".epub")]
-        if not files:
+        files = LibraryScanner().scan(args.path)
+        first = next(files, None)
+        if first is None:
             Logger.warning(f"No EPUB files found in {args.path}")
             return
 
-        Logger.info(f"Searching for {len(files)} files in {args.path}...")
-        for f in files:
-            process_file(os.path.join(args.path, f))
+        Logger.info(f"Searching for files in {args.path}...")
+        paths = itertools.chain([first], files)
+        catalog = None
+        if args.catalog:
+            paths = list(paths)
+            catalog = open_catalog(paths, root=args.path)
+        for path in paths:
+            process_file(path, catalog)
     else:
-        process_file(args.path)
+        process_file(args.path, open_catalog([args.path]) if args.catalog else None)
 
 
 if __name__ == "__main__":